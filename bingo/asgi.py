@@ -1,6 +1,5 @@
 import os
 
-from channels.auth import AuthMiddlewareStack
 from channels.routing import ProtocolTypeRouter, URLRouter
 from channels.security.websocket import AllowedHostsOriginValidator
 from django.core.asgi import get_asgi_application
@@ -10,13 +9,15 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "bingo.settings")
 # is populated before importing code that may import ORM models.
 django_asgi_app = get_asgi_application()
 
+from game.identity import PlayerTokenMiddleware
+from game.ratelimit import RateLimitMiddleware
 from game.routing import websocket_urlpatterns
 
 application = ProtocolTypeRouter(
     {
         "http": django_asgi_app,
         "websocket": AllowedHostsOriginValidator(
-            AuthMiddlewareStack(URLRouter(websocket_urlpatterns))
+            PlayerTokenMiddleware(RateLimitMiddleware(URLRouter(websocket_urlpatterns)))
         ),
     }
 )
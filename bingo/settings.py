@@ -80,6 +80,15 @@ ASGI_APPLICATION = "bingo.asgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
+# psycopg 3 connection pool per worker process, shared by its threads, so the
+# consumers' queries don't each open a fresh connection. DB_POOL=False turns it
+# off.
+DB_POOL = config("DB_POOL", default=True, cast=bool) and {
+    "min_size": config("DB_POOL_MIN_SIZE", default=2, cast=int),
+    "max_size": config("DB_POOL_MAX_SIZE", default=10, cast=int),
+    "timeout": config("DB_POOL_TIMEOUT", default=10, cast=int),
+}
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
@@ -88,23 +97,63 @@ DATABASES = {
         "PASSWORD": config("DB_PASSWORD", default="testpass123"),
         "HOST": config("DB_HOST", default="localhost"),
         "PORT": config("DB_PORT", default="5432"),
+        "OPTIONS": {"pool": DB_POOL},
     }
 }
 
+REDIS_HOST = config("REDIS_HOST", default="127.0.0.1")
+REDIS_PORT = config("REDIS_PORT", default=6379, cast=int)
+
 CHANNEL_LAYERS = {
     "default": {
         "BACKEND": "channels_redis.core.RedisChannelLayer",
         "CONFIG": {
-            "hosts": [
-                (
-                    config("REDIS_HOST", default="127.0.0.1"),
-                    config("REDIS_PORT", default=6379, cast=int),
-                )
-            ],
+            "hosts": [(REDIS_HOST, REDIS_PORT)],
         },
     },
 }
 
+# Where the state of games in progress lives: "db" reads and writes Postgres on
+# every move, "redis" keeps active games in Redis and only writes Postgres when
+# a game is created or ends.
+LIVE_STATE_BACKEND = config("LIVE_STATE_BACKEND", default="db")
+
+# Send only the cells, letters and turn indicator a move changed instead of the
+# full board to clients that are up to date.
+DELTA_UPDATES = config("DELTA_UPDATES", default=True, cast=bool)
+
+# Run the 15s turn timeout on the server (Redis-backed, shared by all workers)
+# instead of relying on each browser to post the auto-pick.
+SERVER_TURN_TIMER = config("SERVER_TURN_TIMER", default=True, cast=bool)
+
+# Seconds between in-process sweeps for finished and abandoned games (0 disables;
+# `manage.py reap_games` does the same sweep on demand).
+REAPER_INTERVAL = config("REAPER_INTERVAL", default=300, cast=int)
+
+# Seconds a player whose socket dropped has to reconnect before the game is
+# torn down (0 ends the game as soon as a socket closes).
+RECONNECT_GRACE = config("RECONNECT_GRACE", default=30, cast=int)
+
+# Record hot-path counters and latency histograms and serve them on /metrics.
+METRICS_ENABLED = config("METRICS_ENABLED", default=False, cast=bool)
+
+# Share of moves traced end to end (0 to 1); traces are kept in memory and
+# shown at /admin/traces/.
+TRACE_SAMPLE_RATE = config("TRACE_SAMPLE_RATE", default=0.0, cast=float)
+
+# Daphne workers `manage.py runworkers` starts behind its game-affinity router,
+# listening on local ports from WORKER_BASE_PORT up. entrypoint.sh runs a
+# single daphne when this is 1.
+WEB_WORKERS = config("WEB_WORKERS", default=1, cast=int)
+WORKER_BASE_PORT = config("WORKER_BASE_PORT", default=8100, cast=int)
+
+# Token bucket rate limits per player (per IP without a player cookie) on moves
+# and WebSocket messages, and per IP on joins and WebSocket connects; see
+# game/ratelimit.py. With more than one worker the buckets are also kept in
+# Redis so a limit holds across workers.
+RATE_LIMIT_ENABLED = config("RATE_LIMIT_ENABLED", default=True, cast=bool)
+RATE_LIMIT_SHARED = config("RATE_LIMIT_SHARED", default=WEB_WORKERS > 1, cast=bool)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -18,7 +18,15 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from game.admin import live_games_view, traces_view
+
 urlpatterns = [
+    path("admin/traces/", admin.site.admin_view(traces_view), name="admin_traces"),
+    path(
+        "admin/live-games/",
+        admin.site.admin_view(live_games_view),
+        name="admin_live_games",
+    ),
     path("admin/", admin.site.urls),
     path("", include("game.urls")),
 ]
@@ -2,4 +2,7 @@
 set -e
 
 python manage.py migrate --noinput
+if [ "${WEB_WORKERS:-1}" -gt 1 ]; then
+    exec python manage.py runworkers --port 8000
+fi
 exec daphne -b 0.0.0.0 -p 8000 bingo.asgi:application
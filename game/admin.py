@@ -1,10 +1,25 @@
 from django.contrib import admin
+from django.db.models import OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.template.response import TemplateResponse
+from django.utils import timezone
+from django.utils.html import format_html, format_html_join
 
-from .models import Game, Player
-from django.utils.html import format_html
+from .models import Game, Move, Player, PlayerStats
+from . import tracing
 
-# Register your models here.
-admin.site.register(Game)
+LIVE_GAMES_PAGE_SIZE = 50
+
+CELL_STYLE = "border:1px solid #ccc;padding:4px;text-align:center;"
+
+
+@admin.register(Game)
+class GameAdmin(admin.ModelAdmin):
+    list_display = ("game_code", "mode", "is_active", "created_at", "last_move_made_at")
+    list_filter = ("is_active", "mode")
+    search_fields = ("game_code",)
+    # COUNT(*) over every game on each page load is slow on a big table
+    show_full_result_count = False
 
 
 @admin.register(Player)
@@ -16,18 +31,121 @@ class PlayerAdmin(admin.ModelAdmin):
         "display_board",
         "turn",
     )
-    readonly_fields = ("display_board", "board")
+    # Player.__str__ and the board both need the game
+    list_select_related = ("game",)
+    readonly_fields = ("display_board",)
+    show_full_result_count = False
 
     def display_board(self, obj):
-        if not obj.board:
+        if not obj.board_order:
             return ""
-        html = "<table style='border-collapse:collapse;'>"
-        for row in obj.board:
-            html += "<tr>"
-            for cell in row:
-                html += f"<td style='border:1px solid #ccc;padding:4px;text-align:center;'>{cell}</td>"
-            html += "</tr>"
-        html += "</table>"
-        return format_html(html)
+        rows = format_html_join(
+            "",
+            "<tr>{}</tr>",
+            (
+                (
+                    format_html_join(
+                        "",
+                        '<td style="{}">{}</td>',
+                        ((CELL_STYLE, cell) for cell in row),
+                    ),
+                )
+                for row in obj.board
+            ),
+        )
+        return format_html('<table style="border-collapse:collapse;">{}</table>', rows)
 
     display_board.short_description = "Board"
+
+
+@admin.register(PlayerStats)
+class PlayerStatsAdmin(admin.ModelAdmin):
+    list_display = ("name", "player_id", "games", "wins", "losses", "abandoned")
+    search_fields = ("name",)
+    ordering = ("-wins",)
+    # Totals only move through stats.record_result and record_abandoned
+    readonly_fields = (
+        "player_id",
+        "games",
+        "wins",
+        "losses",
+        "abandoned",
+        "moves_to_win",
+    )
+    show_full_result_count = False
+
+
+def live_games(before=None, limit=LIVE_GAMES_PAGE_SIZE):
+    """
+    A page of active games, newest first, with their players prefetched and
+    `move_count` and `last_move_at` annotated: two queries whatever the page or
+    table size. Pages are keyed on the game id, so `before` is the id of the
+    last game on the previous page.
+    """
+    # The newest logged move is read off the (game, seq) index, not counted
+    last_move = Move.objects.filter(game=OuterRef("pk")).order_by("-seq")[:1]
+    games = (
+        Game.objects.filter(is_active=True)
+        .defer("numbers", "called_numbers")
+        .annotate(
+            move_count=Greatest(
+                "snapshot_seq", Coalesce(Subquery(last_move.values("seq")), 0)
+            ),
+            last_move_at=Coalesce(
+                Subquery(last_move.values("created_at")), "last_move_made_at"
+            ),
+        )
+        .prefetch_related(
+            Prefetch(
+                "players",
+                queryset=Player.objects.only("game", "name", "turn").order_by("id"),
+            )
+        )
+        .order_by("-id")
+    )
+    if before is not None:
+        games = games.filter(id__lt=before)
+    return list(games[:limit])
+
+
+def live_games_view(request):
+    """Operations view of the games in progress."""
+    try:
+        before = int(request.GET["before"])
+    except (KeyError, ValueError):
+        before = None
+    games = live_games(before, LIVE_GAMES_PAGE_SIZE + 1)
+    now = timezone.now()
+    for game in games:
+        # Seconds the player to move has had
+        game.turn_age = int(
+            (now - (game.last_move_at or game.created_at)).total_seconds()
+        )
+    return TemplateResponse(
+        request,
+        "admin/live_games.html",
+        {
+            **admin.site.each_context(request),
+            "title": "Live games",
+            "games": games[:LIVE_GAMES_PAGE_SIZE],
+            "next_before": (
+                games[LIVE_GAMES_PAGE_SIZE - 1].id
+                if len(games) > LIVE_GAMES_PAGE_SIZE
+                else None
+            ),
+            "first_page": before is None,
+        },
+    )
+
+
+def traces_view(request):
+    """Recent move traces recorded by this process, newest first."""
+    return TemplateResponse(
+        request,
+        "admin/traces.html",
+        {
+            **admin.site.each_context(request),
+            "title": "Move traces",
+            "traces": tracing.recent(),
+        },
+    )
@@ -0,0 +1,120 @@
+"""
+Fast renderer for partials/board.html and partials/cell.html.
+
+The templates stay the source of truth: each cell state (free, called, in a
+completed line) is rendered once per process with placeholders for row, col
+and number, and board.html is rendered once to capture the markup between
+cells. A board's cell markup is then filled in once and cached, so rendering
+a board is a bitset test per cell and a string join, and the output is
+byte-identical to render_to_string.
+"""
+
+from functools import lru_cache
+
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from . import scoring
+
+FREE, CALLED, LINE = 0, 1, 2
+
+ROW = "__row__"
+COL = "__col__"
+NUMBER = "__number__"
+
+# (called_numbers, line_numbers) that put a placeholder cell in each state
+_STATES = (([], []), ([NUMBER], []), ([NUMBER], [NUMBER]))
+
+
+def _fill(markup, row, col, number):
+    return (
+        markup.replace(ROW, str(row))
+        .replace(COL, str(col))
+        .replace(NUMBER, str(number))
+    )
+
+
+@lru_cache(maxsize=None)
+def _cell_templates(oob):
+    return tuple(
+        render_to_string(
+            "partials/cell.html",
+            {
+                "row": ROW,
+                "col": COL,
+                "cell": NUMBER,
+                "oob": oob,
+                "game": {"called_numbers": called},
+                "line_numbers": line_numbers,
+            },
+        )
+        for called, line_numbers in _STATES
+    )
+
+
+@lru_cache(maxsize=None)
+def _skeleton():
+    """Returns the board.html markup around the 25 cells, as 26 pieces."""
+    size = scoring.BOARD_SIZE
+    board = [[f"__cell_{row}_{col}__" for col in range(size)] for row in range(size)]
+    html = render_to_string(
+        "partials/board.html",
+        {"board": board, "game": {"called_numbers": []}, "line_numbers": []},
+    )
+    free = _cell_templates(False)[FREE]
+    pieces = []
+    position = 0
+    for row in range(size):
+        for col in range(size):
+            cell = _fill(free, row, col, board[row][col])
+            start = html.index(cell, position)
+            pieces.append(html[position:start])
+            position = start + len(cell)
+    pieces.append(html[position:])
+    return tuple(pieces)
+
+
+@lru_cache(maxsize=4096)
+def _board_cells(board, oob):
+    """Returns ((number, markup per state), ...) for every cell of a frozen board."""
+    templates = _cell_templates(oob)
+    return tuple(
+        (number, tuple(_fill(markup, row, col, number) for markup in templates))
+        for row, numbers in enumerate(board)
+        for col, number in enumerate(numbers)
+    )
+
+
+def _state(number, called, lines):
+    bit = 1 << number
+    if lines & bit:
+        return LINE
+    if called & bit:
+        return CALLED
+    return FREE
+
+
+def render_board(board, called, lines):
+    """
+    Renders partials/board.html. `called` is the game's called bitset and
+    `lines` the bitset of numbers in the board's completed lines.
+    """
+    skeleton = _skeleton()
+    pieces = [skeleton[0]]
+    for index, (number, markup) in enumerate(
+        _board_cells(scoring.freeze_board(board), False)
+    ):
+        pieces.append(markup[_state(number, called, lines)])
+        pieces.append(skeleton[index + 1])
+    return mark_safe("".join(pieces))
+
+
+def render_cells(board, cells, called, lines):
+    """Renders out-of-band swaps of partials/cell.html for the given (row, col)s."""
+    size = scoring.BOARD_SIZE
+    rendered = _board_cells(scoring.freeze_board(board), True)
+    pieces = []
+    for row, col in cells:
+        number, markup = rendered[row * size + col]
+        pieces.append(markup[_state(number, called, lines)])
+    return mark_safe("".join(pieces))
@@ -0,0 +1,239 @@
+"""
+Group events for a game, rendered once when the state changes.
+
+Every connected `GameConsumer` receives the same event and only forwards its
+own player's fragment, so the fan-out path does no queries or rendering.
+
+Events carry the game `version` (the number of called numbers). After a move,
+`deltas` holds fragments that only swap the cells and BINGO letters that
+changed plus the turn indicator; a consumer that saw the previous version
+forwards its delta, any other falls back to a full board render.
+`sent_at` is the wall-clock time the event was rendered, for fan-out metrics,
+and `trace_id` is set when the move is being traced.
+
+Spectators are in a separate group and get a single view of both boards,
+rendered once per change and sent after the players' update, so a crowd of
+watchers neither slows the players' fan-out nor costs per-spectator queries.
+"""
+
+import time
+
+from asgiref.sync import sync_to_async
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.template.loader import render_to_string
+
+from . import board_renderer, metrics, scoring, tracing, util
+
+HEADING = "BINGO"
+
+
+def _ordered(players):
+    return sorted(players, key=lambda player: player.player_id)
+
+
+def group_name(game_code):
+    return f"game_{game_code}"
+
+
+def spectator_group_name(game_code):
+    return f"game_{game_code}_spectators"
+
+
+def board_context(game, player, players, called):
+    completed_lines, lines = scoring.completed_mask(player.board, called)
+    return {
+        "board": player.board,
+        "game": game,
+        "player": player,
+        "lines": lines,
+        "completed_lines": completed_lines,
+        "player_count": len(players),
+        "players": players,
+        "client_turn_timer": not settings.SERVER_TURN_TIMER,
+    }
+
+
+def render_board(game, player, players):
+    """Renders the full board_oob.html fragment for one player."""
+    players = _ordered(players)
+    called = scoring.called_mask(game.called_numbers)
+    context = board_context(game, player, players, called)
+    context["board_html"] = board_renderer.render_board(
+        player.board, called, context["lines"]
+    )
+    return render_to_string("partials/board_oob.html", context)
+
+
+def board_fragments(game, players):
+    """Returns {player_id: rendered board_oob.html} for every player in the game."""
+    return {
+        str(player.player_id): render_board(game, player, players) for player in players
+    }
+
+
+def _cell_changes(board, number, called, lines, completed_lines):
+    """
+    Returns the cells_html and letters of board_delta.html for the call of
+    `number`: the called cell, cells that joined a completed line and newly
+    lit letters.
+    """
+    previous = called & ~(1 << number)
+    previous_lines, previous_mask = scoring.completed_mask(board, previous)
+    changed = (1 << number) | (lines & ~previous_mask)
+    cells = [
+        (row, col)
+        for row, numbers in enumerate(board)
+        for col, cell in enumerate(numbers)
+        if changed >> cell & 1
+    ]
+    return {
+        "cells_html": board_renderer.render_cells(board, cells, called, lines),
+        "letters": [
+            (index, HEADING[index - 1])
+            for index in range(
+                previous_lines + 1, min(completed_lines, len(HEADING)) + 1
+            )
+        ],
+    }
+
+
+def delta_fragments(game, players):
+    """
+    Returns {player_id: rendered board_delta.html} for the last called number:
+    the called cell, cells that joined a completed line, newly lit letters
+    and the game info.
+    """
+    players = _ordered(players)
+    number = game.called_numbers[-1]
+    called = scoring.called_mask(game.called_numbers)
+    fragments = {}
+    for player in players:
+        context = board_context(game, player, players, called)
+        context.update(
+            _cell_changes(
+                player.board,
+                number,
+                called,
+                context["lines"],
+                context["completed_lines"],
+            )
+        )
+        fragments[str(player.player_id)] = render_to_string(
+            "partials/board_delta.html", context
+        )
+    return fragments
+
+
+def _room_context(game_code, board, called_numbers, player_count):
+    called = scoring.called_mask(called_numbers)
+    completed_lines, lines = scoring.completed_mask(board, called)
+    return {
+        "game_code": game_code,
+        "board": board,
+        "called": called,
+        "lines": lines,
+        "completed_lines": completed_lines,
+        "called_numbers": called_numbers,
+        "last_called": called_numbers[-1] if called_numbers else None,
+        "player_count": player_count,
+    }
+
+
+def render_room(game_code, board, called_numbers, player_count):
+    """Renders the full room_oob.html fragment for a board in a caller game."""
+    context = _room_context(game_code, board, called_numbers, player_count)
+    context["board_html"] = board_renderer.render_board(
+        board, context["called"], context["lines"]
+    )
+    return render_to_string("partials/room_oob.html", context)
+
+
+def room_delta(game_code, board, called_numbers, player_count):
+    """Renders room_delta.html for the last number called in a caller game."""
+    context = _room_context(game_code, board, called_numbers, player_count)
+    context.update(
+        _cell_changes(
+            board,
+            called_numbers[-1],
+            context["called"],
+            context["lines"],
+            context["completed_lines"],
+        )
+    )
+    return render_to_string("partials/room_delta.html", context)
+
+
+def spectator_view(game, players, winner=None, abandoned=False):
+    """Renders spectator_view.html: both boards, turns and the called numbers."""
+    players = _ordered(players)
+    called = scoring.called_mask(game.called_numbers)
+    boards = []
+    for player in players:
+        completed_lines, lines = scoring.completed_mask(player.board, called)
+        boards.append(
+            {
+                "player": player,
+                "completed_lines": completed_lines,
+                "board_html": board_renderer.render_board(player.board, called, lines),
+            }
+        )
+    return render_to_string(
+        "partials/spectator_view.html",
+        {
+            "game": game,
+            "boards": boards,
+            "player_count": len(players),
+            "winner": winner,
+            "abandoned": abandoned,
+        },
+    )
+
+
+async def publish_spectators(channel_layer, game, players, **kwargs):
+    """Send the spectator view of the game's current state to its watchers."""
+    html = await sync_to_async(spectator_view)(game, players, **kwargs)
+    await channel_layer.group_send(
+        spectator_group_name(game.game_code),
+        {"type": "spectator_update", "html": html},
+    )
+
+
+def game_update_event(game, players, delta=False):
+    """
+    Returns the group event for the game's current state. With `delta`, only
+    the changes made by the last called number are rendered.
+    """
+    event = {"type": "game_update", "version": len(game.called_numbers)}
+    with metrics.RENDER_SECONDS.time():
+        if delta and settings.DELTA_UPDATES and game.called_numbers:
+            event["deltas"] = delta_fragments(game, players)
+        else:
+            event["boards"] = board_fragments(game, players)
+    event["sent_at"] = time.time()
+    return event
+
+
+async def publish_move(channel_layer, result):
+    """Broadcast a committed move, and the result if it won the game."""
+    group = group_name(result.game.game_code)
+    with tracing.span("render"):
+        event = await sync_to_async(game_update_event)(
+            result.game, result.players, delta=True
+        )
+    trace_id = tracing.current_id()
+    if trace_id:
+        event["trace_id"] = trace_id
+    with tracing.span("group_send"), metrics.GROUP_SEND_SECONDS.time():
+        await channel_layer.group_send(group, event)
+    if result.winner:
+        await database_sync_to_async(util.end_game)(result.winner)
+        event = util.game_result_event(result.winner)
+        if trace_id:
+            event["trace_id"] = trace_id
+        with tracing.span("group_send_result"):
+            await channel_layer.group_send(group, event)
+    with tracing.span("spectators"):
+        await publish_spectators(
+            channel_layer, result.game, result.players, winner=result.winner
+        )
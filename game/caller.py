@@ -0,0 +1,144 @@
+"""
+Caller-driven rooms: one game, any number of boards, numbers drawn by the server.
+
+Nobody takes turns in a caller game. `run()` draws a number every few seconds
+and checks it against every board in the room at once: the boards are held
+as a dense (players x 25) NumPy array with a matching array of marked cells,
+so a call is one comparison over the array and a gather of the twelve lines,
+with no per-board Python. Every player who reaches WINNING_LINES on the call
+that first produces a winner is announced through `util.announce_winner`.
+
+Players get a `caller_update` event per call carrying the called numbers and
+render the change to their own board themselves (see `CallerConsumer`).
+"""
+
+import asyncio
+import logging
+
+import numpy as np
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+from .models import Game
+from . import broadcast, movelog, scoring, util
+
+logger = logging.getLogger(__name__)
+
+CALL_INTERVAL = 5
+
+# Flat board positions of every line, shape (12, 5)
+LINE_CELLS = np.array(
+    [[row * scoring.BOARD_SIZE + col for row, col in line] for line in scoring.LINES]
+)
+
+_rooms = {}
+
+
+class Room:
+    """The boards of every player in a caller game, and which cells are marked."""
+
+    def __init__(self, players, called_numbers=(), roster_version=0):
+        self.players = list(players)
+        # The game's roster_version the boards were loaded at
+        self.roster_version = roster_version
+        cells = scoring.BOARD_SIZE * scoring.BOARD_SIZE
+        self.boards = np.array(
+            [player.board for player in self.players], dtype=np.int16
+        ).reshape(len(self.players), cells)
+        self.marked = np.isin(self.boards, list(called_numbers))
+
+    def lines_with(self, number):
+        """
+        Returns (marked, line counts per board) as they would be with `number`
+        called, leaving the room as it is.
+        """
+        marked = self.marked | (self.boards == number)
+        return marked, marked[:, LINE_CELLS].all(axis=2).sum(axis=1)
+
+    def call(self, number):
+        """Mark `number` on every board; returns the completed line count per board."""
+        self.marked, line_counts = self.lines_with(number)
+        return line_counts
+
+    def winners(self, line_counts):
+        return [
+            self.players[index]
+            for index in np.flatnonzero(line_counts >= scoring.WINNING_LINES)
+        ]
+
+
+def _room(game):
+    """
+    The cached Room for a game, rebuilt when players have joined or left or
+    been dealt a new board, which `util.create_player` records by bumping the
+    game's roster_version; otherwise no player rows are read.
+    """
+    room = _rooms.get(game.game_code)
+    if room is None or room.roster_version != game.roster_version:
+        room = Room(game.players.all(), game.called_numbers, game.roster_version)
+        _rooms[game.game_code] = room
+    return room
+
+
+def call_number(game_code):
+    """
+    Draw the next number in a caller game and check every board. Returns
+    (game, number, player_count, winners), with number None once all numbers
+    have been called.
+    """
+    game = movelog.rebuild(
+        Game.objects.get(game_code=game_code, is_active=True, mode=Game.CALLER)
+    )
+    room = _room(game)
+    number = util.get_random_number(game)
+    if number is None:
+        return game, None, len(room.players), []
+    marked, line_counts = room.lines_with(number)
+    with transaction.atomic():
+        movelog.append(game, None, number)
+        winners = room.winners(line_counts)
+        if winners or movelog.due(game):
+            movelog.compact(game)
+    # Only mark the boards once the call is logged
+    room.marked = marked
+    return game, number, len(room.players), winners
+
+
+def caller_update_event(game, player_count):
+    return {
+        "type": "caller_update",
+        "called": game.called_numbers,
+        "player_count": player_count,
+    }
+
+
+async def run(game_code, interval=CALL_INTERVAL):
+    """Call numbers for a caller game until someone wins."""
+    channel_layer = get_channel_layer()
+    group = broadcast.group_name(game_code)
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            game, number, player_count, winners = await database_sync_to_async(
+                call_number
+            )(game_code)
+            if number is None:
+                break
+            await channel_layer.group_send(
+                group, caller_update_event(game, player_count)
+            )
+            if winners:
+                await database_sync_to_async(util.announce_winner)(
+                    channel_layer, group, *winners
+                )
+                logger.info(
+                    "Game %s won by %d of %d players after %d calls",
+                    game_code,
+                    len(winners),
+                    player_count,
+                    len(game.called_numbers),
+                )
+                break
+    finally:
+        _rooms.pop(game_code, None)
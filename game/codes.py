@@ -0,0 +1,92 @@
+"""
+Game code allocation.
+
+Codes are drawn from a Postgres sequence and encoded into CODE_LENGTH
+characters of CODE_CHARS. The sequence value is first run through a keyed
+Feistel permutation of the code space, so codes are unique without a lookup
+but consecutive games don't get guessable consecutive codes. `decode` reverses
+the encoding.
+"""
+
+import hashlib
+import string
+
+from django.conf import settings
+from django.db import connection
+
+CODE_CHARS = string.ascii_uppercase + string.digits
+CODE_LENGTH = 6
+CODE_SPACE = len(CODE_CHARS) ** CODE_LENGTH
+
+SEQUENCE = "game_code_seq"
+
+_ROUNDS = 4
+_HALF_BITS = 16
+_HALF_MASK = (1 << _HALF_BITS) - 1
+_keys = None
+
+
+def _round_keys():
+    global _keys
+    if _keys is None:
+        secret = settings.SECRET_KEY.encode()
+        _keys = [
+            hashlib.blake2b(
+                secret, digest_size=16, person=b"bingo-code-%d" % i
+            ).digest()
+            for i in range(_ROUNDS)
+        ]
+    return _keys
+
+
+def _round(key, value):
+    digest = hashlib.blake2b(value.to_bytes(2, "big"), digest_size=2, key=key)
+    return int.from_bytes(digest.digest(), "big")
+
+
+def _feistel(value, keys):
+    left, right = value >> _HALF_BITS, value & _HALF_MASK
+    for key in keys:
+        left, right = right, left ^ _round(key, right)
+    return (left << _HALF_BITS) | right
+
+
+def _feistel_inverse(value, keys):
+    left, right = value >> _HALF_BITS, value & _HALF_MASK
+    for key in reversed(keys):
+        left, right = right ^ _round(key, left), left
+    return (left << _HALF_BITS) | right
+
+
+def _permute(value, step):
+    # Cycle-walk the 32-bit permutation until it lands back inside the code space
+    value = step(value, _round_keys())
+    while value >= CODE_SPACE:
+        value = step(value, _round_keys())
+    return value
+
+
+def encode(number):
+    """Returns the game code for a sequence number in [0, CODE_SPACE)."""
+    value = _permute(number % CODE_SPACE, _feistel)
+    chars = []
+    for _ in range(CODE_LENGTH):
+        value, index = divmod(value, len(CODE_CHARS))
+        chars.append(CODE_CHARS[index])
+    return "".join(reversed(chars))
+
+
+def decode(code):
+    """Returns the sequence number a game code was encoded from."""
+    value = 0
+    for char in code:
+        value = value * len(CODE_CHARS) + CODE_CHARS.index(char)
+    return _permute(value, _feistel_inverse)
+
+
+def next_code():
+    """Allocates a new game code from the database sequence."""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT nextval(%s)", [SEQUENCE])
+        (number,) = cursor.fetchone()
+    return encode(number)
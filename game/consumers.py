@@ -1,11 +1,12 @@
 import json
+import time
 from channels.generic.websocket import AsyncWebsocketConsumer
-from django.urls import reverse
+from django.conf import settings
 from channels.db import database_sync_to_async
 from asgiref.sync import sync_to_async
 from django.template.loader import render_to_string
-from django.utils import timezone
 from .models import Player, Game
+from . import broadcast, metrics, movelog, moves, reaper, reconnect, timers, tracing
 
 
 class GameConsumer(AsyncWebsocketConsumer):
@@ -13,117 +14,195 @@ class GameConsumer(AsyncWebsocketConsumer):
     Handles WebSocket connections for a bingo game room.
     - On connect/disconnect: marks player as connected/disconnected.
     - On refresh_board_and_heading: renders and sends updated board and heading for the current player.
+    - On receive: applies moves sent over the socket and broadcasts the result.
+    Sockets from anyone not seated in the game are turned away; spectators
+    connect to SpectatorConsumer instead.
     """
 
     async def connect(self):
         self.game_code = self.scope["url_route"]["kwargs"]["game_code"]
-        self.player_id = self.scope["session"].get("player_id")
-        self.group_name = f"game_{self.game_code}"
-        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        self.player_id = (self.scope.get("player") or {}).get("id")
+        self.group_name = broadcast.group_name(self.game_code)
+        # Game version of the last board state sent to this socket
+        self.version = None
+        self.is_player = False
         await self.accept()
+        metrics.WEBSOCKETS.inc()
+        timers.ensure_started()
+        reaper.ensure_started()
+        reconnect.ensure_started()
         # Mark player as connected
         if self.player_id:
-            try:
-                game = await database_sync_to_async(Game.objects.get)(
-                    game_code=self.game_code
+            resumed = None
+            if reconnect.enabled():
+                resumed = await database_sync_to_async(reconnect.resume)(
+                    self.game_code, self.player_id
                 )
-                player_count = await database_sync_to_async(game.players.count)()
+            try:
+                game, players = resumed or await moves.aload_game(self.game_code)
+            except Game.DoesNotExist:
+                return
+            if not any(str(p.player_id) == str(self.player_id) for p in players):
+                # Only seated players join the players' group; watchers use
+                # the spectator socket.
+                await self.send(text_data=json.dumps({"type": "redirect_to_join"}))
+                return
+            self.is_player = True
+            if reconnect.enabled():
+                await sync_to_async(reconnect.attach)(self.game_code, self.player_id)
+            await self.channel_layer.group_add(self.group_name, self.channel_name)
+            player_count = len(players)
 
-                if player_count == 1:
-                    waiting_html = render_to_string(
-                        "partials/waiting.html",
-                        {
-                            "game": game,
-                            "player_count": player_count,
-                        },
+            if player_count == 1:
+                waiting_html = render_to_string(
+                    "partials/waiting.html",
+                    {
+                        "game": game,
+                        "player_count": player_count,
+                    },
+                )
+                await self.send(text_data=waiting_html)
+            elif player_count == 2:
+                if resumed is None:
+                    await sync_to_async(timers.schedule)(
+                        self.game_code, len(game.called_numbers)
                     )
-                    await self.send(text_data=waiting_html)
-                elif player_count == 2:
-                    game.last_move_made_at = timezone.now()
-                    await self.channel_layer.group_send(
-                        self.group_name,
-                        {
-                            "type": "game_update",
-                        },
+                    await broadcast.publish_spectators(
+                        self.channel_layer, game, players
                     )
-                else:
-                    await self.send(
-                        text_data=json.dumps(
-                            {
-                                "type": "redirect_to_join",
-                            }
-                        )
+                # Full boards for both: the opponent was shown the reconnect wait
+                await self.channel_layer.group_send(
+                    self.group_name,
+                    await sync_to_async(broadcast.game_update_event)(game, players),
+                )
+            else:
+                await self.send(
+                    text_data=json.dumps(
+                        {
+                            "type": "redirect_to_join",
+                        }
                     )
-            except Player.DoesNotExist:
-                pass
+                )
 
     async def disconnect(self, close_code):
+        metrics.WEBSOCKETS.dec()
+        if not self.is_player:
+            return
         await self.channel_layer.group_discard(self.group_name, self.channel_name)
 
-        try:
-            game = await database_sync_to_async(Game.objects.get)(
-                game_code=self.game_code
-            )
-            is_active = game.is_active
-            if is_active:
-                # Render game over partial
-                game_over_html = await database_sync_to_async(render_to_string)(
-                    "partials/game_over.html"
+        if reconnect.enabled():
+            if await sync_to_async(reconnect.detach)(self.game_code, self.player_id):
+                # Another tab, or a socket that reconnected before this one closed
+                return
+            try:
+                game, players = await moves.aload_game(self.game_code)
+            except Game.DoesNotExist:
+                # Finished games are deleted straight away
+                pass
+            else:
+                await database_sync_to_async(reconnect.drop)(
+                    game, players, self.player_id
                 )
-
-                # Send to all in group
                 await self.channel_layer.group_send(
                     self.group_name,
                     {
                         "type": "game_update",
-                        "html": game_over_html,
+                        "html": render_to_string(
+                            "partials/reconnecting.html",
+                            {"grace": settings.RECONNECT_GRACE},
+                        ),
                     },
                 )
-
-            await database_sync_to_async(game.delete)()
-        except Game.DoesNotExist:
-            pass
+                return
+        await reconnect.teardown(self.channel_layer, self.game_code, self.player_id)
 
     async def receive(self, text_data):
         """
-        Optionally handle client-initiated messages (e.g., for ws-send moves).
-        Currently, all game state changes are handled via HTTP POST and broadcast from the view.
+        Handle client-initiated messages. A move is sent as
+        {"action": "move", "row": ..., "col": ...}; leaving out row and col
+        calls the next uncalled number (turn timeout). {"action": "resync"}
+        re-sends the full board.
         """
-        pass
+        try:
+            message = json.loads(text_data)
+        except ValueError:
+            return
+        action = message.get("action")
+        if action == "move":
+            await self.make_move(message.get("row"), message.get("col"))
+        elif action == "resync":
+            await self.send_board()
+
+    async def make_move(self, row, col):
+        if not self.player_id:
+            return
+        with tracing.trace("ws make_move"), metrics.MOVE_SECONDS.time():
+            try:
+                result = await database_sync_to_async(moves.play_move)(
+                    self.game_code, self.player_id, row, col
+                )
+            except (Game.DoesNotExist, Player.DoesNotExist):
+                await self.send_error("Invalid game or player")
+                return
+            except moves.GameExpired:
+                await self.send(text_data=json.dumps({"type": "redirect_to_join"}))
+                return
+            except moves.MoveError as e:
+                await self.send_error(str(e))
+                return
+
+            await broadcast.publish_move(self.channel_layer, result)
+
+    async def send_error(self, error):
+        await self.send(text_data=json.dumps({"type": "error", "error": error}))
 
     async def game_update(self, event):
+        if "sent_at" in event:
+            metrics.FANOUT_SECONDS.observe(time.time() - event["sent_at"])
+        with tracing.resume("game_update", event.get("trace_id")) as record:
+            if record and "sent_at" in event:
+                record.attributes["queued_ms"] = (time.time() - event["sent_at"]) * 1000
+            await self.forward_update(event)
+
+    async def forward_update(self, event):
         if "html" in event:
             await self.send(text_data=event["html"])
             return
 
-        # Use current WebSocket's player_id
-        if not self.player_id:
+        # Forward the fragment rendered for this WebSocket's player, falling
+        # back to a full render if this socket missed the previous version
+        player_id = str(self.player_id)
+        version = event.get("version")
+        if "boards" in event:
+            html = event["boards"].get(player_id)
+        elif self.version is not None and version == self.version + 1:
+            html = event["deltas"].get(player_id)
+        else:
+            await self.send_board()
             return
+        self.version = version
+        if html:
+            with tracing.span("send"):
+                await self.send(text_data=html)
 
-        player = await database_sync_to_async(Player.objects.get)(
-            game__game_code=self.game_code, player_id=self.player_id
-        )
-        game = await database_sync_to_async(Game.objects.get)(game_code=self.game_code)
-
-        completed_lines = await database_sync_to_async(player.completed_lines)()
-
-        players = await database_sync_to_async(list)(
-            game.players.all().order_by("player_id")
+    async def send_board(self):
+        """Render and send the full board for this socket's player."""
+        if not self.player_id:
+            return
+        try:
+            game, players = await moves.aload_game(self.game_code)
+        except Game.DoesNotExist:
+            return
+        player = next(
+            (p for p in players if str(p.player_id) == str(self.player_id)), None
         )
-        player_count = len(players)
-
-        context = {
-            "board": player.board,
-            "game": game,
-            "player": player,
-            "line_numbers": completed_lines[1],
-            "completed_lines": completed_lines[0],
-            "player_count": player_count,
-            "players": players,
-        }
-
-        html = render_to_string("partials/board_oob.html", context)
-        await self.send(text_data=html)
+        if player is None:
+            return
+        with tracing.span("render"):
+            html = await sync_to_async(broadcast.render_board)(game, player, players)
+        self.version = len(game.called_numbers)
+        with tracing.span("send"):
+            await self.send(text_data=html)
 
     async def game_result(self, event):
         """
@@ -133,11 +212,102 @@ class GameConsumer(AsyncWebsocketConsumer):
         if not winner_id or not self.player_id:
             return
 
-        is_winner = str(self.player_id) == winner_id
+        is_winner = str(self.player_id) in event.get("winner_ids", [winner_id])
 
-        result_html = await database_sync_to_async(render_to_string)(
-            "partials/game_result.html",
-            {"is_winner": is_winner},
+        with tracing.resume("game_result", event.get("trace_id")):
+            with tracing.span("render"):
+                result_html = render_to_string(
+                    "partials/game_result.html",
+                    {"is_winner": is_winner},
+                )
+            with tracing.span("send"):
+                await self.send(text_data=result_html)
+
+
+class CallerConsumer(GameConsumer):
+    """
+    A player's socket in a caller game. The board is loaded once on connect;
+    each call arrives as the list of called numbers and the change to this
+    board is rendered here, so a call costs no queries per player.
+    """
+
+    async def connect(self):
+        self.game_code = self.scope["url_route"]["kwargs"]["game_code"]
+        self.player_id = (self.scope.get("player") or {}).get("id")
+        self.group_name = broadcast.group_name(self.game_code)
+        await self.accept()
+        metrics.WEBSOCKETS.inc()
+        player = await self.load_player()
+        if player is None:
+            await self.send(text_data=json.dumps({"type": "redirect_to_join"}))
+            return
+        self.board = player.board
+        self.is_player = True
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        game = await movelog.arebuild(player.game)
+        html = await sync_to_async(broadcast.render_room)(
+            self.game_code,
+            self.board,
+            game.called_numbers,
+            await game.players.acount(),
+        )
+        await self.send(text_data=html)
+
+    async def load_player(self):
+        if not self.player_id:
+            return None
+        return await (
+            Player.objects.select_related("game")
+            .filter(
+                player_id=self.player_id,
+                game__game_code=self.game_code,
+                game__is_active=True,
+                game__mode=Game.CALLER,
+            )
+            .afirst()
+        )
+
+    async def disconnect(self, close_code):
+        # Players come and go; the room lives until the caller finds a winner
+        metrics.WEBSOCKETS.dec()
+        await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def receive(self, text_data):
+        """Numbers are called by the server; messages are ignored."""
+
+    async def caller_update(self, event):
+        html = await sync_to_async(broadcast.room_delta)(
+            self.game_code, self.board, event["called"], event["player_count"]
         )
+        await self.send(text_data=html)
+
+
+class SpectatorConsumer(AsyncWebsocketConsumer):
+    """
+    Read-only socket for watching a game. Spectators are in their own group
+    and are sent the same pre-rendered view, so handling a move costs one
+    send per spectator and no queries.
+    """
+
+    async def connect(self):
+        self.game_code = self.scope["url_route"]["kwargs"]["game_code"]
+        self.group_name = broadcast.spectator_group_name(self.game_code)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        metrics.WEBSOCKETS.inc()
+        try:
+            game, players = await moves.aload_game(self.game_code)
+        except Game.DoesNotExist:
+            return
+        html = await sync_to_async(broadcast.spectator_view)(game, players)
+        await self.send(text_data=html)
+
+    async def disconnect(self, close_code):
+        metrics.WEBSOCKETS.dec()
+        await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def receive(self, text_data):
+        """Spectators can't act on the game; messages are ignored."""
 
-        await self.send(text_data=result_html)
+    async def spectator_update(self, event):
+        await self.send(text_data=event["html"])
@@ -0,0 +1,42 @@
+import base64
+
+from django.db import models
+
+from . import scoring
+
+
+class NumberSetField(models.BinaryField):
+    """
+    A set of numbers from 0 to 103 stored as a 13-byte bitmap, bit n for
+    number n (the same bitset as `scoring.called_mask`). Assigned and read
+    back as a list; reads come back in ascending order.
+    """
+
+    BYTES = 13
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("default", list)
+        super().__init__(*args, **kwargs)
+
+    def _decode(self, value):
+        return scoring.mask_numbers(int.from_bytes(value, "little"))
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return self._decode(value)
+
+    def to_python(self, value):
+        if value is None or isinstance(value, list):
+            return value
+        return self._decode(super().to_python(value))
+
+    def get_prep_value(self, value):
+        if value is None:
+            return value
+        return scoring.called_mask(value).to_bytes(self.BYTES, "little")
+
+    def value_to_string(self, obj):
+        return base64.b64encode(
+            self.get_prep_value(self.value_from_object(obj))
+        ).decode("ascii")
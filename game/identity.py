@@ -0,0 +1,80 @@
+"""
+Stateless player identity.
+
+A player is identified by a signed cookie holding their UUID and name,
+issued by `join_game`. Reading it is an HMAC check with SECRET_KEY in memory,
+so the game views and sockets never touch the session table.
+`PlayerTokenMiddleware` puts the same identity in the WebSocket scope as
+`scope["player"]`.
+"""
+
+import uuid
+
+from django.core import signing
+from django.http.cookie import parse_cookie
+
+COOKIE_NAME = "bingo_player"
+SALT = "game.identity"
+MAX_AGE = 30 * 24 * 60 * 60
+DEFAULT_NAME = "John"
+
+
+def make_token(player_id, player_name):
+    return signing.dumps(
+        {"id": str(player_id), "name": player_name}, salt=SALT, compress=True
+    )
+
+
+def read_token(token):
+    """Returns {"id", "name"} for a valid, unexpired token, or None."""
+    if not token:
+        return None
+    try:
+        return signing.loads(token, salt=SALT, max_age=MAX_AGE)
+    except signing.BadSignature:
+        return None
+
+
+def from_request(request):
+    """Returns the request's player {"id", "name"}, or None."""
+    if not hasattr(request, "_player"):
+        request._player = read_token(request.COOKIES.get(COOKIE_NAME))
+    return request._player
+
+
+def player_id(request):
+    player = from_request(request)
+    return player["id"] if player else None
+
+
+def get_or_new(request):
+    """Returns the request's player, or a new identity to issue."""
+    return from_request(request) or {"id": str(uuid.uuid4()), "name": DEFAULT_NAME}
+
+
+def issue(response, player):
+    """Set the signed player cookie on the response."""
+    response.set_cookie(
+        COOKIE_NAME,
+        make_token(player["id"], player["name"]),
+        max_age=MAX_AGE,
+        httponly=True,
+        samesite="Lax",
+    )
+    return response
+
+
+class PlayerTokenMiddleware:
+    """ASGI middleware that sets scope["player"] from the signed player cookie."""
+
+    def __init__(self, inner):
+        self.inner = inner
+
+    async def __call__(self, scope, receive, send):
+        cookies = {}
+        for name, value in scope.get("headers", []):
+            if name == b"cookie":
+                cookies = parse_cookie(value.decode("latin1"))
+                break
+        scope = dict(scope, player=read_token(cookies.get(COOKIE_NAME)))
+        return await self.inner(scope, receive, send)
@@ -0,0 +1,271 @@
+"""
+Redis-resident state for games in progress.
+
+When `settings.LIVE_STATE_BACKEND` is "redis", an active game is copied into
+Redis on its first move and every move after that runs as a single Lua script
+(turn check, duplicate check, append, winner check and turn flip). A winning
+move records the winner instead of flipping the turn, and the script refuses
+any move after it. Postgres is only written again when the game ends, by
+`util.end_game` or `moves.abandon_game`, which log the moves made here with
+`movelog.write_behind` before the keys are discarded.
+
+Per game, four keys are kept:
+- `bingo:game:<code>` hash: id, is_private, numbers, snapshot_seq, turn,
+  last_move_at, winner once the game is won, and name/board/opponent
+  entries per player
+- `bingo:game:<code>:called` bitmap with bit n set once n is called
+- `bingo:game:<code>:order` list of called numbers in call order
+- `bingo:game:<code>:callers` list of "<player_id> <timestamp>" for each move
+  made in Redis
+"""
+
+import json
+import uuid
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Game, Player
+from .redis_client import get_client
+from . import scoring
+
+KEY_TTL = 24 * 60 * 60
+
+OK = "ok"
+MISSING = "missing"
+NO_PLAYER = "no_player"
+NOT_TURN = "not_turn"
+DUPLICATE = "duplicate"
+EXPIRED = "expired"
+EXHAUSTED = "exhausted"
+FINISHED = "finished"
+
+STORE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+local state = cjson.decode(ARGV[1])
+for field, value in pairs(state.fields) do
+    redis.call('HSET', KEYS[1], field, value)
+end
+for _, number in ipairs(state.called) do
+    redis.call('SETBIT', KEYS[2], number, 1)
+    redis.call('RPUSH', KEYS[3], number)
+end
+for i = 1, #KEYS do
+    if redis.call('EXISTS', KEYS[i]) == 1 then
+        redis.call('EXPIRE', KEYS[i], ARGV[2])
+    end
+end
+return 1
+"""
+
+MOVE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return {'missing', 0, ''}
+end
+local player = ARGV[1]
+local board = redis.call('HGET', KEYS[1], 'board:' .. player)
+if not board then
+    return {'no_player', 0, ''}
+end
+if redis.call('HEXISTS', KEYS[1], 'winner') == 1 then
+    return {'finished', 0, ''}
+end
+local now = tonumber(ARGV[4])
+local last_move_at = tonumber(redis.call('HGET', KEYS[1], 'last_move_at'))
+if last_move_at and now - last_move_at > tonumber(ARGV[5]) then
+    return {'expired', 0, ''}
+end
+if redis.call('HGET', KEYS[1], 'turn') ~= player then
+    return {'not_turn', 0, ''}
+end
+board = cjson.decode(board)
+local number
+if ARGV[2] == '' then
+    for _, n in ipairs(cjson.decode(redis.call('HGET', KEYS[1], 'numbers'))) do
+        if redis.call('GETBIT', KEYS[2], n) == 0 then
+            number = n
+            break
+        end
+    end
+    if not number then
+        return {'exhausted', 0, ''}
+    end
+else
+    number = board[tonumber(ARGV[2]) + 1][tonumber(ARGV[3]) + 1]
+end
+if redis.call('SETBIT', KEYS[2], number, 1) == 1 then
+    return {'duplicate', number, ''}
+end
+redis.call('RPUSH', KEYS[3], number)
+redis.call('RPUSH', KEYS[4], player .. ' ' .. ARGV[4])
+
+-- Count the board's completed rows, columns and diagonals
+local bits = redis.call('GET', KEYS[2])
+local function called(n)
+    local byte = string.byte(bits, math.floor(n / 8) + 1) or 0
+    return math.floor(byte / 2 ^ (7 - n % 8)) % 2
+end
+local function lines(cells)
+    local count, diagonal, anti = 0, 0, 0
+    for i = 1, 5 do
+        local row, col = 0, 0
+        for j = 1, 5 do
+            row = row + called(cells[i][j])
+            col = col + called(cells[j][i])
+        end
+        count = count + math.floor(row / 5) + math.floor(col / 5)
+        diagonal = diagonal + called(cells[i][i])
+        anti = anti + called(cells[i][6 - i])
+    end
+    return count + math.floor(diagonal / 5) + math.floor(anti / 5)
+end
+
+-- The mover wins ties, as in moves._result; a won game takes no more moves
+local opponent = redis.call('HGET', KEYS[1], 'opponent:' .. player)
+local winner = ''
+if lines(board) >= tonumber(ARGV[7]) then
+    winner = player
+elseif lines(cjson.decode(redis.call('HGET', KEYS[1], 'board:' .. opponent)))
+        >= tonumber(ARGV[7]) then
+    winner = opponent
+end
+if winner == '' then
+    redis.call('HSET', KEYS[1], 'turn', opponent, 'last_move_at', ARGV[4])
+else
+    redis.call('HSET', KEYS[1], 'winner', winner, 'last_move_at', ARGV[4])
+end
+for i = 1, #KEYS do
+    redis.call('EXPIRE', KEYS[i], ARGV[6])
+end
+return {'ok', number, winner}
+"""
+
+_scripts = {}
+
+
+def enabled():
+    return settings.LIVE_STATE_BACKEND == "redis"
+
+
+def _keys(game_code):
+    key = f"bingo:game:{game_code}"
+    return [key, f"{key}:called", f"{key}:order", f"{key}:callers"]
+
+
+def _script(source):
+    if source not in _scripts:
+        _scripts[source] = get_client().register_script(source)
+    return _scripts[source]
+
+
+def store(game, players):
+    """Copy an active game and its two players into Redis unless already there."""
+    first, second = players
+    fields = {
+        "id": game.id,
+        "game_code": game.game_code,
+        "is_private": int(game.is_private),
+        "numbers": json.dumps(game.numbers),
+        # Every number called so far is already in the move log
+        "snapshot_seq": len(game.called_numbers),
+        "turn": str(first.player_id if first.turn else second.player_id),
+    }
+    if game.last_move_made_at:
+        fields["last_move_at"] = game.last_move_made_at.timestamp()
+    for player, opponent in ((first, second), (second, first)):
+        fields[f"name:{player.player_id}"] = player.name
+        fields[f"board:{player.player_id}"] = json.dumps(player.board)
+        fields[f"opponent:{player.player_id}"] = str(opponent.player_id)
+    payload = json.dumps({"fields": fields, "called": game.called_numbers})
+    return bool(
+        _script(STORE_SCRIPT)(keys=_keys(game.game_code), args=[payload, KEY_TTL])
+    )
+
+
+def apply_move(game_code, player_id, cell, expiry):
+    """
+    Atomically apply a move. `cell` is (row, col), or None to pick the next
+    uncalled number. Returns (status, number, winner), where winner is the
+    player_id of the player the move won the game for, or None.
+    """
+    row, col = cell if cell is not None else ("", "")
+    status, number, winner = _script(MOVE_SCRIPT)(
+        keys=_keys(game_code),
+        args=[
+            str(player_id),
+            row,
+            col,
+            timezone.now().timestamp(),
+            expiry.total_seconds(),
+            KEY_TTL,
+            scoring.WINNING_LINES,
+        ],
+    )
+    return status, int(number), winner or None
+
+
+def load(game_code):
+    """
+    Returns unsaved (game, players) instances built from Redis, with players
+    ordered by player_id, or None if the game is not in Redis.
+    """
+    state_key, _, order_key, _ = _keys(game_code)
+    pipe = get_client().pipeline(transaction=False)
+    pipe.hgetall(state_key)
+    pipe.lrange(order_key, 0, -1)
+    state, order = pipe.execute()
+    if not state:
+        return None
+
+    last_move_made_at = None
+    if "last_move_at" in state:
+        last_move_made_at = datetime.fromtimestamp(
+            float(state["last_move_at"]), tz=dt_timezone.utc
+        )
+    game = Game(
+        id=int(state["id"]),
+        game_code=state["game_code"],
+        is_active="winner" not in state,
+        is_private=bool(int(state["is_private"])),
+        numbers=json.loads(state["numbers"]),
+        called_numbers=[int(number) for number in order],
+        snapshot_seq=int(state["snapshot_seq"]),
+        last_move_made_at=last_move_made_at,
+    )
+    players = []
+    for field, board in state.items():
+        if not field.startswith("board:"):
+            continue
+        player_id = field[len("board:") :]
+        players.append(
+            Player(
+                game=game,
+                player_id=uuid.UUID(player_id),
+                name=state[f"name:{player_id}"],
+                board=json.loads(board),
+                turn=state["turn"] == player_id,
+            )
+        )
+    players.sort(key=lambda player: player.player_id)
+    return game, players
+
+
+def callers(game_code):
+    """Returns [(player_id, called_at)] for the moves made in Redis, in order."""
+    callers = []
+    for entry in get_client().lrange(_keys(game_code)[3], 0, -1):
+        player_id, timestamp = entry.split(" ")
+        callers.append(
+            (
+                uuid.UUID(player_id),
+                datetime.fromtimestamp(float(timestamp), tz=dt_timezone.utc),
+            )
+        )
+    return callers
+
+
+def discard(game_code):
+    get_client().delete(*_keys(game_code))
@@ -0,0 +1,182 @@
+"""
+End-to-end load test for concurrent games.
+
+Each simulated pair joins through Quick Play with the test client, opens a
+`GameConsumer` socket per player with `WebsocketCommunicator`, then plays the
+game out. A move goes over the socket (or the make_move view with
+transport="http") and its latency is the time until the board update for it
+arrives on both players' sockets.
+"""
+
+import asyncio
+import json
+import time
+from datetime import datetime, timezone
+
+from asgiref.sync import sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.test import AsyncClient, Client
+from django.urls import reverse
+
+from .models import Game, Player
+from .routing import websocket_urlpatterns
+from . import identity, scoring
+
+RECEIVE_TIMEOUT = 10
+HOST = "localhost"
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(int(round(percent / 100 * len(ordered))) - 1, 0)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+def summarize(latencies):
+    return {
+        "count": len(latencies),
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "max": max(latencies) if latencies else None,
+    }
+
+
+def join_pair():
+    """Quick Play two new players into one game; returns (game, players, clients)."""
+    clients = [Client(HTTP_HOST=HOST) for _ in range(2)]
+    for index, client in enumerate(clients):
+        client.post(reverse("join"), {"player_name": f"load{index}"})
+    player_ids = [
+        identity.read_token(client.cookies[identity.COOKIE_NAME].value)["id"]
+        for client in clients
+    ]
+    players = [
+        Player.objects.select_related("game").get(player_id=player_id)
+        for player_id in player_ids
+    ]
+    if players[0].game_id != players[1].game_id:
+        raise RuntimeError("Quick Play did not pair the simulated players")
+    return players[0].game, players, clients
+
+
+class SimulatedGame:
+    def __init__(self, game, players, clients, transport):
+        self.game = game
+        self.players = players
+        self.clients = clients
+        self.transport = transport
+        self.called = []
+        self.latencies = []
+        self.errors = 0
+
+    async def connect(self):
+        self.sockets = []
+        for player in self.players:
+            communicator = WebsocketCommunicator(
+                URLRouter(websocket_urlpatterns), f"/ws/game/{self.game.game_code}/"
+            )
+            communicator.scope["player"] = {
+                "id": str(player.player_id),
+                "name": player.name,
+            }
+            connected, _ = await communicator.connect()
+            if not connected:
+                raise RuntimeError("WebSocket connection refused")
+            self.sockets.append(communicator)
+        # Both sockets get the full board once the second player connects
+        for communicator in self.sockets:
+            await self.receive_board(communicator)
+        for communicator in self.sockets:
+            while not await communicator.receive_nothing(timeout=0.05):
+                await communicator.receive_output()
+
+    async def receive_board(self, communicator):
+        while True:
+            try:
+                message = await communicator.receive_from(timeout=RECEIVE_TIMEOUT)
+            except asyncio.TimeoutError:
+                self.errors += 1
+                return None
+            if 'id="cell-' in message or 'id="board"' in message:
+                return message
+            if '"error"' in message:
+                self.errors += 1
+                return None
+
+    def next_cell(self, player):
+        for row, numbers in enumerate(player.board):
+            for col, number in enumerate(numbers):
+                if number not in self.called:
+                    return row, col, number
+
+    def winner(self):
+        called = scoring.called_mask(self.called)
+        return any(scoring.is_winner(player.board, called) for player in self.players)
+
+    async def send_move(self, index, row, col):
+        if self.transport == "ws":
+            await self.sockets[index].send_to(
+                text_data=json.dumps({"action": "move", "row": row, "col": col})
+            )
+            return
+        client = AsyncClient(HTTP_HOST=HOST)
+        client.cookies = self.clients[index].cookies
+        response = await client.post(
+            reverse("make_move", args=[self.game.game_code]),
+            {"row": row, "col": col},
+        )
+        if response.status_code != 204:
+            self.errors += 1
+
+    async def play(self):
+        turn = 0 if self.players[0].turn else 1
+        while not self.winner():
+            row, col, number = self.next_cell(self.players[turn])
+            start = time.perf_counter()
+            await self.send_move(turn, row, col)
+            received = await asyncio.gather(
+                *(self.receive_board(communicator) for communicator in self.sockets)
+            )
+            if None in received:
+                break
+            self.latencies.append((time.perf_counter() - start) * 1000)
+            self.called.append(number)
+            turn = 1 - turn
+
+    async def close(self):
+        for communicator in self.sockets:
+            await communicator.disconnect()
+
+
+async def run(pairs, transport="ws"):
+    """Play `pairs` games at once; returns the report as a dict."""
+    games = []
+    for _ in range(pairs):
+        game, players, clients = await sync_to_async(join_pair)()
+        games.append(SimulatedGame(game, players, clients, transport))
+
+    await asyncio.gather(*(game.connect() for game in games))
+    start = time.perf_counter()
+    await asyncio.gather(*(game.play() for game in games))
+    duration = time.perf_counter() - start
+    await asyncio.gather(*(game.close() for game in games))
+    await sync_to_async(
+        lambda: Game.objects.filter(pk__in=[game.game.pk for game in games]).delete()
+    )()
+
+    latencies = [latency for game in games for latency in game.latencies]
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "pairs": pairs,
+        "transport": transport,
+        "moves": len(latencies),
+        "errors": sum(game.errors for game in games),
+        "duration_s": duration,
+        "throughput_moves_per_s": len(latencies) / duration if duration else None,
+        "latency_ms": summarize(latencies),
+    }
@@ -0,0 +1,53 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+
+from game import board_renderer, scoring, util
+from game.models import Game
+
+
+class Command(BaseCommand):
+    help = "Compare board_renderer.render_board against render_to_string."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--renders", type=int, default=2000)
+        parser.add_argument("--boards", type=int, default=50)
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        states = []
+        for _ in range(options["boards"]):
+            game = Game(game_code="BENCH1", numbers=util.generate_numbers())
+            board = util.generate_board(game.numbers)
+            game.called_numbers = rng.sample(game.numbers, rng.randint(0, 25))
+            called = scoring.called_mask(game.called_numbers)
+            lines = scoring.completed_mask(board, called)[1]
+            states.append((game, board, called, lines))
+
+        renders = options["renders"]
+
+        def template(game, board, called, lines):
+            return render_to_string(
+                "partials/board.html",
+                {
+                    "board": board,
+                    "game": game,
+                    "line_numbers": scoring.mask_numbers(lines),
+                },
+            )
+
+        def fast(game, board, called, lines):
+            return board_renderer.render_board(board, called, lines)
+
+        for game, board, called, lines in states:
+            if fast(game, board, called, lines) != template(game, board, called, lines):
+                raise AssertionError("board_renderer output differs from template")
+
+        for name, render in (("render_to_string", template), ("board_renderer", fast)):
+            start = time.perf_counter()
+            for index in range(renders):
+                render(*states[index % len(states)])
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f"{name:>16}: {elapsed / renders * 1e6:9.1f} us/board")
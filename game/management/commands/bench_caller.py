@@ -0,0 +1,68 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from game import caller, util
+from game.models import Game, Player
+
+
+class Command(BaseCommand):
+    help = (
+        "Time calls in a caller room: Room.call over the boards in memory, and "
+        "caller.call_number end to end against the database, with its queries."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--boards", type=int, default=10000)
+        parser.add_argument("--calls", type=int, default=20)
+
+    def handle(self, *args, **options):
+        boards, calls = options["boards"], min(options["calls"], 24)
+        game = util.create_game(numbers=util.generate_numbers(), mode=Game.CALLER)
+        try:
+            Player.objects.bulk_create(
+                [
+                    Player(
+                        game=game,
+                        player_id=uuid.uuid4(),
+                        name=f"bench{index}",
+                        board=util.generate_board(game.numbers),
+                    )
+                    for index in range(boards)
+                ],
+                batch_size=1000,
+            )
+            players = list(game.players.all())
+
+            room = caller.Room(players)
+            start = time.perf_counter()
+            for number in game.numbers[:calls]:
+                room.winners(room.call(number))
+            self.report("Room.call", start, calls, boards)
+
+            start = time.perf_counter()
+            caller.call_number(game.game_code)
+            self.stdout.write(
+                f"{'first call_number':>18}: {(time.perf_counter() - start) * 1000:7.1f}"
+                " ms, loading the room"
+            )
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                for _ in range(calls - 1):
+                    caller.call_number(game.game_code)
+                self.report("call_number", start, calls - 1, boards)
+            self.stdout.write(
+                f"{'':>18}  {len(queries) / (calls - 1):.0f} queries per call"
+            )
+        finally:
+            caller._rooms.pop(game.game_code, None)
+            game.delete()
+
+    def report(self, name, start, calls, boards):
+        elapsed = (time.perf_counter() - start) * 1000 / calls
+        self.stdout.write(
+            f"{name:>18}: {elapsed:7.2f} ms per call over {boards} boards"
+        )
@@ -0,0 +1,137 @@
+import asyncio
+import json
+import time
+import uuid
+
+from asgiref.sync import sync_to_async
+from channels.db import database_sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+
+from game import moves, util
+from game.models import Game
+from game.routing import websocket_urlpatterns
+
+MEMORY_LAYER = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+
+
+def backend_count():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT count(*) FROM pg_stat_activity WHERE datname = current_database()"
+        )
+        return cursor.fetchone()[0]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure GameConsumer data access: game loads through "
+        "database_sync_to_async against the async ORM, and resyncs over open "
+        "sockets, with the peak number of Postgres connections. Run once with "
+        "DB_POOL=False and once with the pool to compare."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--games", type=int, default=50)
+        parser.add_argument("--loads", type=int, default=2000)
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument("--resyncs", type=int, default=10)
+
+    def handle(self, *args, **options):
+        games = []
+        for _ in range(options["games"]):
+            game = util.create_game(numbers=util.generate_numbers())
+            player_ids = [str(uuid.uuid4()), str(uuid.uuid4())]
+            for index, player_id in enumerate(player_ids):
+                util.create_player(game, player_id, f"bench{index}", index == 0)
+            games.append((game.game_code, player_ids))
+
+        self.stdout.write(f"pool: {json.dumps(settings.DB_POOL)}")
+        try:
+            with override_settings(
+                CHANNEL_LAYERS=MEMORY_LAYER,
+                SERVER_TURN_TIMER=False,
+                REAPER_INTERVAL=0,
+                RECONNECT_GRACE=0,
+                RATE_LIMIT_ENABLED=False,
+            ):
+                asyncio.run(self.run(games, options))
+        finally:
+            Game.objects.filter(game_code__in=[code for code, _ in games]).delete()
+
+    async def run(self, games, options):
+        codes = [code for code, _ in games]
+        loaders = {
+            "database_sync_to_async": database_sync_to_async(moves.load_game),
+            "async ORM": moves.aload_game,
+        }
+        for name, load in loaders.items():
+            rate, peak = await self.measure(
+                codes, load, options["loads"], options["concurrency"]
+            )
+            self.stdout.write(
+                f"{name:>22}: {rate:8.0f} loads/s, peak {peak} connections"
+            )
+
+        sockets = []
+        for code, player_ids in games:
+            for player_id in player_ids:
+                communicator = WebsocketCommunicator(
+                    URLRouter(websocket_urlpatterns), f"/ws/game/{code}/"
+                )
+                communicator.scope["player"] = {"id": player_id, "name": "bench"}
+                await communicator.connect()
+                sockets.append(communicator)
+        for communicator in sockets:
+            while not await communicator.receive_nothing(timeout=0.05):
+                await communicator.receive_output()
+
+        async def resync(communicator):
+            for _ in range(options["resyncs"]):
+                await communicator.send_to(text_data=json.dumps({"action": "resync"}))
+                await communicator.receive_from(timeout=10)
+
+        sampler = asyncio.create_task(self.sample_backends())
+        start = time.perf_counter()
+        await asyncio.gather(*(resync(communicator) for communicator in sockets))
+        elapsed = time.perf_counter() - start
+        sampler.cancel()
+        peak = await self.peak(sampler)
+        total = len(sockets) * options["resyncs"]
+        self.stdout.write(
+            f"{'consumer resync':>22}: {total / elapsed:8.0f} resyncs/s over "
+            f"{len(sockets)} sockets, peak {peak} connections"
+        )
+        for communicator in sockets:
+            await communicator.disconnect()
+
+    async def measure(self, codes, load, loads, concurrency):
+        async def worker(offset):
+            for index in range(offset, loads, concurrency):
+                await load(codes[index % len(codes)])
+
+        sampler = asyncio.create_task(self.sample_backends())
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(offset) for offset in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        sampler.cancel()
+        return loads / elapsed, await self.peak(sampler)
+
+    async def sample_backends(self):
+        self.samples = []
+        count = sync_to_async(backend_count, thread_sensitive=False)
+        while True:
+            self.samples.append(await count())
+            await asyncio.sleep(0.05)
+
+    async def peak(self, sampler):
+        try:
+            await sampler
+        except asyncio.CancelledError:
+            pass
+        # Less the sampler's own connection
+        return max(self.samples, default=1) - 1
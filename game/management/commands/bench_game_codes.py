@@ -0,0 +1,58 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from game import codes
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark game code allocation at increasing numbers of games already "
+        "allocated, showing the cost per code stays flat."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--games", type=int, default=10_000_000)
+        parser.add_argument("--buckets", type=int, default=10)
+        parser.add_argument("--samples", type=int, default=20_000)
+        parser.add_argument(
+            "--db",
+            type=int,
+            default=0,
+            help="Also time this many real allocations from the database sequence.",
+        )
+
+    def handle(self, *args, **options):
+        games, buckets = options["games"], options["buckets"]
+        samples = options["samples"]
+        rng = random.Random(0)
+
+        self.stdout.write(
+            f"{'games allocated':>16} {'us/code':>9} {'legacy lookups/code':>20}"
+        )
+        for bucket in range(1, buckets + 1):
+            allocated = games * bucket // buckets
+            positions = [
+                rng.randrange(max(allocated - samples, 0), allocated + 1)
+                for _ in range(samples)
+            ]
+            start = time.perf_counter()
+            for position in positions:
+                codes.encode(position)
+            elapsed = time.perf_counter() - start
+            # The old random-draw loop needed one exists() query per attempt
+            legacy = 1 / (1 - allocated / codes.CODE_SPACE)
+            self.stdout.write(
+                f"{allocated:>16,} {elapsed / samples * 1e6:>9.2f} {legacy:>20.3f}"
+            )
+
+        if options["db"]:
+            start = time.perf_counter()
+            for _ in range(options["db"]):
+                codes.next_code()
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f"next_code(): {elapsed / options['db'] * 1e6:.1f} us/code "
+                f"over {options['db']} allocations"
+            )
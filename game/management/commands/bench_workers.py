@@ -0,0 +1,155 @@
+import asyncio
+import os
+import secrets
+import signal
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+import uuid
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand, CommandError
+
+from game import identity, util
+from game.models import Game
+
+CSRF_TOKEN = secrets.token_hex(16)
+STARTUP_TIMEOUT = 30
+
+
+def _healthy(port):
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/healthz", timeout=1):
+            return True
+    except (urllib.error.URLError, ConnectionError):
+        return False
+
+
+async def post_move(port, game_code, token):
+    """POST an auto-pick move through the router; returns the HTTP status."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(
+        (
+            f"POST /game/{game_code}/make-move/ HTTP/1.1\r\n"
+            "Host: localhost\r\n"
+            f"Cookie: {identity.COOKIE_NAME}={token}; csrftoken={CSRF_TOKEN}\r\n"
+            f"X-CSRFToken: {CSRF_TOKEN}\r\n"
+            "Content-Type: application/x-www-form-urlencoded\r\n"
+            "Content-Length: 0\r\n\r\n"
+        ).encode()
+    )
+    status_line = await reader.readline()
+    # The router closes the connection after the response
+    await reader.read()
+    writer.close()
+    return int(status_line.split()[1])
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure how concurrent games scale with the number of workers: start "
+        "runworkers with each count in --workers, play --games games at once "
+        "through its router by posting make_move, and report moves/s against "
+        "one worker. Needs the configured Postgres and Redis, like the site."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", default="1,2,4")
+        parser.add_argument("--games", type=int, default=64)
+        parser.add_argument(
+            "--moves",
+            type=int,
+            default=12,
+            help="Moves per game; few enough that nobody wins.",
+        )
+        parser.add_argument("--port", type=int, default=8090)
+        parser.add_argument("--base-port", type=int, default=8190)
+
+    def handle(self, *args, **options):
+        counts = [int(count) for count in options["workers"].split(",")]
+        cores = os.cpu_count()
+        self.stdout.write(f"CPUs: {cores}")
+        baseline = None
+        for count in counts:
+            games = self.create_games(options["games"])
+            try:
+                with self.cluster(count, options):
+                    # One untimed move per game loads every worker's code,
+                    # templates and connections before the clock starts
+                    asyncio.run(self.play(games, 1, options["port"]))
+                    moves, errors, elapsed = asyncio.run(
+                        self.play(games, options["moves"], options["port"], first=1)
+                    )
+            finally:
+                Game.objects.filter(game_code__in=[code for code, _ in games]).delete()
+            rate = moves / elapsed
+            baseline = baseline or rate / counts[0]
+            self.stdout.write(
+                f"{count:>3} workers: {rate:8.0f} moves/s, {errors} errors, "
+                f"{rate / baseline:5.2f}x one worker "
+                f"({rate / baseline / count:.0%} of linear)"
+                + (", more workers than CPUs" if count > cores else "")
+            )
+
+    def create_games(self, count):
+        games = []
+        for _ in range(count):
+            game = util.create_game(numbers=util.generate_numbers())
+            tokens = []
+            for index in range(2):
+                player_id = str(uuid.uuid4())
+                util.create_player(game, player_id, f"bench{index}", index == 0)
+                tokens.append(identity.make_token(player_id, f"bench{index}"))
+            games.append((game.game_code, tokens))
+        return games
+
+    @contextmanager
+    def cluster(self, count, options):
+        """Run `runworkers` with `count` workers until the block exits."""
+        process = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "django",
+                "runworkers",
+                f"--workers={count}",
+                "--host=127.0.0.1",
+                f"--port={options['port']}",
+                f"--base-port={options['base_port']}",
+            ],
+            stdout=subprocess.DEVNULL,
+            # Each bench player moves as fast as the server answers
+            env={**os.environ, "RATE_LIMIT_ENABLED": "False"},
+        )
+        try:
+            deadline = time.monotonic() + STARTUP_TIMEOUT
+            # /healthz answers 200 once every worker accepts connections
+            while not _healthy(options["port"]):
+                if time.monotonic() > deadline or process.poll() is not None:
+                    raise CommandError(f"{count} workers did not come up")
+                time.sleep(0.5)
+            yield
+        finally:
+            process.send_signal(signal.SIGTERM)
+            process.wait(timeout=30)
+
+    async def play(self, games, moves, port, first=0):
+        """Play `moves` moves in every game, starting with move number `first`."""
+        errors = 0
+
+        async def play_game(game_code, tokens):
+            nonlocal errors
+            for move in range(moves):
+                status = await post_move(port, game_code, tokens[(first + move) % 2])
+                if status != 204:
+                    errors += 1
+                    return move
+            return moves
+
+        start = time.perf_counter()
+        played = await asyncio.gather(
+            *(play_game(game_code, tokens) for game_code, tokens in games)
+        )
+        return sum(played), errors, time.perf_counter() - start
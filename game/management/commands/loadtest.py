@@ -0,0 +1,78 @@
+import asyncio
+import json
+from datetime import datetime
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from game import loadtest
+
+MEMORY_LAYER = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+
+
+class Command(BaseCommand):
+    help = (
+        "Play N simulated games at once through join_game, GameConsumer and "
+        "moves, and report throughput and move-to-update latency. Games are "
+        "created in the configured database and deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pairs", type=int, default=50)
+        parser.add_argument(
+            "--transport",
+            choices=["ws", "http"],
+            default="ws",
+            help="Send moves over the socket or POST them to make_move. "
+            "http needs --layer redis.",
+        )
+        parser.add_argument(
+            "--layer",
+            choices=["memory", "redis"],
+            default="memory",
+            help="In-memory channel layer, or the configured Redis layer.",
+        )
+        parser.add_argument(
+            "--output",
+            help="JSON file for the report (default: "
+            "loadtest-results/loadtest-<timestamp>.json).",
+        )
+
+    def handle(self, *args, **options):
+        overrides = {
+            "SERVER_TURN_TIMER": False,
+            "REAPER_INTERVAL": 0,
+            "RECONNECT_GRACE": 0,
+            # Every simulated player joins from the same address
+            "RATE_LIMIT_ENABLED": False,
+        }
+        if options["layer"] == "memory":
+            overrides["CHANNEL_LAYERS"] = MEMORY_LAYER
+        with override_settings(**overrides):
+            report = asyncio.run(
+                loadtest.run(options["pairs"], transport=options["transport"])
+            )
+        report["layer"] = options["layer"]
+
+        output = options["output"]
+        if not output:
+            stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+            output = Path("loadtest-results") / f"loadtest-{stamp}.json"
+        output = Path(output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, indent=2))
+
+        latency = report["latency_ms"]
+        self.stdout.write(
+            f"{report['pairs']} games, {report['moves']} moves, "
+            f"{report['errors']} errors in {report['duration_s']:.2f}s "
+            f"({report['throughput_moves_per_s']:.1f} moves/s)"
+        )
+        if latency["count"]:
+            self.stdout.write(
+                f"move -> update latency ms: p50 {latency['p50']:.1f}  "
+                f"p95 {latency['p95']:.1f}  p99 {latency['p99']:.1f}  "
+                f"max {latency['max']:.1f}"
+            )
+        self.stdout.write(f"Report written to {output}")
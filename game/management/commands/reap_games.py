@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from game import reaper
+
+
+class Command(BaseCommand):
+    help = "Delete finished and abandoned games and their players in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=reaper.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        report = reaper.reap(batch_size=options["batch_size"])
+        self.stdout.write(
+            "Reaped {games} games and {players} players in {seconds:.2f}s".format(
+                **report
+            )
+        )
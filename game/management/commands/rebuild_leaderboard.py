@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from game import stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Reload the Redis leaderboard from the PlayerStats table. Wins recorded "
+        "while it runs are counted in the table but can be missing from the "
+        "leaderboard once the rebuilt set is swapped in; run it while games "
+        "are quiet, or run it again afterwards."
+    )
+
+    def handle(self, *args, **options):
+        ranked = stats.rebuild_leaderboard()
+        self.stdout.write(f"Ranked {ranked} players")
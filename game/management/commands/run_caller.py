@@ -0,0 +1,40 @@
+import asyncio
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from game import caller, util
+from game.models import Game
+
+
+class Command(BaseCommand):
+    help = (
+        "Call numbers for a caller-driven room until it has a winner. Without "
+        "a game code, opens a new room and waits --lobby seconds for players."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("game_code", nargs="?")
+        parser.add_argument("--interval", type=float, default=caller.CALL_INTERVAL)
+        parser.add_argument("--lobby", type=float, default=60)
+
+    def handle(self, *args, **options):
+        game_code = options["game_code"]
+        if game_code is None:
+            game = util.create_game(
+                numbers=util.generate_numbers(), is_private=True, mode=Game.CALLER
+            )
+            game_code = game.game_code
+            self.stdout.write(
+                f"Opened room {game_code}; calling starts in {options['lobby']:g}s"
+            )
+            time.sleep(options["lobby"])
+        elif not Game.objects.filter(
+            game_code=game_code, is_active=True, mode=Game.CALLER
+        ).exists():
+            raise CommandError(f"No active caller game {game_code}")
+        asyncio.run(caller.run(game_code, options["interval"]))
+        game = Game.objects.get(game_code=game_code)
+        self.stdout.write(
+            f"Room {game_code} finished after {len(game.called_numbers)} calls"
+        )
@@ -0,0 +1,19 @@
+import asyncio
+
+from django.core.management.base import BaseCommand
+
+from game import timers
+
+
+class Command(BaseCommand):
+    help = (
+        "Poll for expired turns and auto-pick or abandon them. Every ASGI worker "
+        "already runs this poller in-process; run it separately to keep timers "
+        "firing while no worker has an open game socket."
+    )
+
+    def handle(self, *args, **options):
+        if not timers.enabled():
+            self.stderr.write("SERVER_TURN_TIMER is off, nothing to do.")
+            return
+        asyncio.run(timers.run())
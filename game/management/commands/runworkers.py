@@ -0,0 +1,40 @@
+import asyncio
+import logging
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from game import workers
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve the site from several daphne workers on one port. Requests and "
+        "sockets for a game always reach the same worker; GET /healthz reports "
+        "on the workers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=settings.WEB_WORKERS)
+        parser.add_argument("--host", default="0.0.0.0")
+        parser.add_argument("--port", type=int, default=8000)
+        parser.add_argument(
+            "--base-port",
+            type=int,
+            default=settings.WORKER_BASE_PORT,
+            help="Workers listen on 127.0.0.1 from this port up.",
+        )
+
+    def handle(self, *args, **options):
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+        supervisor = workers.Supervisor(
+            max(options["workers"], 1),
+            options["host"],
+            options["port"],
+            options["base_port"],
+        )
+        self.stdout.write(
+            f"Serving on {options['host']}:{options['port']} with "
+            f"{len(supervisor.workers)} workers"
+        )
+        asyncio.run(supervisor.serve())
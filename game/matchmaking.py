@@ -0,0 +1,100 @@
+"""
+Quick Play matchmaking queue.
+
+A Quick Play game with one seat open is a queue entry: `Game.waiting_since`
+is set when it is created and cleared when a second player takes the seat.
+Joiners lock the oldest entry with `SELECT ... FOR UPDATE SKIP LOCKED`, so
+concurrent joiners never share a seat and never wait on each other's locks.
+While the waiting player's socket is down the entry is paused, and it goes
+back to its old place if they reconnect. The queue's depth and oldest wait
+are reported on /metrics.
+"""
+
+import logging
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Game
+from . import metrics, util
+
+logger = logging.getLogger(__name__)
+
+
+def cancel(player_id):
+    """Take any game the player is still waiting in out of the queue."""
+    return Game.objects.filter(
+        players__player_id=player_id, waiting_since__isnull=False
+    ).update(waiting_since=None, is_active=False)
+
+
+def pause(game):
+    """
+    Take a waiting game out of the queue while its only player is away, so
+    nobody is seated in a game that is torn down if they don't come back.
+    """
+    Game.objects.filter(pk=game.pk, waiting_since__isnull=False).update(
+        waiting_since=None
+    )
+
+
+def requeue(game):
+    """Put a paused game back in the queue at the place `game.waiting_since` held."""
+    if game.players.count() == 1:
+        Game.objects.filter(
+            pk=game.pk, is_active=True, waiting_since__isnull=True
+        ).update(waiting_since=game.waiting_since)
+
+
+def quick_play(player_id, player_name):
+    """
+    Seat the player in the game that has waited longest, or open a new game
+    for them. Returns the game.
+    """
+    cancel(player_id)
+    with transaction.atomic():
+        game = (
+            _waiting()
+            .select_for_update(skip_locked=True)
+            .order_by("waiting_since")
+            .first()
+        )
+        if game:
+            wait = timezone.now() - game.waiting_since
+            metrics.MATCHMAKING_WAIT_SECONDS.observe(wait.total_seconds())
+            game.waiting_since = None
+            game.save(update_fields=["waiting_since"])
+            util.create_player(game, player_id, player_name, False)
+            logger.info(
+                "Matched game %s after %.1fs", game.game_code, wait.total_seconds()
+            )
+            return game
+
+    game = util.create_game(
+        numbers=util.generate_numbers(),
+        waiting_since=timezone.now(),
+    )
+    util.create_player(game, player_id, player_name, True)
+    return game
+
+
+def _waiting():
+    return Game.objects.filter(
+        waiting_since__isnull=False, is_active=True, is_private=False
+    )
+
+
+def queue_depth():
+    """The number of games waiting for a second player."""
+    return _waiting().count()
+
+
+def oldest_wait():
+    """Seconds the longest waiting game has waited, or 0."""
+    oldest = (
+        _waiting()
+        .order_by("waiting_since")
+        .values_list("waiting_since", flat=True)
+        .first()
+    )
+    return (timezone.now() - oldest).total_seconds() if oldest else 0
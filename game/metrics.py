@@ -0,0 +1,262 @@
+"""
+In-process metrics exposed on /metrics in the Prometheus text format.
+
+Every metric keeps one shard of values per thread, so recording is a plain
+increment on the calling thread's own list with no lock; a scrape adds the
+shards up. Values are per process: with several workers, scrape each one.
+Recording is a no-op unless METRICS_ENABLED is set.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+
+# Seconds, tuned for moves and renders that usually take a few milliseconds
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+)
+QUERY_BUCKETS = (1, 2, 3, 4, 5, 6, 8, 10, 15, 20)
+WAIT_BUCKETS = (0.5, 1, 2, 5, 10, 15, 30, 60, 120, 300)
+
+REGISTRY = []
+
+
+def enabled():
+    return settings.METRICS_ENABLED
+
+
+def _format(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self._local = threading.local()
+        self._shards = []
+        registry.append(self)
+
+    def _new_shard(self):
+        return [0]
+
+    def _shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = self._new_shard()
+            # list.append is atomic, and each shard is only written by its thread
+            self._shards.append(shard)
+        return shard
+
+    def value(self):
+        return sum(shard[0] for shard in list(self._shards))
+
+    def samples(self):
+        return [(self.name, self.value())]
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines.extend(f"{name} {_format(value)}" for name, value in self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1):
+        if enabled():
+            self._shard()[0] += amount
+
+
+class Gauge(Metric):
+    """
+    A value that goes up and down. With `collect`, the value is computed by
+    calling it at scrape time instead.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, collect=None, registry=REGISTRY):
+        super().__init__(name, documentation, registry)
+        self.collect = collect
+
+    def inc(self, amount=1):
+        if enabled():
+            self._shard()[0] += amount
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+    def value(self):
+        if self.collect is not None:
+            return self.collect()
+        return super().value()
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, buckets=LATENCY_BUCKETS, registry=REGISTRY):
+        self.buckets = tuple(buckets)
+        super().__init__(name, documentation, registry)
+
+    def _new_shard(self):
+        # A count per bucket, one for values above the last bucket, then the sum
+        return [0] * (len(self.buckets) + 2)
+
+    def observe(self, value):
+        if not enabled():
+            return
+        shard = self._shard()
+        shard[bisect_left(self.buckets, value)] += 1
+        shard[-1] += value
+
+    @contextmanager
+    def time(self):
+        """Observes the seconds spent in the `with` block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def samples(self):
+        totals = [0] * (len(self.buckets) + 2)
+        for shard in list(self._shards):
+            for index, value in enumerate(shard):
+                totals[index] += value
+        samples = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), totals):
+            cumulative += count
+            samples.append((f'{self.name}_bucket{{le="{_format(bound)}"}}', cumulative))
+        samples.append((f"{self.name}_sum", totals[-1]))
+        samples.append((f"{self.name}_count", cumulative))
+        return samples
+
+
+@contextmanager
+def count_queries(histogram):
+    """Observes the number of queries run on this thread in the `with` block."""
+    if not enabled():
+        yield
+        return
+    queries = [0]
+
+    def execute(execute, sql, params, many, context):
+        queries[0] += 1
+        return execute(sql, params, many, context)
+
+    try:
+        with connection.execute_wrapper(execute):
+            yield
+    finally:
+        histogram.observe(queries[0])
+
+
+def _active_games():
+    from .models import Game
+
+    return Game.objects.filter(is_active=True).count()
+
+
+def _queue_depth():
+    from .matchmaking import queue_depth
+
+    return queue_depth()
+
+
+def _oldest_wait():
+    from .matchmaking import oldest_wait
+
+    return oldest_wait()
+
+
+def render(registry=REGISTRY):
+    """Returns every metric in the Prometheus text exposition format."""
+    return "\n".join(metric.render() for metric in registry) + "\n"
+
+
+ACTIVE_GAMES = Gauge("bingo_active_games", "Games in progress.", collect=_active_games)
+WEBSOCKETS = Gauge(
+    "bingo_websocket_connections", "Open game WebSocket connections in this process."
+)
+MOVE_SECONDS = Histogram(
+    "bingo_move_seconds", "Time to apply and broadcast a move in make_move."
+)
+MOVE_QUERIES = Histogram(
+    "bingo_move_queries", "Database queries run to apply a move.", QUERY_BUCKETS
+)
+GROUP_SEND_SECONDS = Histogram(
+    "bingo_group_send_seconds", "Time spent in group_send for a game event."
+)
+FANOUT_SECONDS = Histogram(
+    "bingo_fanout_seconds",
+    "Time from a game event being sent to a consumer's game_update handling it.",
+)
+RENDER_SECONDS = Histogram(
+    "bingo_render_seconds", "Time to render the board fragments for a game event."
+)
+RESUMED_SESSIONS = Counter(
+    "bingo_resumed_sessions_total",
+    "Players who reconnected within the grace window.",
+)
+ABANDONED_SESSIONS = Counter(
+    "bingo_abandoned_sessions_total",
+    "Games torn down because a player left and did not reconnect.",
+)
+MATCHMAKING_WAIT_SECONDS = Histogram(
+    "bingo_matchmaking_wait_seconds",
+    "How long a Quick Play game waited for its second player.",
+    WAIT_BUCKETS,
+)
+MATCHMAKING_QUEUE_DEPTH = Gauge(
+    "bingo_matchmaking_queue_depth",
+    "Quick Play games waiting for a second player.",
+    collect=_queue_depth,
+)
+MATCHMAKING_OLDEST_WAIT = Gauge(
+    "bingo_matchmaking_oldest_wait_seconds",
+    "How long the longest waiting Quick Play game has waited so far.",
+    collect=_oldest_wait,
+)
+RATE_LIMITED_MOVES = Counter(
+    "bingo_rate_limited_moves_total",
+    "Moves rejected for going over the move rate limit, posted or sent on a socket.",
+)
+RATE_LIMITED_JOINS = Counter(
+    "bingo_rate_limited_joins_total",
+    "join_game posts rejected for going over the join rate limit.",
+)
+RATE_LIMITED_CONNECTS = Counter(
+    "bingo_rate_limited_connects_total",
+    "WebSocket connections refused for going over the connect rate limit.",
+)
+RATE_LIMITED_MESSAGES = Counter(
+    "bingo_rate_limited_messages_total",
+    "WebSocket messages dropped for going over the message rate limit.",
+)
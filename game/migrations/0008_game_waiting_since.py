@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("game", "0007_game_last_move_made_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="game",
+            name="waiting_since",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="game",
+            index=models.Index(
+                condition=models.Q(("waiting_since__isnull", False)),
+                fields=["waiting_since"],
+                name="game_waiting_since_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations, models
+from django.db.models import Count
+
+CODE_SPACE = 36**6
+
+
+def dedupe_game_codes(apps, schema_editor):
+    """Give every game but the newest a distinct code before adding the constraint."""
+    Game = apps.get_model("game", "Game")
+    duplicates = (
+        Game.objects.values("game_code")
+        .annotate(count=Count("id"))
+        .filter(count__gt=1)
+        .values_list("game_code", flat=True)
+    )
+    for code in duplicates:
+        for game in Game.objects.filter(game_code=code).order_by("-id")[1:]:
+            # "-" is not in the code alphabet, so this can't collide with new codes
+            game.game_code = f"{code}-{game.id}"
+            game.save(update_fields=["game_code"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("game", "0008_game_waiting_since"),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_game_codes, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="game",
+            name="game_code",
+            field=models.CharField(max_length=100, unique=True),
+        ),
+        migrations.RunSQL(
+            f"CREATE SEQUENCE IF NOT EXISTS game_code_seq "
+            f"MINVALUE 0 MAXVALUE {CODE_SPACE - 1} START 0 CYCLE",
+            "DROP SEQUENCE IF EXISTS game_code_seq",
+        ),
+    ]
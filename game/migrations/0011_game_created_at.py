@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:51
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("game", "0010_game_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="game",
+            name="created_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("game", "0011_game_created_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="game",
+            name="mode",
+            field=models.CharField(
+                choices=[
+                    ("duel", "Two players taking turns"),
+                    ("caller", "Numbers called by the server for a room"),
+                ],
+                default="duel",
+                max_length=10,
+            ),
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.4 on 2026-10-18 21:10
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("game", "0012_game_mode"),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name="game",
+            old_name="version",
+            new_name="snapshot_seq",
+        ),
+        # Every existing game's moves are all in its called_numbers snapshot
+        migrations.RunSQL(
+            "UPDATE game_game SET snapshot_seq = cardinality(called_numbers)",
+            migrations.RunSQL.noop,
+        ),
+        migrations.CreateModel(
+            name="Move",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("seq", models.PositiveIntegerField()),
+                ("number", models.IntegerField()),
+                (
+                    "created_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                (
+                    "game",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="moves",
+                        to="game.game",
+                    ),
+                ),
+                (
+                    "player",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="moves",
+                        to="game.player",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("game", "seq"), name="move_game_seq_unique"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+import game.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("game", "0013_move_log"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="player",
+            name="board_order",
+            field=models.BinaryField(max_length=25, null=True),
+        ),
+        migrations.AddField(
+            model_name="game",
+            name="called_set",
+            field=game.fields.NumberSetField(default=list),
+        ),
+    ]
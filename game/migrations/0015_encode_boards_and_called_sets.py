@@ -0,0 +1,72 @@
+from django.db import migrations
+
+BATCH_SIZE = 1000
+BOARD_SIZE = 5
+
+
+# The board encoding as of this migration, kept here so that later changes to
+# game.scoring can't change what it writes.
+def board_order(numbers, board):
+    index = {number: position for position, number in enumerate(numbers)}
+    return bytes(index[number] for row in board for number in row)
+
+
+def board_from_order(numbers, order):
+    cells = [numbers[position] for position in order]
+    return [
+        cells[row * BOARD_SIZE : (row + 1) * BOARD_SIZE] for row in range(BOARD_SIZE)
+    ]
+
+
+def encode(apps, schema_editor):
+    """Fill board_order and called_set from the array columns."""
+    Game = apps.get_model("game", "Game")
+    Player = apps.get_model("game", "Player")
+
+    games = []
+    for game in Game.objects.only("called_numbers").iterator(chunk_size=BATCH_SIZE):
+        game.called_set = game.called_numbers
+        games.append(game)
+        if len(games) == BATCH_SIZE:
+            Game.objects.bulk_update(games, ["called_set"])
+            games = []
+    Game.objects.bulk_update(games, ["called_set"])
+
+    players = []
+    for player in (
+        Player.objects.select_related("game")
+        .only("board", "game__numbers")
+        .iterator(chunk_size=BATCH_SIZE)
+    ):
+        player.board_order = board_order(player.game.numbers, player.board)
+        players.append(player)
+        if len(players) == BATCH_SIZE:
+            Player.objects.bulk_update(players, ["board_order"])
+            players = []
+    Player.objects.bulk_update(players, ["board_order"])
+
+
+def decode(apps, schema_editor):
+    Game = apps.get_model("game", "Game")
+    Player = apps.get_model("game", "Player")
+    for game in Game.objects.only("called_set").iterator(chunk_size=BATCH_SIZE):
+        game.called_numbers = game.called_set
+        game.save(update_fields=["called_numbers"])
+    for player in (
+        Player.objects.select_related("game")
+        .only("board_order", "game__numbers")
+        .iterator(chunk_size=BATCH_SIZE)
+    ):
+        player.board = board_from_order(player.game.numbers, bytes(player.board_order))
+        player.save(update_fields=["board"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("game", "0014_compact_encoding_fields"),
+    ]
+
+    operations = [
+        migrations.RunPython(encode, decode),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("game", "0015_encode_boards_and_called_sets"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="player",
+            name="board",
+        ),
+        migrations.AlterField(
+            model_name="player",
+            name="board_order",
+            field=models.BinaryField(max_length=25),
+        ),
+        migrations.RemoveField(
+            model_name="game",
+            name="called_numbers",
+        ),
+        migrations.RenameField(
+            model_name="game",
+            old_name="called_set",
+            new_name="called_numbers",
+        ),
+    ]
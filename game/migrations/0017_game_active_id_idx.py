@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("game", "0016_drop_array_boards_and_called_numbers"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="game",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["-id"],
+                name="game_active_id_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("game", "0017_game_active_id_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PlayerStats",
+            fields=[
+                ("player_id", models.UUIDField(primary_key=True, serialize=False)),
+                ("name", models.CharField(max_length=20)),
+                ("games", models.PositiveIntegerField(default=0)),
+                ("wins", models.PositiveIntegerField(default=0)),
+                ("losses", models.PositiveIntegerField(default=0)),
+                ("abandoned", models.PositiveIntegerField(default=0)),
+                ("moves_to_win", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name_plural": "player stats",
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 20:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("game", "0018_player_stats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="game",
+            name="roster_version",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -1,16 +1,50 @@
 from django.db import models
 from django.contrib.postgres.fields import ArrayField
+from django.utils import timezone
 
 import uuid
 
+from . import scoring
+from .fields import NumberSetField
+
 
 class Game(models.Model):
-    game_code = models.CharField(max_length=100)
+    DUEL = "duel"
+    CALLER = "caller"
+    MODES = [
+        (DUEL, "Two players taking turns"),
+        (CALLER, "Numbers called by the server for a room"),
+    ]
+
+    game_code = models.CharField(max_length=100, unique=True)
     is_active = models.BooleanField(default=True)
     is_private = models.BooleanField(default=False)
     numbers = ArrayField(models.IntegerField(), default=list)
-    called_numbers = ArrayField(models.IntegerField(), default=list)
+    called_numbers = NumberSetField()
+    created_at = models.DateTimeField(default=timezone.now)
     last_move_made_at = models.DateTimeField(null=True, blank=True)
+    # Set while a Quick Play game waits in the matchmaking queue for a second player
+    waiting_since = models.DateTimeField(null=True, blank=True)
+    # Number of moves folded into called_numbers; later ones are in the Move log
+    snapshot_seq = models.PositiveIntegerField(default=0)
+    mode = models.CharField(max_length=10, choices=MODES, default=DUEL)
+    # Bumped whenever a caller game's players or their boards change
+    roster_version = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["waiting_since"],
+                condition=models.Q(waiting_since__isnull=False),
+                name="game_waiting_since_idx",
+            ),
+            # Keyset pages of live games in the admin, newest first
+            models.Index(
+                fields=["-id"],
+                condition=models.Q(is_active=True),
+                name="game_active_id_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"Game {self.game_code} ({'Active' if self.is_active else 'Ended'})"
@@ -20,41 +54,95 @@ class Player(models.Model):
     name = models.CharField(max_length=20, default="John")
     game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name="players")
     player_id = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
-    board = ArrayField(
-        ArrayField(models.IntegerField(), size=5), size=5
-    )  # 5x5 bingo board
+    # The 5x5 board as the index in game.numbers of each cell (see `board`)
+    board_order = models.BinaryField(max_length=25)
     turn = models.BooleanField(default=False)
 
-    def completed_lines(self):
-        """Returns no. of completed lines and numbers in those lines in the player's board."""
-        completed = 0
-        numbers = []
-        # Check rows
-        for row in self.board:
-            if all(cell in self.game.called_numbers for cell in row):
-                completed += 1
-                numbers.extend(row)
-        # Check columns
-        for col_idx in range(5):
-            if all(
-                self.board[row_idx][col_idx] in self.game.called_numbers
-                for row_idx in range(5)
-            ):
-                completed += 1
-                numbers.extend(self.board[row_idx][col_idx] for row_idx in range(5))
-        # Check diagonals
-        if all(self.board[i][i] in self.game.called_numbers for i in range(5)):
-            completed += 1
-            numbers.extend(self.board[i][i] for i in range(5))
-        if all(self.board[i][4 - i] in self.game.called_numbers for i in range(5)):
-            completed += 1
-            numbers.extend(self.board[i][4 - i] for i in range(5))
-        return completed, numbers
-
-    def check_winner(self):
+    # (board_order, board) last decoded
+    _board = None
+
+    @property
+    def board(self):
+        """The 5x5 board: the game's numbers in the order of `board_order`."""
+        order = bytes(self.board_order)
+        if self._board is None or self._board[0] != order:
+            self._board = (order, scoring.board_from_order(self.game.numbers, order))
+        return self._board[1]
+
+    @board.setter
+    def board(self, board):
+        self.board_order = scoring.board_order(self.game.numbers, board)
+        self._board = (self.board_order, board)
+
+    def completed_lines(self, called=None):
+        """Returns no. of completed lines and numbers in those lines in the player's board.
+
+        `called` is the game's called numbers as a `scoring.called_mask` bitset;
+        pass it in to avoid loading `self.game`.
+        """
+        if called is None:
+            called = scoring.called_mask(self.game.called_numbers)
+        return scoring.completed_lines(self.board, called)
+
+    def check_winner(self, called=None):
         """Check if the player has won."""
-        completed = self.completed_lines()[0]
-        return completed >= 5
+        completed = self.completed_lines(called)[0]
+        return completed >= scoring.WINNING_LINES
 
     def __str__(self):
         return f"Player {self.player_id} in Game {self.game.game_code}"
+
+
+class Move(models.Model):
+    """One called number, appended to the game's move log."""
+
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name="moves")
+    # Position in the game's call order, from 1
+    seq = models.PositiveIntegerField()
+    # None for numbers called by the server in caller games
+    player = models.ForeignKey(
+        Player, on_delete=models.SET_NULL, null=True, blank=True, related_name="moves"
+    )
+    number = models.IntegerField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["game", "seq"], name="move_game_seq_unique"
+            ),
+        ]
+
+    def __str__(self):
+        return f"Move {self.seq} in Game {self.game_id}: {self.number}"
+
+
+class PlayerStats(models.Model):
+    """
+    Running totals of a player's games, keyed by their player id so they
+    outlive the Player row. Only changed by counter updates when a game ends.
+    """
+
+    player_id = models.UUIDField(primary_key=True)
+    name = models.CharField(max_length=20)
+    games = models.PositiveIntegerField(default=0)
+    wins = models.PositiveIntegerField(default=0)
+    losses = models.PositiveIntegerField(default=0)
+    # Games that ended because this player left or stopped taking turns
+    abandoned = models.PositiveIntegerField(default=0)
+    # Numbers called before each win, summed over wins
+    moves_to_win = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "player stats"
+
+    @property
+    def average_moves_to_win(self):
+        return self.moves_to_win / self.wins if self.wins else None
+
+    @property
+    def abandon_rate(self):
+        return self.abandoned / self.games if self.games else 0
+
+    def __str__(self):
+        return f"{self.name}: {self.wins} wins in {self.games} games"
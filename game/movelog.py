@@ -0,0 +1,112 @@
+"""
+Append-only log of called numbers.
+
+A move is one INSERT into Move. Its `seq` is its position in the game's call
+order and (game, seq) is unique, so of two moves validated against the same
+state only one can commit; the other fails on the constraint instead of
+overwriting it. Nothing else on the game row is written per move.
+
+`Game.called_numbers` is a compacted snapshot of the first
+`Game.snapshot_seq` moves, refreshed every COMPACT_EVERY moves and on the
+winning move. A game's current state is its snapshot plus the moves logged
+after it (`rebuild`). The snapshot is a set and reads back in ascending
+order; the move it was taken at is read with the tail and put back last, so
+the last called number stays last.
+
+Games played on the Redis live state backend log their moves in one bulk
+insert when they end (`write_behind`).
+"""
+
+from django.utils import timezone
+
+from .models import Game, Move
+
+COMPACT_EVERY = 10
+
+
+def tail(game):
+    """(seq, number, created_at) of the game's moves from its snapshot's last on."""
+    return (
+        game.moves.filter(seq__gte=game.snapshot_seq)
+        .order_by("seq")
+        .values_list("seq", "number", "created_at")
+    )
+
+
+def _apply(game, moves):
+    for seq, number, created_at in moves:
+        if seq <= game.snapshot_seq:
+            game.called_numbers.remove(number)
+        game.called_numbers.append(number)
+        game.last_move_made_at = created_at
+    return game
+
+
+def rebuild(game):
+    """Bring a game loaded from the database up to date with its logged moves."""
+    return _apply(game, tail(game))
+
+
+async def arebuild(game):
+    return _apply(game, [move async for move in tail(game)])
+
+
+def append(game, player, number):
+    """
+    Call `number` as the game's next move and log it. Run it in a transaction:
+    raises IntegrityError if another move took its place first.
+    """
+    game.called_numbers.append(number)
+    game.last_move_made_at = timezone.now()
+    Move.objects.create(
+        game=game,
+        seq=len(game.called_numbers),
+        player=player,
+        number=number,
+        created_at=game.last_move_made_at,
+    )
+
+
+def due(game):
+    return len(game.called_numbers) - game.snapshot_seq >= COMPACT_EVERY
+
+
+def compact(game):
+    """Fold the game's logged moves into its snapshot."""
+    seq = len(game.called_numbers)
+    # A snapshot taken from a later state is never replaced by an older one
+    Game.objects.filter(pk=game.pk, snapshot_seq__lt=seq).update(
+        called_numbers=game.called_numbers,
+        snapshot_seq=seq,
+        last_move_made_at=game.last_move_made_at,
+    )
+    game.snapshot_seq = seq
+
+
+def write_behind(game, callers):
+    """
+    Log the moves of a live game that ends after being played in Redis.
+    For a game loaded from Redis, `snapshot_seq` counts the moves that were
+    already logged, and `callers` is [(player_id, called_at)] for the ones
+    after them, in order. Saving the game after brings its snapshot up to date.
+    """
+    player_pks = dict(game.players.values_list("player_id", "pk"))
+    numbers = game.called_numbers[game.snapshot_seq :]
+    Move.objects.bulk_create(
+        [
+            Move(
+                game_id=game.pk,
+                seq=seq,
+                player_id=player_pks.get(player_id),
+                number=number,
+                created_at=called_at,
+            )
+            for seq, number, (player_id, called_at) in zip(
+                range(game.snapshot_seq + 1, len(game.called_numbers) + 1),
+                numbers,
+                callers,
+            )
+        ],
+        ignore_conflicts=True,
+    )
+    game.snapshot_seq = len(game.called_numbers)
@@ -0,0 +1,244 @@
+from dataclasses import dataclass
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Value, When
+from django.utils import timezone
+
+from .models import Game, Player
+from . import live_state, metrics, movelog, reconnect, scoring, timers, tracing, util
+
+# A game with no move for this long is treated as abandoned.
+MOVE_EXPIRY = timedelta(seconds=45)
+
+CALLER_MOVE = "Numbers are called by the server in this game"
+
+
+class MoveError(Exception):
+    """A rejected move; the message is returned to the player."""
+
+
+class GameExpired(MoveError):
+    """The game has had no move for longer than MOVE_EXPIRY."""
+
+
+class StaleMove(MoveError):
+    """Another move was committed after this one was validated."""
+
+
+class GameOver(MoveError):
+    """The game has already been won."""
+
+
+@dataclass
+class MoveResult:
+    game: Game
+    player: Player
+    opponent: Player
+    number: int
+    winner: Player = None
+
+    @property
+    def players(self):
+        return [self.player, self.opponent]
+
+
+def parse_cell(row, col):
+    """Returns (row, col) as ints, or None when neither is given (auto pick)."""
+    if row is None and col is None:
+        return None
+    try:
+        row, col = int(row), int(col)
+    except (TypeError, ValueError):
+        raise MoveError("Invalid move")
+    if not (0 <= row < 5 and 0 <= col < 5):
+        raise MoveError("Invalid move")
+    return row, col
+
+
+def play_move(game_code, player_id, row=None, col=None, timed_out=False):
+    """
+    Call the number at (row, col) on the player's board, or the next uncalled
+    number when both are None (turn timeout). Raises MoveError if the move is
+    not allowed and Game/Player.DoesNotExist if there is no such game or player.
+    `timed_out` marks a move made by the server's turn timer.
+    """
+    cell = parse_cell(row, col)
+    with tracing.span("play_move", db=True):
+        with metrics.count_queries(metrics.MOVE_QUERIES):
+            if live_state.enabled():
+                result = _play_move_live(game_code, str(player_id), cell)
+            else:
+                result = _play_move_db(game_code, player_id, cell)
+        if result.winner is None:
+            timers.schedule(game_code, len(result.game.called_numbers), timed_out)
+        if reconnect.enabled():
+            reconnect.refresh(result.game, result.players, finished=bool(result.winner))
+    return result
+
+
+def abandon_game(game_code):
+    """
+    End a game nobody is playing any more. Returns whether it was still
+    active, so only one caller counts it as abandoned.
+    """
+    fields = {}
+    if live_state.enabled():
+        live = live_state.load(game_code)
+        if live:
+            fields = util.write_back(live[0])
+    abandoned = Game.objects.filter(game_code=game_code, is_active=True).update(
+        is_active=False, **fields
+    )
+    if live_state.enabled():
+        live_state.discard(game_code)
+    timers.cancel(game_code)
+    return bool(abandoned)
+
+
+def load_game(game_code):
+    """Returns (game, players) for an active game, ordered by player_id."""
+    with tracing.span("load_game", db=True):
+        if live_state.enabled():
+            live = live_state.load(game_code)
+            if live:
+                return live
+        game = movelog.rebuild(Game.objects.get(game_code=game_code, is_active=True))
+        return game, list(game.players.order_by("player_id"))
+
+
+async def aload_game(game_code):
+    """`load_game` for async callers, on the async queryset API."""
+    with tracing.span("load_game"):
+        if live_state.enabled():
+            live = await sync_to_async(live_state.load)(game_code)
+            if live:
+                return live
+        game = await movelog.arebuild(
+            await Game.objects.aget(game_code=game_code, is_active=True)
+        )
+        return game, [player async for player in game.players.order_by("player_id")]
+
+
+def _result(game, player, opponent, number):
+    called = scoring.called_mask(game.called_numbers)
+    winner = None
+    if player.check_winner(called):
+        winner = player
+    elif opponent.check_winner(called):
+        winner = opponent
+    return MoveResult(game, player, opponent, number, winner)
+
+
+def _active_game(game_code):
+    """The game rebuilt from its move log; raises GameOver once it was won."""
+    game = Game.objects.get(game_code=game_code)
+    if not game.is_active:
+        raise GameOver("Game over")
+    return movelog.rebuild(game)
+
+
+def _play_move_db(game_code, player_id, cell):
+    game = _active_game(game_code)
+    if game.mode == Game.CALLER:
+        raise MoveError(CALLER_MOVE)
+    players = list(game.players.all())
+    player = next((p for p in players if str(p.player_id) == str(player_id)), None)
+    if player is None:
+        raise Player.DoesNotExist
+
+    if game.last_move_made_at and timezone.now() - game.last_move_made_at > MOVE_EXPIRY:
+        raise GameExpired("Game expired")
+
+    if not player.turn:
+        raise MoveError("Not your turn")
+
+    opponent = next((p for p in players if p is not player), None)
+    if opponent is None:
+        raise MoveError("Waiting for opponent")
+
+    called = scoring.called_mask(game.called_numbers)
+    if cell is None:
+        called_number = util.get_random_number(game, called)
+        if called_number is None:
+            raise MoveError("No numbers left")
+    else:
+        row, col = cell
+        called_number = player.board[row][col]
+
+    # If already called, reject
+    if called >> called_number & 1:
+        raise MoveError("Number already called")
+
+    return commit_move(game, player, opponent, called_number)
+
+
+def commit_move(game, player, opponent, number):
+    """
+    Log the called number as the game's next move and flip the turn in one
+    transaction. The move log allows one move per position, so a racing move
+    (double click, timeout auto-pick) validated against the same state raises
+    StaleMove instead of overwriting. The game's snapshot is compacted every
+    `movelog.COMPACT_EVERY` moves and on the winning move, which also marks
+    the game finished in the same transaction, so no move is accepted after it.
+    """
+    try:
+        with transaction.atomic():
+            movelog.append(game, player, number)
+            result = _result(game, player, opponent, number)
+            if result.winner is not None or movelog.due(game):
+                movelog.compact(game)
+            if result.winner is None:
+                Player.objects.filter(game=game).update(
+                    turn=Case(When(turn=True, then=Value(False)), default=Value(True))
+                )
+            else:
+                util.finish_game(game, [result.winner])
+    except IntegrityError:
+        raise StaleMove("Stale move")
+
+    if result.winner is None:
+        player.turn, opponent.turn = opponent.turn, player.turn
+    return result
+
+
+_LIVE_ERRORS = {
+    live_state.NOT_TURN: "Not your turn",
+    live_state.DUPLICATE: "Number already called",
+    live_state.EXHAUSTED: "No numbers left",
+}
+
+
+def _play_move_live(game_code, player_id, cell):
+    status, number, winner = live_state.apply_move(
+        game_code, player_id, cell, MOVE_EXPIRY
+    )
+    if status == live_state.MISSING:
+        # First move since the game started: copy it over from Postgres.
+        game = _active_game(game_code)
+        if game.mode == Game.CALLER:
+            raise MoveError(CALLER_MOVE)
+        players = list(game.players.all())
+        if len(players) < 2:
+            raise MoveError("Waiting for opponent")
+        live_state.store(game, players)
+        status, number, winner = live_state.apply_move(
+            game_code, player_id, cell, MOVE_EXPIRY
+        )
+
+    if status == live_state.NO_PLAYER:
+        raise Player.DoesNotExist
+    if status == live_state.EXPIRED:
+        raise GameExpired("Game expired")
+    if status == live_state.FINISHED:
+        raise GameOver("Game over")
+    if status != live_state.OK:
+        raise MoveError(_LIVE_ERRORS.get(status, "Invalid move"))
+
+    game, players = live_state.load(game_code)
+    player = next(p for p in players if str(p.player_id) == player_id)
+    opponent = next(p for p in players if str(p.player_id) != player_id)
+    # The script already decided the winner, and took the game off the board
+    winner = next((p for p in players if str(p.player_id) == winner), None)
+    return MoveResult(game, player, opponent, number, winner)
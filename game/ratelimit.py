@@ -0,0 +1,222 @@
+"""
+Token bucket rate limits on moves, joins and WebSocket traffic.
+
+Each limit gives every client a bucket of `burst` tokens refilled at `rate`
+tokens a second; a request takes a token, and one that finds the bucket
+empty is turned away before it reaches the database or the channel layer.
+Clients are keyed by player id, or by IP address without a player cookie.
+Joins and socket connects are always keyed by IP address: a new player
+cookie is free to get, so it can't be what pays for creating a game.
+
+Buckets live in a bounded in-process map, so most checks are a dict lookup
+under a lock. With RATE_LIMIT_SHARED (the default with more than one worker)
+a request that passes its local bucket also takes a token from a bucket in
+Redis, updated by one Lua script, so a client spread over workers by the
+router still gets one budget. If Redis can't be reached the local decision
+stands.
+
+Views are limited with the `limit_view` decorator, which answers 429 with a
+Retry-After. `RateLimitMiddleware` refuses WebSocket handshakes over the
+connect limit and drops messages over the message limit, and move frames
+over the move limit, replying with an error frame, so a move costs the same
+budget over the socket as over HTTP. Each limit counts its rejections in
+metrics.
+
+These limits cap what a client can ask of the server; they don't bound what
+the server queues for a client that reads slowly, which is left to the
+channel layer's per-channel capacity.
+"""
+
+import functools
+import json
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+from redis.exceptions import RedisError
+
+from .redis_client import get_client
+from . import identity, metrics
+
+logger = logging.getLogger(__name__)
+
+# Most clients tracked per process; the least recently seen are forgotten
+MAX_KEYS = 10000
+KEY_PREFIX = "bingo:ratelimit:"
+
+TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'stamp')
+local tokens = tonumber(state[1]) or burst
+local stamp = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - stamp) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'stamp', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return allowed
+"""
+
+Limit = namedtuple("Limit", "name rate burst rejected by_address", defaults=[False])
+
+MOVE = Limit("move", 2, 5, metrics.RATE_LIMITED_MOVES)
+JOIN = Limit("join", 0.2, 5, metrics.RATE_LIMITED_JOINS, by_address=True)
+CONNECT = Limit("connect", 1, 10, metrics.RATE_LIMITED_CONNECTS, by_address=True)
+MESSAGE = Limit("message", 5, 10, metrics.RATE_LIMITED_MESSAGES)
+
+REJECTED_FRAME = json.dumps({"type": "error", "error": "Too many requests"})
+
+_take = None
+
+
+class LocalBuckets:
+    """Token buckets for this process, keeping the MAX_KEYS most recently used."""
+
+    def __init__(self, max_keys=MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst, now=None):
+        """Take a token from `key`'s bucket; False if it is empty."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, stamp = self._buckets.pop(key, (burst, now))
+            tokens = min(burst, tokens + (now - stamp) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed
+
+
+_local = LocalBuckets()
+
+
+def _take_shared(limit, key):
+    global _take
+    if _take is None:
+        _take = get_client().register_script(TAKE_SCRIPT)
+    try:
+        return bool(
+            _take(
+                keys=[f"{KEY_PREFIX}{key}"],
+                args=[limit.rate, limit.burst, time.time()],
+            )
+        )
+    except RedisError:
+        logger.warning("Shared rate limit check failed for %s", key, exc_info=True)
+        return True
+
+
+def allow(limit, client):
+    """Take a token for `client` under `limit`; False if it is over the limit."""
+    if not settings.RATE_LIMIT_ENABLED:
+        return True
+    key = f"{limit.name}:{client}"
+    allowed = _local.take(key, limit.rate, limit.burst) and (
+        not settings.RATE_LIMIT_SHARED or _take_shared(limit, key)
+    )
+    if not allowed:
+        limit.rejected.inc()
+    return allowed
+
+
+async def aallow(limit, client):
+    if settings.RATE_LIMIT_ENABLED and settings.RATE_LIMIT_SHARED:
+        return await sync_to_async(allow)(limit, client)
+    return allow(limit, client)
+
+
+def request_client(request, limit):
+    """The key a request is limited under: its player id, else its IP."""
+    address = request.META.get("REMOTE_ADDR", "")
+    if limit.by_address:
+        return address
+    return identity.player_id(request) or address
+
+
+def scope_client(scope, limit):
+    address = (scope.get("client") or ("",))[0]
+    player = scope.get("player")
+    if limit.by_address or not player:
+        return address
+    return player["id"]
+
+
+def limit_view(limit, methods=("POST",)):
+    """Answer 429 to `methods` requests over `limit` without running the view."""
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method in methods and not allow(
+                limit, request_client(request, limit)
+            ):
+                response = HttpResponse("Too many requests", status=429)
+                response["Retry-After"] = str(math.ceil(1 / limit.rate))
+                return response
+            return view(request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _is_move(message):
+    """Whether a socket frame is a {"action": "move"} message."""
+    try:
+        frame = json.loads(message.get("text") or "")
+    except ValueError:
+        return False
+    return isinstance(frame, dict) and frame.get("action") == "move"
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware for WebSocket routes, inside PlayerTokenMiddleware: refuses
+    handshakes over the CONNECT limit, drops messages over MESSAGE and move
+    frames over MOVE.
+    """
+
+    def __init__(self, inner):
+        self.inner = inner
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "websocket":
+            return await self.inner(scope, receive, send)
+        if not await aallow(CONNECT, scope_client(scope, CONNECT)):
+            # Refuse the handshake without starting a consumer
+            if (await receive())["type"] == "websocket.connect":
+                await send({"type": "websocket.close"})
+            return
+        client = scope_client(scope, MESSAGE)
+        mover = scope_client(scope, MOVE)
+
+        async def allowed(message):
+            if message["type"] != "websocket.receive":
+                return True
+            if not await aallow(MESSAGE, client):
+                return False
+            return not _is_move(message) or await aallow(MOVE, mover)
+
+        async def limited_receive():
+            while True:
+                message = await receive()
+                if await allowed(message):
+                    return message
+                await send({"type": "websocket.send", "text": REJECTED_FRAME})
+
+        return await self.inner(scope, limited_receive, send)
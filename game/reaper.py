@@ -0,0 +1,125 @@
+"""
+Background cleanup of games nobody will come back to.
+
+Finished games and games with no activity for a while are deleted in batches
+with one DELETE per table per batch (moves, players, games), instead of
+loading each game and letting the ORM cascade to its players.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef, Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Game, Move, Player
+from .redis_client import get_client
+
+logger = logging.getLogger(__name__)
+
+# How long finished games are kept before they are reaped
+FINISHED_TTL = timedelta(minutes=10)
+# Active games with no move (or, if never started, no join) for this long
+IDLE_TTL = timedelta(hours=1)
+BATCH_SIZE = 500
+
+LOCK_KEY = "bingo:reaper:lock"
+
+_task = None
+
+
+def stale_games(now=None):
+    now = now or timezone.now()
+    # last_move_made_at is only written when the move log is compacted, so an
+    # idle-looking game is spared if it has a more recent move in the log
+    recent_move = Move.objects.filter(
+        game=OuterRef("pk"), created_at__gte=now - IDLE_TTL
+    )
+    return Game.objects.alias(
+        last_activity=Coalesce("last_move_made_at", "created_at")
+    ).filter(
+        Q(is_active=False, last_activity__lt=now - FINISHED_TTL)
+        | (Q(last_activity__lt=now - IDLE_TTL) & ~Exists(recent_move))
+    )
+
+
+def reap(batch_size=BATCH_SIZE):
+    """
+    Delete stale games and their players. Returns the number of games and
+    players deleted and how long it took.
+    """
+    start = time.monotonic()
+    now = timezone.now()
+    games = players = 0
+    while True:
+        with transaction.atomic():
+            ids = list(
+                stale_games(now)
+                .order_by("id")
+                .select_for_update(skip_locked=True)
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"DELETE FROM {Move._meta.db_table} WHERE game_id = ANY(%s)",
+                    [ids],
+                )
+                # A player re-seated in a later game still has moves in earlier
+                # ones; SET_NULL is only applied by the ORM, so do it here
+                cursor.execute(
+                    f"UPDATE {Move._meta.db_table} SET player_id = NULL "
+                    f"WHERE player_id IN (SELECT id FROM {Player._meta.db_table} "
+                    "WHERE game_id = ANY(%s))",
+                    [ids],
+                )
+                cursor.execute(
+                    f"DELETE FROM {Player._meta.db_table} WHERE game_id = ANY(%s)",
+                    [ids],
+                )
+                players += cursor.rowcount
+                cursor.execute(
+                    f"DELETE FROM {Game._meta.db_table} WHERE id = ANY(%s)", [ids]
+                )
+                games += cursor.rowcount
+    return {
+        "games": games,
+        "players": players,
+        "seconds": time.monotonic() - start,
+    }
+
+
+async def run(interval):
+    """Reap every `interval` seconds. Only one worker reaps per interval."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            locked = await sync_to_async(get_client().set)(
+                LOCK_KEY, 1, nx=True, ex=interval
+            )
+            if not locked:
+                continue
+            report = await database_sync_to_async(reap)()
+            logger.info(
+                "Reaped %(games)d games and %(players)d players in %(seconds).2fs",
+                report,
+            )
+        except Exception:
+            logger.exception("Reaping stale games failed")
+
+
+def ensure_started():
+    """Start the periodic reaper in the running event loop if enabled."""
+    global _task
+    interval = settings.REAPER_INTERVAL
+    if not interval or (_task is not None and not _task.done()):
+        return
+    _task = asyncio.get_running_loop().create_task(run(interval))
@@ -0,0 +1,310 @@
+"""
+Reconnect grace window.
+
+When a seated player's socket closes in an active game, the game is not torn
+down straight away. A snapshot of the game is cached in Redis and a teardown
+deadline is set RECONNECT_GRACE seconds out. If the player connects again in
+time, the deadline is removed and their board is rendered from the snapshot
+without a query. Moves made meanwhile (the opponent's, or the turn timer's
+auto-picks) refresh the snapshot. A Quick Play game whose only player
+dropped is taken out of the matchmaking queue until they are back, so no
+newcomer is seated in a game that may be torn down.
+
+A player can have more than one socket on a game: a second tab, or the
+HTMX ws extension reconnecting before the server has seen the old socket
+close. Each seated player's open sockets are counted in Redis, and only
+closing the last one starts the grace window.
+
+`run()` tears down games whose deadline passed. Claiming deadlines removes
+them in one Lua script, and resuming removes its own with ZREM, so a game is
+either resumed or torn down, once, whichever worker sees it first. A player
+who has a socket open again by then is never torn down, even if their old
+socket's close was handled after the new one connected.
+"""
+
+import asyncio
+import json
+import logging
+import uuid
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import Game, Player
+from .redis_client import get_client
+from . import broadcast, live_state, matchmaking, metrics, stats, timers
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 1
+CLAIM_BATCH = 100
+
+DEADLINES_KEY = "bingo:reconnect:deadlines"
+SNAPSHOT_KEY = "bingo:reconnect:snapshot:{}"
+SOCKETS_KEY = "bingo:reconnect:sockets:{}"
+# Socket counts left behind by a worker that died are forgotten after this
+SOCKETS_TTL = 24 * 60 * 60
+
+CLAIM_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, member in ipairs(due) do
+    redis.call('ZREM', KEYS[1], member)
+end
+return due
+"""
+
+DETACH_SCRIPT = """
+local left = redis.call('HINCRBY', KEYS[1], ARGV[1], -1)
+if left <= 0 then
+    redis.call('HDEL', KEYS[1], ARGV[1])
+end
+return left
+"""
+
+_claim = None
+_detach = None
+_task = None
+
+
+def enabled():
+    return settings.RECONNECT_GRACE > 0
+
+
+def _member(game_code, player_id):
+    return f"{game_code}:{player_id}"
+
+
+def dump(game, players):
+    return json.dumps(
+        {
+            "id": game.id,
+            "game_code": game.game_code,
+            "is_private": game.is_private,
+            "mode": game.mode,
+            "numbers": game.numbers,
+            "called_numbers": game.called_numbers,
+            "snapshot_seq": game.snapshot_seq,
+            "last_move_made_at": (
+                game.last_move_made_at.isoformat() if game.last_move_made_at else None
+            ),
+            "waiting_since": (
+                game.waiting_since.isoformat() if game.waiting_since else None
+            ),
+            "players": [
+                {
+                    "player_id": str(player.player_id),
+                    "name": player.name,
+                    "board": player.board,
+                    "turn": player.turn,
+                }
+                for player in players
+            ],
+        }
+    )
+
+
+def restore(data):
+    """Returns unsaved (game, players) from a snapshot, players by player_id."""
+    state = json.loads(data)
+    last_move_made_at = state["last_move_made_at"]
+    waiting_since = state.get("waiting_since")
+    game = Game(
+        id=state["id"],
+        game_code=state["game_code"],
+        is_active=True,
+        is_private=state["is_private"],
+        mode=state["mode"],
+        numbers=state["numbers"],
+        called_numbers=state["called_numbers"],
+        snapshot_seq=state["snapshot_seq"],
+        last_move_made_at=(
+            datetime.fromisoformat(last_move_made_at) if last_move_made_at else None
+        ),
+        waiting_since=datetime.fromisoformat(waiting_since) if waiting_since else None,
+    )
+    players = sorted(
+        (
+            Player(
+                game=game,
+                player_id=uuid.UUID(player["player_id"]),
+                name=player["name"],
+                board=player["board"],
+                turn=player["turn"],
+            )
+            for player in state["players"]
+        ),
+        key=lambda player: player.player_id,
+    )
+    return game, players
+
+
+def save_snapshot(game, players, only_if_held=False):
+    """Cache the game's state; with `only_if_held`, only refresh an existing snapshot."""
+    get_client().set(
+        SNAPSHOT_KEY.format(game.game_code),
+        dump(game, players),
+        ex=settings.RECONNECT_GRACE * 2,
+        xx=only_if_held,
+    )
+
+
+def refresh(game, players, finished=False):
+    """
+    Keep the snapshot of a game with a player in their grace window current
+    after a move; a finished game can't be resumed.
+    """
+    if finished:
+        get_client().delete(SNAPSHOT_KEY.format(game.game_code))
+    else:
+        save_snapshot(game, players, only_if_held=True)
+
+
+def attach(game_code, player_id):
+    """Count a socket a seated player opened on the game."""
+    key = SOCKETS_KEY.format(game_code)
+    pipe = get_client().pipeline()
+    pipe.hincrby(key, str(player_id), 1)
+    pipe.expire(key, SOCKETS_TTL)
+    pipe.execute()
+
+
+def detach(game_code, player_id):
+    """Count a closed socket; returns how many the player still has open."""
+    global _detach
+    if _detach is None:
+        _detach = get_client().register_script(DETACH_SCRIPT)
+    return max(_detach(keys=[SOCKETS_KEY.format(game_code)], args=[str(player_id)]), 0)
+
+
+def connected(game_code, player_id):
+    """Whether the player has a socket open on the game."""
+    return (
+        int(get_client().hget(SOCKETS_KEY.format(game_code), str(player_id)) or 0) > 0
+    )
+
+
+def drop(game, players, player_id):
+    """
+    Start the grace window for a player whose socket closed. A Quick Play
+    game still waiting for its second player is paused in the queue.
+    """
+    if len(players) < 2:
+        matchmaking.pause(game)
+    save_snapshot(game, players)
+    get_client().zadd(
+        DEADLINES_KEY,
+        {
+            _member(game.game_code, player_id): timezone.now().timestamp()
+            + settings.RECONNECT_GRACE
+        },
+    )
+
+
+def resume(game_code, player_id):
+    """
+    Returns the cached (game, players) if the player reconnected within their
+    grace window, else None.
+    """
+    client = get_client()
+    if not client.zrem(DEADLINES_KEY, _member(game_code, player_id)):
+        return None
+    metrics.RESUMED_SESSIONS.inc()
+    data = client.get(SNAPSHOT_KEY.format(game_code))
+    if not data:
+        return None
+    game, players = restore(data)
+    if game.waiting_since:
+        matchmaking.requeue(game)
+    return game, players
+
+
+def claim_due(limit=CLAIM_BATCH):
+    """Removes and returns [(game_code, player_id)] whose grace window ran out."""
+    global _claim
+    if _claim is None:
+        _claim = get_client().register_script(CLAIM_SCRIPT)
+    due = _claim(keys=[DEADLINES_KEY], args=[timezone.now().timestamp(), limit])
+    return [tuple(member.rsplit(":", 1)) for member in due]
+
+
+async def teardown(channel_layer, game_code, player_id=None):
+    """
+    End the game for everyone still connected and delete it. `player_id` is
+    the player who left, charged with abandoning it if it had started.
+    """
+    from . import moves
+
+    try:
+        game = await Game.objects.aget(game_code=game_code)
+    except Game.DoesNotExist:
+        return
+    players = []
+    if game.is_active:
+        metrics.ABANDONED_SESSIONS.inc()
+        await channel_layer.group_send(
+            broadcast.group_name(game_code),
+            {
+                "type": "game_update",
+                "html": render_to_string("partials/game_over.html"),
+            },
+        )
+        live_game, players = await moves.aload_game(game_code)
+        await broadcast.publish_spectators(
+            channel_layer, live_game, players, abandoned=True
+        )
+
+    deleted, _ = await game.adelete()
+    await sync_to_async(timers.cancel)(game_code)
+    if enabled():
+        await sync_to_async(get_client().delete)(
+            SNAPSHOT_KEY.format(game_code), SOCKETS_KEY.format(game_code)
+        )
+    if live_state.enabled():
+        # Nothing to write back: the game's move log was deleted with it
+        await sync_to_async(live_state.discard)(game_code)
+    # Only once the game is gone, so a failure here can't leave it in place;
+    # stats rows are keyed by player_id and outlive the game's players.
+    if deleted and player_id and len(players) > 1:
+        await database_sync_to_async(stats.record_abandoned)(players, player_id)
+
+
+async def expire(channel_layer):
+    """
+    Tear down games whose disconnected player did not come back. Returns the
+    game codes torn down.
+    """
+    try:
+        due = await sync_to_async(claim_due)()
+    except Exception:
+        logger.exception("Claiming reconnect deadlines failed")
+        return []
+    torn_down = []
+    for game_code, player_id in due:
+        try:
+            if await sync_to_async(connected)(game_code, player_id):
+                continue
+            await teardown(channel_layer, game_code, player_id)
+            torn_down.append(game_code)
+        except Exception:
+            logger.exception("Tearing down game %s failed", game_code)
+    return torn_down
+
+
+async def run(interval=POLL_INTERVAL):
+    channel_layer = get_channel_layer()
+    while True:
+        await expire(channel_layer)
+        await asyncio.sleep(interval)
+
+
+def ensure_started():
+    """Start the teardown poller in the running event loop if enabled."""
+    global _task
+    if not enabled() or (_task is not None and not _task.done()):
+        return
+    _task = asyncio.get_running_loop().create_task(run())
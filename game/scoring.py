@@ -0,0 +1,97 @@
+from functools import lru_cache
+
+BOARD_SIZE = 5
+WINNING_LINES = 5
+
+# (row, col) cells of every line on a 5x5 board: rows, columns, then diagonals.
+LINES = (
+    tuple(tuple((row, col) for col in range(BOARD_SIZE)) for row in range(BOARD_SIZE))
+    + tuple(tuple((row, col) for row in range(BOARD_SIZE)) for col in range(BOARD_SIZE))
+    + (
+        tuple((i, i) for i in range(BOARD_SIZE)),
+        tuple((i, BOARD_SIZE - 1 - i) for i in range(BOARD_SIZE)),
+    )
+)
+
+
+def called_mask(numbers):
+    """Returns the called numbers as an integer bitset (bit n set for number n)."""
+    mask = 0
+    for number in numbers:
+        mask |= 1 << number
+    return mask
+
+
+def mask_numbers(mask):
+    """Returns the numbers whose bits are set in the mask, in ascending order."""
+    numbers = []
+    while mask:
+        low = mask & -mask
+        numbers.append(low.bit_length() - 1)
+        mask ^= low
+    return numbers
+
+
+def board_order(numbers, board):
+    """
+    Encodes a board dealt from `numbers` as the index in `numbers` of each
+    cell, row by row, one byte per cell.
+    """
+    index = {number: position for position, number in enumerate(numbers)}
+    try:
+        return bytes(index[number] for row in board for number in row)
+    except KeyError as e:
+        raise ValueError(f"{e.args[0]} is not one of the game's numbers")
+
+
+def board_from_order(numbers, order):
+    """The board encoded by `board_order`."""
+    cells = [numbers[position] for position in order]
+    return [
+        cells[row * BOARD_SIZE : (row + 1) * BOARD_SIZE] for row in range(BOARD_SIZE)
+    ]
+
+
+def freeze_board(board):
+    return tuple(tuple(row) for row in board)
+
+
+@lru_cache(maxsize=4096)
+def _board_masks(board):
+    lines = tuple(called_mask(board[row][col] for row, col in line) for line in LINES)
+    full = 0
+    for mask in lines[:BOARD_SIZE]:
+        full |= mask
+    return full, lines
+
+
+def board_masks(board):
+    """Returns (mask of every number on the board, mask of each of the 12 lines)."""
+    return _board_masks(freeze_board(board))
+
+
+def completed_mask(board, called):
+    """Returns no. of completed lines and a bitset of the numbers in those lines."""
+    full, lines = board_masks(board)
+    if (called & full).bit_count() < BOARD_SIZE:
+        return 0, 0
+    completed = 0
+    marked = 0
+    for mask in lines:
+        if called & mask == mask:
+            completed += 1
+            marked |= mask
+    return completed, marked
+
+
+def completed_lines(board, called):
+    """Returns no. of completed lines and the numbers in those lines for a board.
+
+    `called` is a bitset from `called_mask`.
+    """
+    completed, marked = completed_mask(board, called)
+    return completed, mask_numbers(marked)
+
+
+def is_winner(board, called):
+    return completed_lines(board, called)[0] >= WINNING_LINES
@@ -0,0 +1,143 @@
+"""
+Per-player results and the leaderboard.
+
+`PlayerStats` rows are running totals, updated with counter UPDATEs when a
+game is won (`record_result`) or abandoned (`record_abandoned`); reading
+them never aggregates over game history. Ranking by wins is kept in a Redis
+sorted set, so the top N is one ZREVRANGE (O(log n + N)) and a primary key
+lookup of those N rows, and a player's rank is one ZREVRANK. The top N is
+cached for LEADERBOARD_CACHE_SECONDS.
+
+`manage.py rebuild_leaderboard` reloads the sorted set from the table, after
+a backfill or losing Redis. The rebuilt set replaces the live one with a
+RENAME, so wins added to the live set during the rebuild are dropped unless
+the table scan already saw them.
+"""
+
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, When
+
+from .models import Player, PlayerStats
+from .redis_client import get_client
+
+LEADERBOARD_KEY = "bingo:leaderboard"
+LEADERBOARD_SIZE = 20
+LEADERBOARD_CACHE_SECONDS = 15
+REBUILD_BATCH = 1000
+
+
+def _ensure(players):
+    """Create missing stats rows for the players, and keep their names current."""
+    PlayerStats.objects.bulk_create(
+        [
+            PlayerStats(player_id=player.player_id, name=player.name)
+            for player in players
+        ],
+        update_conflicts=True,
+        unique_fields=["player_id"],
+        update_fields=["name"],
+    )
+
+
+def _add_wins(player_ids):
+    pipe = get_client().pipeline(transaction=False)
+    for player_id in player_ids:
+        pipe.zincrby(LEADERBOARD_KEY, 1, str(player_id))
+    pipe.execute()
+
+
+def record_result(game, winners):
+    """
+    Count a won game for the winners and everyone else seated in it. Not
+    idempotent: games are finished through `util.finish_game`, which only
+    calls this for the call that ended the game.
+    """
+    winner_ids = [winner.player_id for winner in winners]
+    seated = Player.objects.filter(game_id=game.pk)
+    with transaction.atomic():
+        _ensure(seated.only("player_id", "name"))
+        PlayerStats.objects.filter(player_id__in=winner_ids).update(
+            games=F("games") + 1,
+            wins=F("wins") + 1,
+            moves_to_win=F("moves_to_win") + len(game.called_numbers),
+        )
+        PlayerStats.objects.filter(player_id__in=seated.values("player_id")).exclude(
+            player_id__in=winner_ids
+        ).update(games=F("games") + 1, losses=F("losses") + 1)
+        transaction.on_commit(lambda: _add_wins(winner_ids))
+
+
+def record_abandoned(players, player_id):
+    """Count a started game that ended because `player_id` left."""
+    with transaction.atomic():
+        _ensure(players)
+        PlayerStats.objects.filter(
+            player_id__in=[player.player_id for player in players]
+        ).update(
+            games=F("games") + 1,
+            abandoned=Case(
+                When(player_id=player_id, then=F("abandoned") + 1),
+                default=F("abandoned"),
+                output_field=PositiveIntegerField(),
+            ),
+        )
+
+
+def _top(limit):
+    ranked = [
+        uuid.UUID(member)
+        for member in get_client().zrevrange(LEADERBOARD_KEY, 0, limit - 1)
+    ]
+    stats = PlayerStats.objects.in_bulk(ranked)
+    return [stats[player_id] for player_id in ranked if player_id in stats]
+
+
+def leaderboard(limit=LEADERBOARD_SIZE):
+    """The `limit` players with the most wins, most first."""
+    return cache.get_or_set(
+        f"{LEADERBOARD_KEY}:{limit}", lambda: _top(limit), LEADERBOARD_CACHE_SECONDS
+    )
+
+
+def rank(player_id):
+    """The player's 1-based place on the leaderboard, or None without a win."""
+    place = get_client().zrevrank(LEADERBOARD_KEY, str(player_id))
+    return None if place is None else place + 1
+
+
+def rebuild_leaderboard():
+    """
+    Reload the sorted set from PlayerStats and swap it in. Returns the number
+    of ranked players.
+
+    A win committed after the scan read its player's row is added to the old
+    set and lost in the swap; the table still counts it, so running the
+    rebuild again picks it up.
+    """
+    client = get_client()
+    staging = f"{LEADERBOARD_KEY}:rebuild"
+    client.delete(staging)
+    ranked = 0
+    batch = {}
+    rows = (
+        PlayerStats.objects.filter(wins__gt=0)
+        .values_list("player_id", "wins")
+        .iterator(chunk_size=REBUILD_BATCH)
+    )
+    for player_id, wins in rows:
+        batch[str(player_id)] = wins
+        if len(batch) == REBUILD_BATCH:
+            client.zadd(staging, batch)
+            ranked += len(batch)
+            batch = {}
+    if batch:
+        client.zadd(staging, batch)
+        ranked += len(batch)
+    if ranked:
+        client.rename(staging, LEADERBOARD_KEY)
+    else:
+        client.delete(LEADERBOARD_KEY)
+    return ranked
@@ -0,0 +1,25 @@
+"""Run a test against an in-memory Redis (fakeredis, with Lua) instead of a server."""
+
+from unittest import mock
+
+import fakeredis
+
+from .. import live_state, ratelimit, reconnect, redis_client, timers
+
+
+class FakeRedisMixin:
+    def setUp(self):
+        super().setUp()
+        self.redis = fakeredis.FakeRedis(decode_responses=True)
+        patches = [
+            mock.patch.object(redis_client, "_client", self.redis),
+            # Registered scripts are bound to the client they were made with
+            mock.patch.object(reconnect, "_claim", None),
+            mock.patch.object(reconnect, "_detach", None),
+            mock.patch.object(ratelimit, "_take", None),
+            mock.patch.dict(live_state._scripts, clear=True),
+            mock.patch.dict(timers._scripts, clear=True),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
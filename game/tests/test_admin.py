@@ -0,0 +1,65 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+import uuid
+
+from ..admin import live_games
+from ..models import Game
+from .. import moves, util
+
+
+class AdminTest(TestCase):
+    def setUp(self):
+        self.client.force_login(
+            User.objects.create_superuser("ops", "ops@example.com", "x")
+        )
+
+    def create_games(self, count):
+        games = []
+        for _ in range(count):
+            game = util.create_game(numbers=util.generate_numbers())
+            for index in range(2):
+                util.create_player(game, str(uuid.uuid4()), f"P{index}", index == 0)
+            games.append(game)
+        return games
+
+    def queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return len(context)
+
+    def test_live_games_pages_by_id_with_moves_and_players(self):
+        games = self.create_games(3)
+        Game.objects.filter(pk=games[0].pk).update(is_active=False)
+        game, players = moves.load_game(games[1].game_code)
+        player, opponent = sorted(players, key=lambda p: not p.turn)
+        moves.commit_move(game, player, opponent, game.numbers[0])
+
+        with self.assertNumQueries(2):
+            page = live_games(limit=1)
+        self.assertEqual([game.pk for game in page], [games[2].pk])
+        self.assertEqual(page[0].move_count, 0)
+
+        page = live_games(before=page[0].pk, limit=1)
+        self.assertEqual([game.pk for game in page], [games[1].pk])
+        self.assertEqual(page[0].move_count, 1)
+        self.assertIsNotNone(page[0].last_move_at)
+        self.assertEqual(
+            [(p.name, p.turn) for p in page[0].players.all()],
+            [("P0", False), ("P1", True)],
+        )
+        self.assertEqual(live_games(before=page[0].pk), [])
+
+    def test_changelists_and_live_games_run_constant_queries(self):
+        urls = [
+            reverse("admin_live_games"),
+            reverse("admin:game_player_changelist"),
+            reverse("admin:game_game_changelist"),
+        ]
+        self.create_games(1)
+        few = [self.queries(url) for url in urls]
+        self.create_games(5)
+        self.assertEqual([self.queries(url) for url in urls], few)
@@ -0,0 +1,54 @@
+from django.template.loader import render_to_string
+from django.test import SimpleTestCase
+
+import random
+
+from ..models import Game
+from .. import board_renderer, scoring, util
+
+
+class BoardRendererTest(SimpleTestCase):
+    def random_state(self, rng):
+        game = Game(game_code="ABC123", numbers=util.generate_numbers())
+        board = util.generate_board(game.numbers)
+        game.called_numbers = rng.sample(game.numbers, rng.randint(0, 25))
+        called = scoring.called_mask(game.called_numbers)
+        lines = scoring.completed_mask(board, called)[1]
+        return game, board, called, lines
+
+    def test_board_matches_template(self):
+        rng = random.Random(3)
+        for _ in range(50):
+            game, board, called, lines = self.random_state(rng)
+            expected = render_to_string(
+                "partials/board.html",
+                {
+                    "board": board,
+                    "game": game,
+                    "line_numbers": scoring.mask_numbers(lines),
+                },
+            )
+            self.assertEqual(
+                board_renderer.render_board(board, called, lines), expected
+            )
+
+    def test_cells_match_template(self):
+        rng = random.Random(5)
+        for _ in range(20):
+            game, board, called, lines = self.random_state(rng)
+            row, col = rng.randrange(5), rng.randrange(5)
+            expected = render_to_string(
+                "partials/cell.html",
+                {
+                    "row": row,
+                    "col": col,
+                    "cell": board[row][col],
+                    "oob": True,
+                    "game": game,
+                    "line_numbers": scoring.mask_numbers(lines),
+                },
+            )
+            self.assertEqual(
+                board_renderer.render_cells(board, [(row, col)], called, lines),
+                expected,
+            )
@@ -0,0 +1,78 @@
+from django.test import SimpleTestCase, override_settings
+
+import uuid
+
+from ..models import Game, Player
+from .. import broadcast
+
+
+class BroadcastTest(SimpleTestCase):
+    def setUp(self):
+        self.game = Game(game_code="ABC123", numbers=list(range(1, 26)))
+        board = [list(range(row * 5 + 1, row * 5 + 6)) for row in range(5)]
+        self.player = Player(
+            game=self.game, player_id=uuid.uuid4(), board=board, turn=True
+        )
+        self.opponent = Player(
+            game=self.game,
+            player_id=uuid.uuid4(),
+            board=[list(reversed(row)) for row in reversed(board)],
+        )
+        self.players = [self.player, self.opponent]
+
+    def test_full_update_has_board_for_each_player(self):
+        event = broadcast.game_update_event(self.game, self.players)
+        self.assertEqual(event["version"], 0)
+        self.assertEqual(
+            set(event["boards"]),
+            {str(self.player.player_id), str(self.opponent.player_id)},
+        )
+        self.assertEqual(
+            event["boards"][str(self.player.player_id)].count("<button"), 25
+        )
+
+    def test_delta_only_swaps_changed_cells(self):
+        self.game.called_numbers = [7]
+        event = broadcast.game_update_event(self.game, self.players, delta=True)
+        self.assertEqual(event["version"], 1)
+        html = event["deltas"][str(self.player.player_id)]
+        self.assertEqual(html.count("<button"), 1)
+        self.assertIn('id="cell-1-1"', html)
+        self.assertNotIn("bingo-letter", html)
+        self.assertIn('id="cell-3-3"', event["deltas"][str(self.opponent.player_id)])
+
+    def test_delta_lights_completed_line_and_letter(self):
+        self.game.called_numbers = [1, 2, 3, 4, 5]
+        html = broadcast.delta_fragments(self.game, self.players)[
+            str(self.player.player_id)
+        ]
+        self.assertEqual(html.count("<button"), 5)
+        self.assertEqual(html.count("bg-yellow-300"), 5)
+        self.assertIn('id="bingo-letter-1"', html)
+        self.assertNotIn('id="bingo-letter-2"', html)
+
+    def test_turn_gate_is_set_on_the_board_not_the_cells(self):
+        self.game.called_numbers = [7]
+        deltas = broadcast.delta_fragments(self.game, self.players)
+        self.assertIn("board.inert = false", deltas[str(self.player.player_id)])
+        waiting = deltas[str(self.opponent.player_id)]
+        self.assertIn("board.inert = true", waiting)
+        # Only the called cell is disabled
+        self.assertEqual(waiting.count("disabled"), 1)
+        boards = broadcast.board_fragments(self.game, self.players)
+        self.assertNotIn(" inert>", boards[str(self.player.player_id)])
+        self.assertIn(" inert>", boards[str(self.opponent.player_id)])
+        self.assertEqual(boards[str(self.opponent.player_id)].count("disabled"), 1)
+
+    @override_settings(DELTA_UPDATES=False)
+    def test_delta_updates_can_be_disabled(self):
+        self.game.called_numbers = [7]
+        event = broadcast.game_update_event(self.game, self.players, delta=True)
+        self.assertIn("boards", event)
+        self.assertNotIn("deltas", event)
+
+    def test_spectator_view_shows_both_boards(self):
+        self.game.called_numbers = [7]
+        html = broadcast.spectator_view(self.game, self.players)
+        self.assertEqual(html.count("<button"), 50)
+        self.assertIn("Called: 7", html)
@@ -0,0 +1,124 @@
+import random
+import uuid
+
+from unittest import mock
+
+from django.db import IntegrityError
+from django.test import SimpleTestCase, TestCase
+
+from ..models import Game, Player
+from .. import broadcast, caller, movelog, scoring, util
+
+
+class RoomTest(SimpleTestCase):
+    def setUp(self):
+        random.seed(7)
+        self.game = Game(game_code="ROOM01", numbers=util.generate_numbers())
+        self.players = [
+            Player(
+                game=self.game,
+                player_id=uuid.uuid4(),
+                board=util.generate_board(self.game.numbers),
+            )
+            for _ in range(200)
+        ]
+
+    def test_line_counts_match_scoring(self):
+        room = caller.Room(self.players)
+        called = []
+        for number in self.game.numbers:
+            called.append(number)
+            counts = room.call(number)
+            mask = scoring.called_mask(called)
+            expected = [
+                scoring.completed_mask(player.board, mask)[0] for player in self.players
+            ]
+            self.assertEqual(counts.tolist(), expected)
+
+    def test_winners_are_every_board_with_enough_lines(self):
+        room = caller.Room(self.players)
+        called = []
+        for number in self.game.numbers:
+            called.append(number)
+            winners = room.winners(room.call(number))
+            if winners:
+                break
+        mask = scoring.called_mask(called)
+        self.assertEqual(
+            winners,
+            [p for p in self.players if scoring.is_winner(p.board, mask)],
+        )
+
+    def test_room_rebuilt_with_called_numbers_matches_incremental(self):
+        called = self.game.numbers[:12]
+        incremental = caller.Room(self.players)
+        for number in called:
+            counts = incremental.call(number)
+        rebuilt = caller.Room(self.players, called[:-1])
+        self.assertEqual(rebuilt.call(called[-1]).tolist(), counts.tolist())
+
+    def test_lines_with_leaves_room_unmarked(self):
+        room = caller.Room(self.players)
+        number = self.game.numbers[0]
+        marked, counts = room.lines_with(number)
+        self.assertFalse(room.marked.any())
+        self.assertEqual(room.call(number).tolist(), counts.tolist())
+        self.assertTrue((room.marked == marked).all())
+
+    def test_room_delta_swaps_the_called_cell(self):
+        board = self.players[0].board
+        number = board[2][3]
+        html = broadcast.room_delta("ROOM01", board, [number], len(self.players))
+        self.assertEqual(html.count("<button"), 1)
+        self.assertIn('id="cell-2-3"', html)
+        self.assertIn("Players in room: 200", html)
+
+
+class CallNumberTest(TestCase):
+    def setUp(self):
+        self.game = util.create_game(numbers=util.generate_numbers(), mode=Game.CALLER)
+        self.player_ids = [str(uuid.uuid4()) for _ in range(2)]
+        for player_id in self.player_ids:
+            util.create_player(self.game, player_id, "P")
+        self.addCleanup(caller._rooms.pop, self.game.game_code, None)
+
+    def fresh_game(self):
+        return Game.objects.get(pk=self.game.pk)
+
+    def test_cached_room_reads_no_players(self):
+        room = caller._room(self.fresh_game())
+        game = self.fresh_game()
+        with self.assertNumQueries(0):
+            self.assertIs(caller._room(game), room)
+
+    def test_room_rebuilt_when_a_board_is_redealt(self):
+        room = caller._room(self.fresh_game())
+        # Re-joining deals a new board without changing the player count
+        util.create_player(self.game, self.player_ids[0], "P")
+        player = Player.objects.get(player_id=self.player_ids[0])
+        rebuilt = caller._room(self.fresh_game())
+        self.assertIsNot(rebuilt, room)
+        self.assertIn(
+            player.board,
+            [p.board for p in rebuilt.players],
+        )
+        self.assertIs(caller._room(self.fresh_game()), rebuilt)
+
+    def test_room_rebuilt_when_a_player_leaves_for_another_game(self):
+        room = caller._room(self.fresh_game())
+        other = util.create_game(numbers=util.generate_numbers())
+        util.create_player(other, self.player_ids[0], "P")
+        rebuilt = caller._room(self.fresh_game())
+        self.assertIsNot(rebuilt, room)
+        self.assertEqual(len(rebuilt.players), 1)
+
+    def test_failed_call_leaves_boards_unmarked(self):
+        room = caller._room(self.fresh_game())
+        with mock.patch.object(movelog, "append", side_effect=IntegrityError):
+            with self.assertRaises(IntegrityError):
+                caller.call_number(self.game.game_code)
+        self.assertFalse(room.marked.any())
+
+        _, number, _, _ = caller.call_number(self.game.game_code)
+        self.assertEqual(int(room.marked.sum()), 2)
+        self.assertEqual(self.game.moves.get().number, number)
@@ -0,0 +1,22 @@
+from django.test import SimpleTestCase
+
+from .. import codes
+
+
+class GameCodeTest(SimpleTestCase):
+    def test_codes_use_alphabet_and_length(self):
+        for number in (0, 1, 12345, codes.CODE_SPACE - 1):
+            code = codes.encode(number)
+            self.assertEqual(len(code), codes.CODE_LENGTH)
+            self.assertTrue(set(code) <= set(codes.CODE_CHARS))
+
+    def test_encoding_is_reversible_and_unique(self):
+        seen = set()
+        for number in range(20_000):
+            code = codes.encode(number)
+            self.assertEqual(codes.decode(code), number)
+            seen.add(code)
+        self.assertEqual(len(seen), 20_000)
+
+    def test_consecutive_numbers_are_not_consecutive_codes(self):
+        self.assertNotEqual(codes.encode(0)[:-1], codes.encode(1)[:-1])
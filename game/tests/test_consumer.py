@@ -0,0 +1,107 @@
+from django.test import TransactionTestCase, override_settings
+from channels.db import database_sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+
+import json
+import uuid
+
+from ..models import Game
+from ..routing import websocket_urlpatterns
+from .. import movelog, moves, util
+
+
+@override_settings(
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+    SERVER_TURN_TIMER=False,
+    REAPER_INTERVAL=0,
+    RECONNECT_GRACE=0,
+)
+class GameConsumerMoveTest(TransactionTestCase):
+    def setUp(self):
+        self.game = Game.objects.create(
+            game_code=util.generate_unique_game_code(),
+            numbers=util.generate_numbers(),
+        )
+        self.player_ids = [str(uuid.uuid4()), str(uuid.uuid4())]
+        for index, player_id in enumerate(self.player_ids):
+            util.create_player(self.game, player_id, f"Player{index}", index == 0)
+
+    async def connect(self, player_id):
+        communicator = WebsocketCommunicator(
+            URLRouter(websocket_urlpatterns), f"/ws/game/{self.game.game_code}/"
+        )
+        communicator.scope["player"] = {"id": player_id, "name": "Player"}
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        # Both players are in the game, so connecting broadcasts the board.
+        self.assertIn('id="board"', await communicator.receive_from())
+        return communicator
+
+    async def test_move_over_websocket_broadcasts_changed_cell(self):
+        communicator = await self.connect(self.player_ids[0])
+        await communicator.send_to(
+            text_data=json.dumps({"action": "move", "row": "0", "col": "0"})
+        )
+        html = await communicator.receive_from()
+        self.assertIn('id="cell-0-0"', html)
+        self.assertNotIn('id="board"', html)
+
+        await self.game.arefresh_from_db()
+        await movelog.arebuild(self.game)
+        self.assertEqual(len(self.game.called_numbers), 1)
+        await communicator.disconnect()
+
+    async def test_move_out_of_turn_returns_error(self):
+        communicator = await self.connect(self.player_ids[1])
+        await communicator.send_to(
+            text_data=json.dumps({"action": "move", "row": "0", "col": "0"})
+        )
+        response = json.loads(await communicator.receive_from())
+        self.assertEqual(response, {"type": "error", "error": "Not your turn"})
+        await communicator.disconnect()
+
+    async def test_resync_sends_full_board(self):
+        communicator = await self.connect(self.player_ids[0])
+        await communicator.send_to(text_data=json.dumps({"action": "resync"}))
+        self.assertIn('id="board"', await communicator.receive_from())
+        await communicator.disconnect()
+
+    async def test_spectator_gets_one_shared_view_per_move(self):
+        player = await self.connect(self.player_ids[0])
+        spectator = WebsocketCommunicator(
+            URLRouter(websocket_urlpatterns), f"/ws/game/{self.game.game_code}/watch/"
+        )
+        connected, _ = await spectator.connect()
+        self.assertTrue(connected)
+        self.assertIn('id="spectator-view"', await spectator.receive_from())
+
+        await player.send_to(
+            text_data=json.dumps({"action": "move", "row": "0", "col": "0"})
+        )
+        await player.receive_from()
+        html = await spectator.receive_from()
+        self.assertEqual(html.count('id="cell-0-0"'), 2)
+
+        await spectator.disconnect()
+        self.assertTrue(await Game.objects.filter(pk=self.game.pk).aexists())
+        await player.disconnect()
+
+    async def test_non_player_is_not_added_to_players_group(self):
+        communicator = WebsocketCommunicator(
+            URLRouter(websocket_urlpatterns), f"/ws/game/{self.game.game_code}/"
+        )
+        communicator.scope["player"] = {"id": str(uuid.uuid4()), "name": "Watcher"}
+        await communicator.connect()
+        response = json.loads(await communicator.receive_from())
+        self.assertEqual(response, {"type": "redirect_to_join"})
+        await communicator.disconnect()
+        self.assertTrue(await Game.objects.filter(pk=self.game.pk).aexists())
+
+    async def test_async_load_matches_sync_load(self):
+        game, players = await moves.aload_game(self.game.game_code)
+        sync_game, sync_players = await database_sync_to_async(moves.load_game)(
+            self.game.game_code
+        )
+        self.assertEqual(game.pk, sync_game.pk)
+        self.assertEqual([p.pk for p in players], [p.pk for p in sync_players])
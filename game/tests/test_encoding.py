@@ -0,0 +1,53 @@
+import random
+import uuid
+
+from django.db import connection
+from django.test import SimpleTestCase
+
+from ..models import Game, Player
+from .. import scoring, util
+
+
+class BoardOrderTest(SimpleTestCase):
+    def setUp(self):
+        random.seed(3)
+        self.game = Game(game_code="ABC123", numbers=util.generate_numbers())
+
+    def test_board_round_trips_through_its_order(self):
+        board = util.generate_board(self.game.numbers)
+        player = Player(game=self.game, player_id=uuid.uuid4(), board=board)
+        self.assertEqual(len(player.board_order), 25)
+
+        loaded = Player(game=self.game, board_order=player.board_order)
+        self.assertEqual(loaded.board, board)
+
+    def test_new_order_changes_the_board(self):
+        player = Player(game=self.game, board=util.generate_board(self.game.numbers))
+        board = util.generate_board(self.game.numbers)
+        player.board_order = scoring.board_order(self.game.numbers, board)
+        self.assertEqual(player.board, board)
+
+    def test_board_must_come_from_the_game_numbers(self):
+        board = util.generate_board(self.game.numbers)
+        board[0][0] = next(n for n in range(1, 100) if n not in self.game.numbers)
+        with self.assertRaises(ValueError):
+            Player(game=self.game, board=board)
+
+
+class NumberSetFieldTest(SimpleTestCase):
+    field = Game._meta.get_field("called_numbers")
+
+    def test_round_trip_is_sorted_set(self):
+        stored = self.field.get_prep_value([42, 1, 99, 63, 64])
+        self.assertEqual(len(stored), self.field.BYTES)
+        self.assertEqual(
+            self.field.from_db_value(memoryview(stored), None, connection),
+            [1, 42, 63, 64, 99],
+        )
+
+    def test_bitmap_is_the_called_mask(self):
+        numbers = [5, 17, 80]
+        self.assertEqual(
+            int.from_bytes(self.field.get_prep_value(numbers), "little"),
+            scoring.called_mask(numbers),
+        )
@@ -4,16 +4,16 @@ from django.urls import reverse
 import uuid
 
 from ..models import Game, Player
-from .. import util
+from .. import identity, util
 
 
 class GameRoomTest(TestCase):
     def setUp(self):
         self.player = Client()
         player_id = str(uuid.uuid4())
-        session = self.player.session
-        session["player_id"] = player_id
-        session.save()
+        self.player.cookies[identity.COOKIE_NAME] = identity.make_token(
+            player_id, "TestPlayer"
+        )
         self.game = Game.objects.create(
             game_code=util.generate_unique_game_code(),
             numbers=util.generate_numbers(),
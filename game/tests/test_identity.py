@@ -0,0 +1,39 @@
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.test import SimpleTestCase
+
+from .. import identity
+
+
+class IdentityTest(SimpleTestCase):
+    def test_token_round_trip(self):
+        token = identity.make_token("0b2f6a4e-0000-4000-8000-000000000000", "Ann")
+        self.assertEqual(
+            identity.read_token(token),
+            {"id": "0b2f6a4e-0000-4000-8000-000000000000", "name": "Ann"},
+        )
+
+    def test_tampered_token_is_rejected(self):
+        token = identity.make_token("player", "Ann")
+        self.assertIsNone(identity.read_token(token[:-1] + "x"))
+        self.assertIsNone(identity.read_token(None))
+
+    def test_expired_token_is_rejected(self):
+        token = identity.make_token("player", "Ann")
+        with mock.patch.object(identity, "MAX_AGE", -1):
+            self.assertIsNone(identity.read_token(token))
+
+    def test_middleware_sets_player_in_scope(self):
+        seen = {}
+
+        async def app(scope, receive, send):
+            seen.update(scope)
+
+        token = identity.make_token("player", "Ann")
+        scope = {
+            "type": "websocket",
+            "headers": [(b"cookie", f"{identity.COOKIE_NAME}={token}".encode())],
+        }
+        async_to_sync(identity.PlayerTokenMiddleware(app))(scope, None, None)
+        self.assertEqual(seen["player"], {"id": "player", "name": "Ann"})
@@ -1,10 +1,13 @@
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
 from ..models import Game, Player
+from .. import identity, matchmaking, metrics
 
 join_url = reverse("join")
 
 
+# Every test client posts from the same address
+@override_settings(RATE_LIMIT_ENABLED=False)
 class JoinGameTest(TestCase):
     def setUp(self):
         self.client1 = Client()
@@ -26,7 +29,8 @@ class JoinGameTest(TestCase):
         self.assertIsNotNone(player)
         self.assertEqual(player.game, game)
         self.assertEqual(player.name, "TestPlayer")
-        self.assertEqual(str(player.player_id), self.client.session["player_id"])
+        token = identity.read_token(self.client.cookies[identity.COOKIE_NAME].value)
+        self.assertEqual(token, {"id": str(player.player_id), "name": "TestPlayer"})
 
     def test_join_random_game_and_player_creation(self):
         response = self.client1.post(
@@ -82,3 +86,33 @@ class JoinGameTest(TestCase):
 
         self.assertTrue(player1.turn)
         self.assertFalse(player2.turn)
+
+    def test_quick_play_pairs_through_queue(self):
+        self.client1.post(join_url, {"player_name": "TestPlayer1"})
+        game = Game.objects.get()
+        self.assertIsNotNone(game.waiting_since)
+        self.assertEqual(matchmaking.queue_depth(), 1)
+        self.assertEqual(metrics.MATCHMAKING_QUEUE_DEPTH.value(), 1)
+        self.assertGreaterEqual(metrics.MATCHMAKING_OLDEST_WAIT.value(), 0)
+
+        self.client2.post(join_url, {"player_name": "TestPlayer2"})
+        game.refresh_from_db()
+        self.assertIsNone(game.waiting_since)
+        self.assertEqual(game.players.count(), 2)
+        self.assertEqual(matchmaking.queue_depth(), 0)
+        self.assertEqual(metrics.MATCHMAKING_OLDEST_WAIT.value(), 0)
+
+        # A third player opens a new game instead of joining the full one
+        self.client.post(join_url, {"player_name": "TestPlayer3"})
+        player3 = Player.objects.get(name="TestPlayer3")
+        self.assertNotEqual(player3.game, game)
+        self.assertIsNotNone(player3.game.waiting_since)
+
+    def test_quick_play_again_leaves_previous_queue_entry(self):
+        self.client1.post(join_url, {"player_name": "TestPlayer1"})
+        first_game = Game.objects.get()
+        self.client1.post(join_url, {"player_name": "TestPlayer1"})
+        first_game.refresh_from_db()
+        self.assertIsNone(first_game.waiting_since)
+        self.assertFalse(first_game.is_active)
+        self.assertEqual(matchmaking.queue_depth(), 1)
@@ -0,0 +1,186 @@
+from datetime import timedelta, timezone as dt_timezone
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+import datetime
+import uuid
+
+from ..models import Game, Player, PlayerStats
+from .. import live_state, moves, util
+from .fake_redis import FakeRedisMixin
+
+EXPIRY = timedelta(minutes=5)
+
+
+class LiveStateTest(FakeRedisMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.game = Game(
+            id=3,
+            game_code="ABC123",
+            numbers=list(range(1, 26)),
+            called_numbers=[5],
+            snapshot_seq=1,
+        )
+        board = [list(range(row * 5 + 1, row * 5 + 6)) for row in range(5)]
+        self.players = sorted(
+            (
+                Player(game=self.game, player_id=uuid.uuid4(), name=name, board=board)
+                for name in ("Ann", "Bob")
+            ),
+            key=lambda player: player.player_id,
+        )
+        self.players[0].turn = True
+        self.first, self.second = (str(p.player_id) for p in self.players)
+
+    def test_store_and_load_round_trip(self):
+        self.assertTrue(live_state.store(self.game, self.players))
+        # A game already in Redis is left as it is
+        self.assertFalse(live_state.store(self.game, self.players))
+        game, players = live_state.load("ABC123")
+        self.assertEqual(
+            (game.id, game.numbers, game.called_numbers, game.snapshot_seq),
+            (3, self.game.numbers, [5], 1),
+        )
+        self.assertEqual(
+            [(p.player_id, p.name, p.board, p.turn) for p in players],
+            [(p.player_id, p.name, p.board, p.turn) for p in self.players],
+        )
+        self.assertIsNone(live_state.load("OTHER"))
+
+    def test_move_calls_number_flips_turn_and_records_caller(self):
+        live_state.store(self.game, self.players)
+        self.assertEqual(
+            live_state.apply_move("ABC123", self.first, (0, 1), EXPIRY),
+            (live_state.OK, 2, None),
+        )
+        game, players = live_state.load("ABC123")
+        self.assertEqual(game.called_numbers, [5, 2])
+        self.assertEqual([p.turn for p in players], [False, True])
+        self.assertIsNotNone(game.last_move_made_at)
+        [(player_id, called_at)] = live_state.callers("ABC123")
+        self.assertEqual(str(player_id), self.first)
+        self.assertEqual(called_at, game.last_move_made_at)
+
+    def test_move_rejections(self):
+        live_state.store(self.game, self.players)
+        self.assertEqual(
+            live_state.apply_move("ABC123", self.second, (0, 0), EXPIRY)[0],
+            live_state.NOT_TURN,
+        )
+        self.assertEqual(
+            live_state.apply_move("ABC123", str(uuid.uuid4()), (0, 0), EXPIRY)[0],
+            live_state.NO_PLAYER,
+        )
+        self.assertEqual(
+            live_state.apply_move("ABC123", self.first, (0, 4), EXPIRY),
+            (live_state.DUPLICATE, 5, None),
+        )
+        self.assertEqual(
+            live_state.apply_move("OTHER", self.first, (0, 0), EXPIRY)[0],
+            live_state.MISSING,
+        )
+        self.assertEqual(live_state.callers("ABC123"), [])
+
+    def test_auto_pick_takes_next_uncalled_number(self):
+        live_state.store(self.game, self.players)
+        live_state.apply_move("ABC123", self.first, None, EXPIRY)
+        self.assertEqual(
+            live_state.apply_move("ABC123", self.second, None, EXPIRY),
+            (live_state.OK, 2, None),
+        )
+
+    def test_move_after_expiry_is_refused(self):
+        self.game.last_move_made_at = timezone.now() - timedelta(hours=1)
+        live_state.store(self.game, self.players)
+        self.assertEqual(
+            live_state.apply_move("ABC123", self.first, (0, 0), EXPIRY)[0],
+            live_state.EXPIRED,
+        )
+
+    def test_winning_move_keeps_the_turn_and_ends_the_game(self):
+        # Four rows called; the last row's first cell completes the fifth line
+        self.game.called_numbers = list(range(1, 21))
+        live_state.store(self.game, self.players)
+        self.assertEqual(
+            live_state.apply_move("ABC123", self.first, (4, 0), EXPIRY),
+            (live_state.OK, 21, self.first),
+        )
+        game, players = live_state.load("ABC123")
+        self.assertFalse(game.is_active)
+        self.assertEqual([p.turn for p in players], [True, False])
+        for player_id in (self.first, self.second):
+            self.assertEqual(
+                live_state.apply_move("ABC123", player_id, None, EXPIRY)[0],
+                live_state.FINISHED,
+            )
+        self.assertEqual(live_state.load("ABC123")[0].called_numbers[-1], 21)
+
+    def test_discard(self):
+        live_state.store(self.game, self.players)
+        live_state.apply_move("ABC123", self.first, (0, 0), EXPIRY)
+        live_state.discard("ABC123")
+        self.assertEqual(self.redis.keys("bingo:game:*"), [])
+
+
+@override_settings(LIVE_STATE_BACKEND="redis", SERVER_TURN_TIMER=False)
+class WriteBehindTest(FakeRedisMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.created_at = datetime.datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+        self.game = game = util.create_game(
+            numbers=util.generate_numbers(),
+            created_at=self.created_at,
+            mode=Game.CALLER,
+        )
+        for index in range(2):
+            util.create_player(game, str(uuid.uuid4()), f"P{index}", index == 0)
+        players = sorted(game.players.all(), key=lambda player: player.player_id)
+        live_state.store(game, players)
+        self.turn = next(p for p in players if p.turn)
+        self.other = next(p for p in players if p is not self.turn)
+        for player in (self.turn, self.other):
+            live_state.apply_move(game.game_code, player.player_id, None, EXPIRY)
+
+    def assertMovesWrittenBack(self):
+        game = self.game
+        game.refresh_from_db()
+        self.assertFalse(game.is_active)
+        self.assertEqual((game.created_at, game.mode), (self.created_at, Game.CALLER))
+        self.assertEqual(game.snapshot_seq, 2)
+        self.assertEqual(sorted(game.called_numbers), sorted(game.numbers[:2]))
+        self.assertEqual(
+            list(game.moves.order_by("seq").values_list("seq", "number", "player")),
+            [(1, game.numbers[0], self.turn.pk), (2, game.numbers[1], self.other.pk)],
+        )
+        self.assertIsNone(live_state.load(game.game_code))
+
+    def test_end_game_logs_moves_and_keeps_game_fields(self):
+        live_game, live_players = live_state.load(self.game.game_code)
+        with self.captureOnCommitCallbacks():
+            util.end_game(live_players[0])
+        self.assertMovesWrittenBack()
+
+    def test_abandoned_game_logs_moves_before_discarding_them(self):
+        self.assertTrue(moves.abandon_game(self.game.game_code))
+        self.assertMovesWrittenBack()
+        self.assertFalse(moves.abandon_game(self.game.game_code))
+
+    def test_no_move_is_taken_after_the_winning_one(self):
+        Game.objects.filter(pk=self.game.pk).update(mode=Game.DUEL)
+        live_state.discard(self.game.game_code)
+        board = self.turn.board
+        Game.objects.filter(pk=self.game.pk).update(
+            called_numbers=sum(board[:4], []), snapshot_seq=20
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            result = moves.play_move(self.game.game_code, self.turn.player_id, 4, 0)
+            self.assertEqual(result.winner.player_id, self.turn.player_id)
+            # Until end_game writes it back, Redis refuses further moves
+            with self.assertRaisesMessage(moves.GameOver, "Game over"):
+                moves.play_move(self.game.game_code, self.turn.player_id, 4, 1)
+            util.end_game(result.winner)
+        with self.assertRaisesMessage(moves.GameOver, "Game over"):
+            moves.play_move(self.game.game_code, self.turn.player_id, 4, 1)
+        self.assertEqual(PlayerStats.objects.get(player_id=self.turn.player_id).wins, 1)
@@ -0,0 +1,112 @@
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+import uuid
+
+from ..models import Game, Player, PlayerStats
+from .. import identity, movelog, moves, util
+
+
+@override_settings(
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+    SERVER_TURN_TIMER=False,
+    RECONNECT_GRACE=0,
+)
+class MakeMoveTest(TestCase):
+    def setUp(self):
+        self.game = Game.objects.create(
+            game_code=util.generate_unique_game_code(),
+            numbers=util.generate_numbers(),
+        )
+        self.clients = []
+        self.player_ids = []
+        for index in range(2):
+            client = Client()
+            player_id = str(uuid.uuid4())
+            client.cookies[identity.COOKIE_NAME] = identity.make_token(
+                player_id, f"Player{index}"
+            )
+            util.create_player(self.game, player_id, f"Player{index}", index == 0)
+            self.clients.append(client)
+            self.player_ids.append(player_id)
+        self.url = reverse("make_move", args=[self.game.game_code])
+
+    def player(self, index):
+        return Player.objects.get(player_id=self.player_ids[index])
+
+    def test_move_calls_number_and_flips_turn(self):
+        number = self.player(0).board[1][2]
+        response = self.clients[0].post(self.url, {"row": 1, "col": 2})
+        self.assertEqual(response.status_code, 204)
+
+        self.game.refresh_from_db()
+        movelog.rebuild(self.game)
+        self.assertEqual(self.game.called_numbers, [number])
+        self.assertIsNotNone(self.game.last_move_made_at)
+        self.assertFalse(self.player(0).turn)
+        self.assertTrue(self.player(1).turn)
+
+    def test_rejects_move_out_of_turn(self):
+        response = self.clients[1].post(self.url, {"row": 0, "col": 0})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["error"], "Not your turn")
+
+    def test_rejects_invalid_cell(self):
+        response = self.clients[0].post(self.url, {"row": 5, "col": 0})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["error"], "Invalid move")
+
+    def test_rejects_number_already_called(self):
+        self.clients[0].post(self.url, {"row": 0, "col": 0})
+        number = self.player(0).board[0][0]
+        board = self.player(1).board
+        row, col = next(
+            (r, c) for r in range(5) for c in range(5) if board[r][c] == number
+        )
+        response = self.clients[1].post(self.url, {"row": row, "col": col})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["error"], "Number already called")
+
+    def test_timeout_picks_next_uncalled_number(self):
+        response = self.clients[0].post(self.url)
+        self.assertEqual(response.status_code, 204)
+        self.game.refresh_from_db()
+        movelog.rebuild(self.game)
+        self.assertEqual(self.game.called_numbers, [self.game.numbers[0]])
+
+    def test_racing_move_is_rejected_as_stale(self):
+        game = Game.objects.get(pk=self.game.pk)
+        players = list(game.players.order_by("-turn"))
+        self.clients[0].post(self.url, {"row": 0, "col": 0})
+
+        with self.assertRaises(moves.StaleMove):
+            moves.commit_move(game, players[0], players[1], game.numbers[-1])
+        self.game.refresh_from_db()
+        self.assertEqual(
+            list(self.game.moves.values_list("seq", flat=True)),
+            [1],
+        )
+
+    def test_winning_move_finishes_the_game_before_it_is_announced(self):
+        # Four rows complete; calling the last row's first cell completes more
+        called = sum(self.player(0).board[:4], [])
+        Game.objects.filter(pk=self.game.pk).update(
+            called_numbers=called, snapshot_seq=len(called)
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            result = moves.play_move(self.game.game_code, self.player_ids[0], 4, 0)
+        self.assertEqual(str(result.winner.player_id), self.player_ids[0])
+        # Finished and counted with the move, not later by end_game
+        self.game.refresh_from_db()
+        self.assertFalse(self.game.is_active)
+        self.assertEqual(PlayerStats.objects.get(player_id=self.player_ids[0]).wins, 1)
+
+        with self.assertRaisesMessage(moves.GameOver, "Game over"):
+            moves.play_move(self.game.game_code, self.player_ids[0], 4, 1)
+        response = self.clients[0].post(self.url, {"row": 4, "col": 1})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["error"], "Game over")
+
+        util.end_game(result.winner)
+        stats = PlayerStats.objects.get(player_id=self.player_ids[0])
+        self.assertEqual((stats.games, stats.wins), (1, 1))
@@ -0,0 +1,105 @@
+import re
+import threading
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from .. import metrics, util
+
+SAMPLE = re.compile(r'^[a-z_]+(\{le="[^"]+"\})? -?[0-9.e+-]+$')
+
+
+@override_settings(METRICS_ENABLED=True)
+class MetricsTest(SimpleTestCase):
+    def setUp(self):
+        self.registry = []
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = metrics.Histogram(
+            "test_seconds", "Test.", buckets=(0.1, 1), registry=self.registry
+        )
+        for value in (0.05, 0.5, 0.5, 5):
+            histogram.observe(value)
+        text = metrics.render(self.registry)
+        self.assertIn("# TYPE test_seconds histogram", text)
+        self.assertIn('test_seconds_bucket{le="0.1"} 1', text)
+        self.assertIn('test_seconds_bucket{le="1"} 3', text)
+        self.assertIn('test_seconds_bucket{le="+Inf"} 4', text)
+        self.assertIn("test_seconds_sum 6.05", text)
+        self.assertIn("test_seconds_count 4", text)
+
+    def test_shards_from_every_thread_are_summed(self):
+        counter = metrics.Counter("test_total", "Test.", registry=self.registry)
+
+        def work():
+            for _ in range(1000):
+                counter.inc()
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(counter.value(), 4000)
+        self.assertEqual(len(counter._shards), 4)
+
+    def test_gauge_collect_runs_at_scrape(self):
+        metrics.Gauge("test_games", "Test.", collect=lambda: 7, registry=self.registry)
+        self.assertIn("test_games 7", metrics.render(self.registry))
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_disabled_records_nothing(self):
+        histogram = metrics.Histogram("test_seconds", "Test.", registry=self.registry)
+        with histogram.time():
+            pass
+        self.assertEqual(histogram._shards, [])
+
+    def test_metrics_endpoint(self):
+        with override_settings(METRICS_ENABLED=False):
+            self.assertEqual(self.client.get("/metrics").status_code, 404)
+
+
+@override_settings(METRICS_ENABLED=True)
+class MetricsEndpointTest(TestCase):
+    def scrape(self):
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response["Content-Type"], "text/plain; version=0.0.4; charset=utf-8"
+        )
+        return response.content.decode()
+
+    def test_exposition_has_every_metric_kind(self):
+        util.create_game(numbers=util.generate_numbers())
+        sockets = metrics.WEBSOCKETS.value()
+        resumed = metrics.RESUMED_SESSIONS.value()
+        moves = metrics.MOVE_SECONDS.samples()[-1][1]
+
+        def connect():
+            metrics.WEBSOCKETS.inc()
+
+        # Each thread records into its own shard of the gauge
+        threads = [threading.Thread(target=connect) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        metrics.WEBSOCKETS.dec()
+        metrics.RESUMED_SESSIONS.inc()
+        metrics.MOVE_SECONDS.observe(0.003)
+        self.addCleanup(metrics.WEBSOCKETS.dec, 2)
+
+        text = self.scrape()
+        self.assertTrue(text.endswith("\n"))
+        for metric in metrics.REGISTRY:
+            self.assertIn(f"# HELP {metric.name} {metric.documentation}\n", text)
+            self.assertIn(f"# TYPE {metric.name} {metric.kind}\n", text)
+        for line in text.splitlines():
+            if not line.startswith("#"):
+                self.assertRegex(line, SAMPLE)
+
+        self.assertIn("bingo_active_games 1\n", text)
+        self.assertIn(f"bingo_websocket_connections {sockets + 2}\n", text)
+        self.assertIn(f"bingo_resumed_sessions_total {resumed + 1}\n", text)
+        self.assertIn(f"bingo_move_seconds_count {moves + 1}\n", text)
+        self.assertIn('bingo_move_seconds_bucket{le="+Inf"}', text)
+        self.assertIn("bingo_move_seconds_sum ", text)
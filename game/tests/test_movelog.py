@@ -0,0 +1,56 @@
+from unittest import mock
+
+from django.test import TestCase
+
+import uuid
+
+from ..models import Game
+from .. import movelog, moves, reaper, util
+
+
+class MoveLogTest(TestCase):
+    def setUp(self):
+        self.game = util.create_game(numbers=util.generate_numbers())
+        for index in range(2):
+            util.create_player(self.game, str(uuid.uuid4()), f"P{index}", index == 0)
+
+    def play(self, count):
+        for _ in range(count):
+            game, players = moves.load_game(self.game.game_code)
+            player, opponent = sorted(players, key=lambda p: not p.turn)
+            moves.commit_move(game, player, opponent, util.get_random_number(game))
+
+    def test_move_is_logged_without_touching_the_snapshot(self):
+        self.play(2)
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.called_numbers, [])
+        self.assertEqual(self.game.snapshot_seq, 0)
+        self.assertEqual(
+            list(self.game.moves.order_by("seq").values_list("seq", "number")),
+            [(1, self.game.numbers[0]), (2, self.game.numbers[1])],
+        )
+        self.assertFalse(self.game.moves.filter(player=None).exists())
+
+    def test_state_is_snapshot_plus_tail(self):
+        with mock.patch.object(movelog, "COMPACT_EVERY", 3):
+            self.play(4)
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.called_numbers, sorted(self.game.numbers[:3]))
+        self.assertEqual(self.game.snapshot_seq, 3)
+
+        game, _ = moves.load_game(self.game.game_code)
+        self.assertEqual(sorted(game.called_numbers), sorted(self.game.numbers[:4]))
+        # The snapshot is a set; the calls since its last one keep their order
+        self.assertEqual(game.called_numbers[-2:], self.game.numbers[2:4])
+        self.assertEqual(
+            game.last_move_made_at,
+            self.game.moves.get(seq=4).created_at,
+        )
+
+    def test_reaper_spares_game_with_recent_logged_move(self):
+        Game.objects.filter(pk=self.game.pk).update(
+            created_at=self.game.created_at - reaper.IDLE_TTL * 2
+        )
+        self.assertTrue(reaper.stale_games().filter(pk=self.game.pk).exists())
+        self.play(1)
+        self.assertFalse(reaper.stale_games().filter(pk=self.game.pk).exists())
@@ -0,0 +1,151 @@
+import json
+from unittest import mock
+
+from channels.testing import WebsocketCommunicator
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from redis.exceptions import ConnectionError
+
+from .. import identity, ratelimit
+from .fake_redis import FakeRedisMixin
+
+
+async def echo(scope, receive, send):
+    """Accepts a socket and echoes its text messages."""
+    while True:
+        message = await receive()
+        if message["type"] == "websocket.connect":
+            await send({"type": "websocket.accept"})
+        elif message["type"] == "websocket.receive":
+            await send({"type": "websocket.send", "text": message["text"]})
+        else:
+            return
+
+
+@override_settings(RATE_LIMIT_ENABLED=True, RATE_LIMIT_SHARED=False)
+class RateLimitTest(SimpleTestCase):
+    def setUp(self):
+        ratelimit._local = ratelimit.LocalBuckets()
+
+    def test_bucket_allows_burst_then_refills_at_rate(self):
+        buckets = ratelimit.LocalBuckets()
+        self.assertEqual(
+            [buckets.take("key", 2, 3, now=0) for _ in range(4)],
+            [True, True, True, False],
+        )
+        # Half a second at 2 tokens/s buys one more
+        self.assertTrue(buckets.take("key", 2, 3, now=0.5))
+        self.assertFalse(buckets.take("key", 2, 3, now=0.5))
+        self.assertTrue(buckets.take("other", 2, 3, now=0.5))
+
+    def test_bucket_forgets_least_recently_used_keys(self):
+        buckets = ratelimit.LocalBuckets(max_keys=2)
+        for key in ("a", "b", "c"):
+            buckets.take(key, 1, 1, now=0)
+        self.assertEqual(list(buckets._buckets), ["b", "c"])
+
+    def test_view_over_limit_gets_429_without_running(self):
+        calls = []
+
+        @ratelimit.limit_view(ratelimit.Limit("test", 1, 2, ratelimit.MOVE.rejected))
+        def view(request):
+            calls.append(request)
+            return HttpResponse(status=204)
+
+        factory = RequestFactory()
+        statuses = [view(factory.post("/")).status_code for _ in range(3)]
+        self.assertEqual(statuses, [204, 204, 429])
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(view(factory.post("/"))["Retry-After"], "1")
+        # Only the limited methods take tokens
+        self.assertEqual(view(factory.get("/")).status_code, 204)
+
+    def test_fresh_player_cookie_does_not_reset_join_budget(self):
+        @ratelimit.limit_view(ratelimit.JOIN)
+        def view(request):
+            return HttpResponse(status=204)
+
+        factory = RequestFactory()
+        statuses = []
+        for index in range(ratelimit.JOIN.burst + 1):
+            request = factory.post("/")
+            request.COOKIES[identity.COOKIE_NAME] = identity.make_token(
+                f"player{index}", "P"
+            )
+            statuses.append(view(request).status_code)
+        self.assertEqual(statuses, [204] * ratelimit.JOIN.burst + [429])
+
+    @override_settings(RATE_LIMIT_ENABLED=False)
+    def test_disabled_allows_everything(self):
+        limit = ratelimit.Limit("test", 1, 1, ratelimit.MOVE.rejected)
+        self.assertTrue(all(ratelimit.allow(limit, "client") for _ in range(5)))
+
+    async def test_socket_messages_over_limit_are_dropped(self):
+        app = ratelimit.RateLimitMiddleware(echo)
+        communicator = WebsocketCommunicator(app, "/ws/test/")
+        communicator.scope["player"] = {"id": "player", "name": "P"}
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        for index in range(ratelimit.MESSAGE.burst + 1):
+            await communicator.send_to(text_data=str(index))
+        replies = [
+            await communicator.receive_from()
+            for _ in range(ratelimit.MESSAGE.burst + 1)
+        ]
+        self.assertEqual(replies[:-1], [str(i) for i in range(ratelimit.MESSAGE.burst)])
+        self.assertEqual(json.loads(replies[-1])["error"], "Too many requests")
+        await communicator.disconnect()
+
+    async def test_socket_moves_take_from_the_move_limit(self):
+        app = ratelimit.RateLimitMiddleware(echo)
+        communicator = WebsocketCommunicator(app, "/ws/test/")
+        communicator.scope["player"] = {"id": "player", "name": "P"}
+        await communicator.connect()
+        move = json.dumps({"action": "move", "row": "0", "col": "0"})
+        for _ in range(ratelimit.MOVE.burst + 1):
+            await communicator.send_to(text_data=move)
+        replies = [
+            await communicator.receive_from() for _ in range(ratelimit.MOVE.burst + 1)
+        ]
+        self.assertEqual(replies[:-1], [move] * ratelimit.MOVE.burst)
+        self.assertEqual(replies[-1], ratelimit.REJECTED_FRAME)
+        # Other messages still have budget left
+        await communicator.send_to(text_data='{"action": "resync"}')
+        self.assertEqual(await communicator.receive_from(), '{"action": "resync"}')
+        await communicator.disconnect()
+
+    async def test_connects_over_limit_are_refused(self):
+        app = ratelimit.RateLimitMiddleware(echo)
+        results = []
+        for _ in range(ratelimit.CONNECT.burst + 1):
+            communicator = WebsocketCommunicator(app, "/ws/test/")
+            connected, _ = await communicator.connect()
+            results.append(connected)
+            await communicator.disconnect()
+        self.assertEqual(results, [True] * ratelimit.CONNECT.burst + [False])
+
+
+@override_settings(RATE_LIMIT_ENABLED=True, RATE_LIMIT_SHARED=True)
+class SharedRateLimitTest(FakeRedisMixin, SimpleTestCase):
+    limit = ratelimit.Limit("test", 1, 2, ratelimit.MOVE.rejected)
+
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(setattr, ratelimit, "_local", ratelimit.LocalBuckets())
+
+    def take(self, now):
+        # A fresh local bucket each time, as if every request hit another worker
+        ratelimit._local = ratelimit.LocalBuckets()
+        with mock.patch.object(ratelimit.time, "time", return_value=now):
+            return ratelimit.allow(self.limit, "client")
+
+    def test_workers_share_one_bucket(self):
+        self.assertEqual([self.take(100) for _ in range(3)], [True, True, False])
+        # One second at 1 token/s buys one more
+        self.assertEqual([self.take(101), self.take(101)], [True, False])
+
+    def test_redis_errors_fail_open(self):
+        with mock.patch.object(
+            self.redis, "evalsha", side_effect=ConnectionError
+        ), self.assertLogs(ratelimit.logger, "WARNING"):
+            self.assertTrue(all(self.take(100) for _ in range(3)))
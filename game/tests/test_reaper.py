@@ -0,0 +1,63 @@
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from datetime import timedelta
+import uuid
+
+from ..models import Game, Move, Player
+from .. import reaper, util
+
+
+class ReaperTest(TestCase):
+    def create_game(self, age, **fields):
+        game = util.create_game(numbers=util.generate_numbers(), **fields)
+        Game.objects.filter(pk=game.pk).update(
+            created_at=timezone.now() - age,
+        )
+        util.create_player(game, str(uuid.uuid4()), "TestPlayer", True)
+        return game
+
+    def test_reaps_finished_and_idle_games_with_players(self):
+        finished = self.create_game(timedelta(minutes=30), is_active=False)
+        idle = self.create_game(timedelta(hours=2))
+        fresh = self.create_game(timedelta(minutes=1))
+        just_finished = self.create_game(timedelta(minutes=1), is_active=False)
+
+        report = reaper.reap(batch_size=1)
+
+        self.assertEqual(report["games"], 2)
+        self.assertEqual(report["players"], 2)
+        self.assertFalse(Game.objects.filter(pk__in=[finished.pk, idle.pk]).exists())
+        self.assertEqual(
+            set(Game.objects.values_list("pk", flat=True)),
+            {fresh.pk, just_finished.pk},
+        )
+        self.assertEqual(Player.objects.count(), 2)
+
+    def test_recent_move_keeps_old_game(self):
+        game = self.create_game(timedelta(hours=2))
+        Game.objects.filter(pk=game.pk).update(last_move_made_at=timezone.now())
+        self.assertEqual(reaper.reap()["games"], 0)
+
+    def test_player_moved_to_another_game_keeps_earlier_moves(self):
+        earlier = self.create_game(timedelta(minutes=1), is_active=False)
+        player = Player.objects.get(game=earlier)
+        Move.objects.create(
+            game=earlier,
+            seq=1,
+            player=player,
+            number=earlier.numbers[0],
+            created_at=timezone.now(),
+        )
+        # Joining again re-seats the same Player row in the new game
+        current = self.create_game(timedelta(hours=2))
+        util.create_player(current, str(player.player_id), "TestPlayer", True)
+
+        report = reaper.reap()
+
+        self.assertEqual(report["games"], 1)
+        self.assertFalse(Game.objects.filter(pk=current.pk).exists())
+        self.assertIsNone(Move.objects.get(game=earlier).player_id)
+        # The foreign keys are deferred, so check them as a commit would
+        connection.check_constraints()
@@ -0,0 +1,229 @@
+import uuid
+from datetime import datetime, timezone
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.db import DatabaseError
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+from ..models import Game, Player, PlayerStats
+from ..routing import websocket_urlpatterns
+from .. import matchmaking, reconnect, stats, util
+from .fake_redis import FakeRedisMixin
+
+
+class SnapshotTest(SimpleTestCase):
+    def test_snapshot_round_trip(self):
+        game = Game(
+            id=7,
+            game_code="ABC123",
+            numbers=list(range(1, 26)),
+            called_numbers=[3, 9],
+            snapshot_seq=2,
+            last_move_made_at=datetime(2026, 1, 1, tzinfo=timezone.utc),
+        )
+        board = [list(range(row * 5 + 1, row * 5 + 6)) for row in range(5)]
+        players = [
+            Player(game=game, player_id=uuid.uuid4(), name=name, board=board, turn=turn)
+            for name, turn in (("Ann", True), ("Bob", False))
+        ]
+
+        restored, restored_players = reconnect.restore(
+            reconnect.dump(game, reversed(players))
+        )
+        self.assertEqual(
+            (
+                restored.id,
+                restored.game_code,
+                restored.called_numbers,
+                restored.snapshot_seq,
+            ),
+            (7, "ABC123", [3, 9], 2),
+        )
+        self.assertEqual(restored.last_move_made_at, game.last_move_made_at)
+        self.assertEqual(
+            [(p.player_id, p.name, p.board, p.turn) for p in restored_players],
+            sorted(
+                ((p.player_id, p.name, p.board, p.turn) for p in players),
+                key=lambda values: values[0],
+            ),
+        )
+
+
+class GraceWindowTest(FakeRedisMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.game = Game(
+            id=7, game_code="ABC123", numbers=list(range(1, 26)), called_numbers=[3]
+        )
+        board = [list(range(row * 5 + 1, row * 5 + 6)) for row in range(5)]
+        self.players = [
+            Player(game=self.game, player_id=uuid.uuid4(), board=board, turn=turn)
+            for turn in (True, False)
+        ]
+        self.player_id = str(self.players[0].player_id)
+
+    def make_due(self):
+        self.redis.zadd(
+            reconnect.DEADLINES_KEY, {f"ABC123:{self.player_id}": 0}, xx=True
+        )
+
+    def expire(self):
+        with mock.patch.object(reconnect, "teardown", mock.AsyncMock()) as teardown:
+            torn_down = async_to_sync(reconnect.expire)("layer")
+        return torn_down, teardown
+
+    def test_drop_then_resume(self):
+        reconnect.drop(self.game, self.players, self.player_id)
+        game, players = reconnect.resume("ABC123", self.player_id)
+        self.assertEqual((game.id, game.called_numbers), (7, [3]))
+        self.assertEqual(len(players), 2)
+        # The deadline is gone, so a second resume or a claim finds nothing
+        self.assertIsNone(reconnect.resume("ABC123", self.player_id))
+        self.assertEqual(reconnect.claim_due(), [])
+
+    def test_drop_then_claim_tears_down(self):
+        reconnect.drop(self.game, self.players, self.player_id)
+        self.assertEqual(self.expire()[0], [])
+        self.make_due()
+        torn_down, teardown = self.expire()
+        self.assertEqual(torn_down, ["ABC123"])
+        teardown.assert_awaited_once_with("layer", "ABC123", self.player_id)
+        self.assertEqual(self.redis.zcard(reconnect.DEADLINES_KEY), 0)
+
+    def test_only_last_socket_closing_starts_grace_window(self):
+        reconnect.attach("ABC123", self.player_id)
+        reconnect.attach("ABC123", self.player_id)
+        self.assertEqual(reconnect.detach("ABC123", self.player_id), 1)
+        self.assertTrue(reconnect.connected("ABC123", self.player_id))
+        self.assertEqual(reconnect.detach("ABC123", self.player_id), 0)
+        self.assertFalse(reconnect.connected("ABC123", self.player_id))
+        self.assertFalse(self.redis.exists(reconnect.SOCKETS_KEY.format("ABC123")))
+
+    def test_player_back_before_old_close_is_handled_is_not_torn_down(self):
+        # The new socket connects (resume finds no deadline yet) before the old
+        # socket's close is handled and starts the grace window
+        reconnect.attach("ABC123", self.player_id)
+        self.assertEqual(reconnect.detach("ABC123", self.player_id), 0)
+        self.assertIsNone(reconnect.resume("ABC123", self.player_id))
+        reconnect.attach("ABC123", self.player_id)
+        reconnect.drop(self.game, self.players, self.player_id)
+        self.make_due()
+        torn_down, teardown = self.expire()
+        self.assertEqual(torn_down, [])
+        teardown.assert_not_awaited()
+
+
+@override_settings(
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+    SERVER_TURN_TIMER=False,
+    REAPER_INTERVAL=0,
+    RECONNECT_GRACE=30,
+)
+class ReconnectConsumerTest(FakeRedisMixin, TransactionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.game = util.create_game(numbers=util.generate_numbers())
+        self.player_ids = [str(uuid.uuid4()), str(uuid.uuid4())]
+        for index, player_id in enumerate(self.player_ids):
+            util.create_player(self.game, player_id, f"Player{index}", index == 0)
+        # Deadlines are expired by the tests, not the poller
+        patch = mock.patch.object(reconnect, "ensure_started")
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    async def connect(self, player_id):
+        communicator = WebsocketCommunicator(
+            URLRouter(websocket_urlpatterns), f"/ws/game/{self.game.game_code}/"
+        )
+        communicator.scope["player"] = {"id": player_id, "name": "Player"}
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        self.assertIn('id="board"', await communicator.receive_from())
+        return communicator
+
+    def make_due(self):
+        self.redis.zadd(
+            reconnect.DEADLINES_KEY,
+            {f"{self.game.game_code}:{self.player_ids[1]}": 0},
+            xx=True,
+        )
+
+    async def test_dropped_player_not_back_in_time_ends_the_game(self):
+        stayer = await self.connect(self.player_ids[0])
+        leaver = await self.connect(self.player_ids[1])
+        await leaver.disconnect()
+        # The board sent when the leaver joined, then the wait for them
+        await stayer.receive_from()
+        self.assertIn("reconnect", await stayer.receive_from())
+        self.assertEqual(self.redis.zcard(reconnect.DEADLINES_KEY), 1)
+
+        self.make_due()
+        torn_down = await reconnect.expire(get_channel_layer())
+        self.assertEqual(torn_down, [self.game.game_code])
+        self.assertFalse(await Game.objects.filter(pk=self.game.pk).aexists())
+        left = await PlayerStats.objects.aget(player_id=self.player_ids[1])
+        self.assertEqual((left.games, left.abandoned), (1, 1))
+        await stayer.disconnect()
+
+    async def test_stats_failure_still_ends_the_game(self):
+        stayer = await self.connect(self.player_ids[0])
+        leaver = await self.connect(self.player_ids[1])
+        await leaver.disconnect()
+        self.make_due()
+        with mock.patch.object(
+            stats, "record_abandoned", side_effect=DatabaseError
+        ), self.assertLogs(reconnect.logger, "ERROR"):
+            await reconnect.expire(get_channel_layer())
+        self.assertFalse(await Game.objects.filter(pk=self.game.pk).aexists())
+        await stayer.disconnect()
+
+    async def test_socket_reopened_before_old_one_closes_keeps_the_game(self):
+        stayer = await self.connect(self.player_ids[0])
+        old = await self.connect(self.player_ids[1])
+        new = await self.connect(self.player_ids[1])
+        await old.disconnect()
+        self.assertEqual(self.redis.zcard(reconnect.DEADLINES_KEY), 0)
+        self.assertEqual(await reconnect.expire(get_channel_layer()), [])
+        self.assertTrue(await Game.objects.filter(pk=self.game.pk).aexists())
+        await new.disconnect()
+        await stayer.disconnect()
+
+    async def test_waiting_player_drop_pauses_their_queue_entry(self):
+        waiting = await database_sync_to_async(matchmaking.quick_play)(
+            self.player_ids[0], "Player0"
+        )
+        queued_at = waiting.waiting_since
+        communicator = WebsocketCommunicator(
+            URLRouter(websocket_urlpatterns), f"/ws/game/{waiting.game_code}/"
+        )
+        communicator.scope["player"] = {"id": self.player_ids[0], "name": "Player0"}
+        await communicator.connect()
+        self.assertIn("Waiting for player", await communicator.receive_from())
+        await communicator.disconnect()
+
+        # A newcomer is not seated in the game of a player who may not return
+        await waiting.arefresh_from_db()
+        self.assertIsNone(waiting.waiting_since)
+        newcomer = await database_sync_to_async(matchmaking.quick_play)(
+            str(uuid.uuid4()), "New"
+        )
+        self.assertNotEqual(newcomer.pk, waiting.pk)
+
+        # Back in time: the game keeps its place at the head of the queue
+        communicator = WebsocketCommunicator(
+            URLRouter(websocket_urlpatterns), f"/ws/game/{waiting.game_code}/"
+        )
+        communicator.scope["player"] = {"id": self.player_ids[0], "name": "Player0"}
+        await communicator.connect()
+        await waiting.arefresh_from_db()
+        self.assertEqual(waiting.waiting_since, queued_at)
+        matched = await database_sync_to_async(matchmaking.quick_play)(
+            str(uuid.uuid4()), "Next"
+        )
+        self.assertEqual(matched.pk, waiting.pk)
+        await communicator.disconnect()
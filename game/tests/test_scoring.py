@@ -0,0 +1,58 @@
+from django.test import SimpleTestCase
+
+import random
+
+from .. import scoring, util
+
+
+def naive_completed_lines(board, called_numbers):
+    completed = 0
+    numbers = set()
+    for line in scoring.LINES:
+        cells = [board[row][col] for row, col in line]
+        if all(cell in called_numbers for cell in cells):
+            completed += 1
+            numbers.update(cells)
+    return completed, sorted(numbers)
+
+
+class ScoringTest(SimpleTestCase):
+    def setUp(self):
+        self.board = [
+            [1, 2, 3, 4, 5],
+            [6, 7, 8, 9, 10],
+            [11, 12, 13, 14, 15],
+            [16, 17, 18, 19, 20],
+            [21, 22, 23, 24, 25],
+        ]
+
+    def test_called_mask_round_trip(self):
+        self.assertEqual(
+            scoring.mask_numbers(scoring.called_mask([99, 3, 1])), [1, 3, 99]
+        )
+
+    def test_no_lines(self):
+        called = scoring.called_mask([1, 2, 3, 4])
+        self.assertEqual(scoring.completed_lines(self.board, called), (0, []))
+
+    def test_row_column_and_diagonals(self):
+        called = scoring.called_mask([1, 2, 3, 4, 5, 6, 11, 16, 21, 7, 13, 19, 25])
+        completed, numbers = scoring.completed_lines(self.board, called)
+        self.assertEqual(completed, 3)
+        self.assertEqual(numbers, [1, 2, 3, 4, 5, 6, 7, 11, 13, 16, 19, 21, 25])
+
+    def test_winner(self):
+        called = scoring.called_mask(range(1, 26))
+        self.assertEqual(scoring.completed_lines(self.board, called)[0], 12)
+        self.assertTrue(scoring.is_winner(self.board, called))
+
+    def test_matches_naive_scan(self):
+        rng = random.Random(7)
+        for _ in range(200):
+            numbers = util.generate_numbers()
+            board = util.generate_board(numbers)
+            called_numbers = rng.sample(numbers, rng.randint(0, 25))
+            self.assertEqual(
+                scoring.completed_lines(board, scoring.called_mask(called_numbers)),
+                naive_completed_lines(board, called_numbers),
+            )
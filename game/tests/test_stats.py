@@ -0,0 +1,121 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+import uuid
+
+from ..models import PlayerStats
+from .. import stats, util
+from .fake_redis import FakeRedisMixin
+
+
+class PlayerStatsTest(TestCase):
+    def setUp(self):
+        self.game = util.create_game(numbers=util.generate_numbers())
+        for index in range(2):
+            util.create_player(self.game, str(uuid.uuid4()), f"P{index}", index == 0)
+        self.players = list(self.game.players.order_by("-turn"))
+        self.game.called_numbers = self.game.numbers[:12]
+
+    def stats_for(self, player):
+        return PlayerStats.objects.get(player_id=player.player_id)
+
+    def test_result_counts_win_and_loss(self):
+        winner, loser = self.players
+        with self.captureOnCommitCallbacks() as callbacks:
+            stats.record_result(self.game, [winner])
+        # The leaderboard is only touched once the result is committed
+        self.assertEqual(len(callbacks), 1)
+
+        won = self.stats_for(winner)
+        self.assertEqual((won.games, won.wins, won.losses), (1, 1, 0))
+        self.assertEqual(won.average_moves_to_win, 12)
+        lost = self.stats_for(loser)
+        self.assertEqual((lost.games, lost.wins, lost.losses), (1, 0, 1))
+        self.assertIsNone(lost.average_moves_to_win)
+
+    def test_totals_accumulate_across_games(self):
+        winner, loser = self.players
+        with self.captureOnCommitCallbacks():
+            stats.record_result(self.game, [winner])
+            self.game.called_numbers = self.game.numbers[:20]
+            stats.record_result(self.game, [winner])
+        won = self.stats_for(winner)
+        self.assertEqual((won.games, won.wins), (2, 2))
+        self.assertEqual(won.average_moves_to_win, 16)
+
+    def test_game_finished_twice_is_counted_once(self):
+        winner, loser = self.players
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.assertTrue(util.finish_game(self.game, [winner]))
+            self.assertFalse(util.finish_game(self.game, [winner]))
+        self.assertEqual(len(callbacks), 1)
+        self.game.refresh_from_db()
+        self.assertFalse(self.game.is_active)
+        won = self.stats_for(winner)
+        self.assertEqual((won.games, won.wins), (1, 1))
+        self.assertEqual(self.stats_for(loser).games, 1)
+
+    def test_abandoned_game_is_charged_to_the_leaver(self):
+        leaver, stayer = self.players
+        stats.record_abandoned(self.players, leaver.player_id)
+        left = self.stats_for(leaver)
+        self.assertEqual((left.games, left.abandoned), (1, 1))
+        self.assertEqual(left.abandon_rate, 1)
+        stayed = self.stats_for(stayer)
+        self.assertEqual((stayed.games, stayed.abandoned), (1, 0))
+
+
+class LeaderboardTest(FakeRedisMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.game = util.create_game(numbers=util.generate_numbers())
+        for index in range(3):
+            util.create_player(self.game, str(uuid.uuid4()), f"P{index}", index == 0)
+        self.players = list(self.game.players.order_by("name"))
+        self.game.called_numbers = self.game.numbers[:10]
+
+    def win(self, *winners):
+        with self.captureOnCommitCallbacks(execute=True):
+            stats.record_result(self.game, winners)
+
+    def test_leaderboard_ranks_by_wins(self):
+        first, second, third = self.players
+        self.win(second)
+        self.win(second)
+        self.win(first)
+        self.assertEqual([entry.name for entry in stats.leaderboard()], ["P1", "P0"])
+        self.assertEqual(stats.rank(second.player_id), 1)
+        self.assertEqual(stats.rank(first.player_id), 2)
+        self.assertIsNone(stats.rank(third.player_id))
+
+    def test_leaderboard_is_cached(self):
+        first, second, _ = self.players
+        self.win(first)
+        self.assertEqual([entry.name for entry in stats.leaderboard()], ["P0"])
+        self.win(second)
+        self.win(second)
+        self.assertEqual([entry.name for entry in stats.leaderboard()], ["P0"])
+        # The rank is read from Redis every time
+        self.assertEqual(stats.rank(second.player_id), 1)
+
+    def test_rebuild_reloads_the_sorted_set_from_the_table(self):
+        first, second, third = self.players
+        self.win(first)
+        self.win(second)
+        self.win(second)
+        self.redis.flushall()
+        self.redis.zadd(stats.LEADERBOARD_KEY, {str(third.player_id): 5})
+        with self.assertNumQueries(1):
+            self.assertEqual(stats.rebuild_leaderboard(), 2)
+        self.assertEqual(
+            self.redis.zrevrange(stats.LEADERBOARD_KEY, 0, -1, withscores=True),
+            [(str(second.player_id), 2), (str(first.player_id), 1)],
+        )
+        self.assertFalse(self.redis.exists(f"{stats.LEADERBOARD_KEY}:rebuild"))
+
+    def test_rebuild_without_winners_empties_the_leaderboard(self):
+        self.redis.zadd(stats.LEADERBOARD_KEY, {"stale": 1})
+        self.assertEqual(stats.rebuild_leaderboard(), 0)
+        self.assertFalse(self.redis.exists(stats.LEADERBOARD_KEY))
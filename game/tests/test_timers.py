@@ -0,0 +1,88 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+import uuid
+
+from ..models import Game, PlayerStats
+from .. import movelog, timers, util
+from .fake_redis import FakeRedisMixin
+
+
+@override_settings(SERVER_TURN_TIMER=True)
+class ScheduleTest(FakeRedisMixin, SimpleTestCase):
+    def deadlines(self):
+        return self.redis.zrange(timers.DEADLINES_KEY, 0, -1)
+
+    def test_schedule_replaces_the_previous_deadline(self):
+        timers.schedule("ABC123", 0)
+        timers.schedule("ABC123", 1)
+        timers.schedule("XYZ789", 4)
+        self.assertEqual(sorted(self.deadlines()), ["ABC123:1", "XYZ789:4"])
+
+    def test_claim_returns_due_deadlines_once(self):
+        timers.schedule("ABC123", 3)
+        self.assertEqual(timers.claim_due(), [])
+        with mock.patch.object(timers, "TURN_TIMEOUT", -1):
+            timers.schedule("XYZ789", 4)
+        self.assertEqual(timers.claim_due(), [("XYZ789", 4, 0)])
+        self.assertEqual(timers.claim_due(), [])
+        self.assertEqual(self.deadlines(), ["ABC123:3"])
+
+    def test_auto_picks_in_a_row_are_counted_until_a_real_move(self):
+        with mock.patch.object(timers, "TURN_TIMEOUT", -1):
+            timers.schedule("ABC123", 1, timed_out=True)
+            timers.schedule("ABC123", 2, timed_out=True)
+            self.assertEqual(timers.claim_due(), [("ABC123", 2, 2)])
+            timers.schedule("ABC123", 3)
+            self.assertEqual(timers.claim_due(), [("ABC123", 3, 0)])
+
+    def test_cancel_forgets_the_game(self):
+        timers.schedule("ABC123", 1, timed_out=True)
+        timers.cancel("ABC123")
+        self.assertEqual(self.deadlines(), [])
+        self.assertFalse(self.redis.hexists(timers.SCHEDULED_KEY, "ABC123"))
+        self.assertFalse(self.redis.hexists(timers.TIMEOUTS_KEY, "ABC123"))
+
+    @override_settings(SERVER_TURN_TIMER=False)
+    def test_disabled_schedules_nothing(self):
+        timers.schedule("ABC123", 0)
+        self.assertEqual(self.deadlines(), [])
+
+
+@override_settings(SERVER_TURN_TIMER=True, RECONNECT_GRACE=0)
+class FireTest(FakeRedisMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.game = util.create_game(numbers=util.generate_numbers())
+        self.player_ids = [str(uuid.uuid4()), str(uuid.uuid4())]
+        for index, player_id in enumerate(self.player_ids):
+            util.create_player(self.game, player_id, f"P{index}", index == 0)
+
+    def called(self):
+        return movelog.rebuild(Game.objects.get(pk=self.game.pk)).called_numbers
+
+    def test_expired_turn_auto_picks_and_counts_the_timeout(self):
+        # Let the next turn's deadline fall due at once
+        with mock.patch.object(timers, "TURN_TIMEOUT", -1):
+            kind, result = timers.fire(self.game.game_code, 0, 0)
+        self.assertEqual(kind, "move")
+        self.assertEqual(self.called(), [self.game.numbers[0]])
+        self.assertEqual(str(result.player.player_id), self.player_ids[0])
+        # The opponent's clock is running, with the auto-pick counted
+        self.assertEqual(timers.claim_due(), [(self.game.game_code, 1, 1)])
+
+    def test_stale_deadline_is_ignored(self):
+        self.assertIsNone(timers.fire(self.game.game_code, 3, 0))
+        self.assertEqual(self.called(), [])
+
+    def test_too_many_timeouts_abandon_the_game(self):
+        kind, (game, players) = timers.fire(self.game.game_code, 0, timers.MAX_TIMEOUTS)
+        self.assertEqual(kind, "abandoned")
+        self.game.refresh_from_db()
+        self.assertFalse(self.game.is_active)
+        self.assertEqual(self.called(), [])
+        idle = PlayerStats.objects.get(player_id=self.player_ids[0])
+        other = PlayerStats.objects.get(player_id=self.player_ids[1])
+        self.assertEqual((idle.abandoned, other.abandoned), (1, 0))
+        self.assertIsNone(timers.fire(self.game.game_code, 0, 0))
@@ -0,0 +1,60 @@
+import uuid
+
+from asgiref.sync import async_to_sync
+from channels.layers import InMemoryChannelLayer
+from django.test import SimpleTestCase, override_settings
+
+from ..models import Game, Player
+from ..moves import MoveResult
+from .. import broadcast, tracing
+
+
+class TracingTest(SimpleTestCase):
+    def setUp(self):
+        tracing._buffer.clear()
+
+    @override_settings(TRACE_SAMPLE_RATE=0)
+    def test_unsampled_moves_record_nothing(self):
+        with tracing.trace("move") as record:
+            with tracing.span("render"):
+                pass
+        self.assertIsNone(record)
+        self.assertEqual(tracing.recent(), [])
+
+    @override_settings(TRACE_SAMPLE_RATE=1)
+    def test_spans_are_recorded_under_the_trace(self):
+        with tracing.trace("move") as record:
+            with tracing.span("render"):
+                pass
+        with tracing.resume("game_update", record.trace_id):
+            with tracing.span("send"):
+                pass
+        (records,) = tracing.recent()
+        self.assertEqual([r["name"] for r in records], ["move", "game_update"])
+        self.assertEqual(records[0]["spans"][0]["name"], "render")
+        self.assertEqual(records[1]["spans"][0]["name"], "send")
+
+    @override_settings(TRACE_SAMPLE_RATE=0)
+    def test_resume_without_trace_id_records_nothing(self):
+        with tracing.resume("game_update", None) as record:
+            pass
+        self.assertIsNone(record)
+
+    @override_settings(TRACE_SAMPLE_RATE=1)
+    def test_event_carries_trace_id(self):
+        game = Game(game_code="ABC123", numbers=list(range(1, 26)), called_numbers=[7])
+        board = [list(range(row * 5 + 1, row * 5 + 6)) for row in range(5)]
+        player = Player(game=game, player_id=uuid.uuid4(), board=board)
+        opponent = Player(game=game, player_id=uuid.uuid4(), board=board, turn=True)
+        layer = InMemoryChannelLayer()
+        channel = async_to_sync(layer.new_channel)()
+        async_to_sync(layer.group_add)(broadcast.group_name("ABC123"), channel)
+
+        with tracing.trace("move") as record:
+            async_to_sync(broadcast.publish_move)(
+                layer, MoveResult(game, player, opponent, 7)
+            )
+        event = async_to_sync(layer.receive)(channel)
+        self.assertEqual(event["trace_id"], record.trace_id)
+        names = [span["name"] for span in tracing.recent()[0][0]["spans"]]
+        self.assertEqual(names, ["render", "group_send", "spectators"])
@@ -0,0 +1,123 @@
+import asyncio
+import json
+
+from django.test import SimpleTestCase
+from django.urls import reverse
+
+from .. import workers
+
+
+class HashRingTest(SimpleTestCase):
+    def test_game_paths_share_a_code(self):
+        paths = [
+            reverse("game", args=["ABC123"]),
+            reverse("watch", args=["ABC123"]),
+            reverse("make_move", args=["ABC123"]),
+            "/ws/game/ABC123/",
+            "/ws/game/ABC123/watch/",
+            "/ws/room/ABC123/",
+        ]
+        self.assertEqual({workers.game_code_for(path) for path in paths}, {"ABC123"})
+        self.assertIsNone(workers.game_code_for(reverse("join")))
+        self.assertIsNone(workers.game_code_for("/metrics"))
+
+    def test_losing_a_node_only_moves_its_keys(self):
+        ring = workers.HashRing(range(4))
+        codes = [f"G{index}" for index in range(2000)]
+        before = {code: ring.node_for(code) for code in codes}
+        after = {code: ring.node_for(code, alive={0, 1, 3}) for code in codes}
+
+        moved = {code for code in codes if before[code] != after[code]}
+        self.assertEqual(moved, {code for code in codes if before[code] == 2})
+        # Every node gets a fair share
+        for node in range(4):
+            self.assertGreater(list(before.values()).count(node), 2000 / 4 * 0.7)
+
+    def test_rewrite_head_closes_plain_requests_only(self):
+        head = (
+            b"GET /game/ABC123/ HTTP/1.1\r\nHost: x\r\n"
+            b"Connection: keep-alive\r\nX-Forwarded-For: 6.6.6.6\r\n\r\n"
+        )
+        self.assertEqual(
+            workers.rewrite_head(head, "10.0.0.1"),
+            b"GET /game/ABC123/ HTTP/1.1\r\nHost: x\r\n"
+            b"Connection: close\r\nX-Forwarded-For: 10.0.0.1\r\n\r\n",
+        )
+        upgrade = (
+            b"GET /ws/game/ABC123/ HTTP/1.1\r\nConnection: Upgrade\r\n"
+            b"Upgrade: websocket\r\n\r\n"
+        )
+        self.assertIn(b"Connection: Upgrade", workers.rewrite_head(upgrade, "h"))
+        self.assertTrue(
+            workers.rewrite_head(head, "h", "/metrics").startswith(
+                b"GET /metrics HTTP/1.1\r\n"
+            )
+        )
+
+    def test_worker_paths(self):
+        self.assertEqual(workers.worker_path("/workers/2/metrics"), (2, "/metrics"))
+        self.assertEqual(
+            workers.worker_path("/workers/0/admin/traces/?limit=5"),
+            (0, "/admin/traces/?limit=5"),
+        )
+        self.assertIsNone(workers.worker_path("/workers/x/metrics"))
+        self.assertIsNone(workers.worker_path("/metrics"))
+
+
+class RouterTest(SimpleTestCase):
+    async def request(self, port, path):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: x\r\n\r\n".encode())
+        response = await reader.read()
+        writer.close()
+        return response
+
+    async def test_routes_games_to_one_worker_and_reports_health(self):
+        paths = []
+
+        async def backend(reader, writer):
+            head = await reader.readuntil(b"\r\n\r\n")
+            paths.append(head.split(b" ", 2)[1].decode())
+            port = writer.get_extra_info("sockname")[1]
+            writer.write(workers._response("200 OK", str(port).encode()))
+            writer.close()
+
+        backends = [
+            await asyncio.start_server(backend, workers.WORKER_HOST, 0)
+            for _ in range(3)
+        ]
+        pool = []
+        for index, server in enumerate(backends):
+            worker = workers.Worker(index, server.sockets[0].getsockname()[1])
+            worker.healthy = True
+            pool.append(worker)
+        router = workers.Router(pool)
+        server = await asyncio.start_server(router.handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            for code in ("AAA111", "BBB222", "CCC333"):
+                expected = pool[router.ring.node_for(code)].port
+                for path in (f"/game/{code}/", f"/game/{code}/make-move/"):
+                    response = await self.request(port, path)
+                    self.assertTrue(response.endswith(str(expected).encode()))
+
+            # /workers/<n>/ pins a request to worker n and strips the prefix
+            for worker in pool:
+                response = await self.request(port, f"/workers/{worker.index}/metrics")
+                self.assertTrue(response.endswith(str(worker.port).encode()))
+            self.assertEqual(paths[-1], "/metrics")
+
+            pool[1].healthy = False
+            response = await self.request(port, "/workers/1/metrics")
+            self.assertTrue(response.startswith(b"HTTP/1.1 502"))
+            response = await self.request(port, "/healthz")
+            self.assertTrue(response.startswith(b"HTTP/1.1 503"))
+            health = json.loads(response.split(b"\r\n\r\n", 1)[1])
+            self.assertEqual(
+                [worker["healthy"] for worker in health["workers"]],
+                [True, False, True],
+            )
+        finally:
+            server.close()
+            for backend_server in backends:
+                backend_server.close()
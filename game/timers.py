@@ -0,0 +1,194 @@
+"""
+Server-side turn timer.
+
+Each active game has one pending deadline in a Redis sorted set, scored by
+the time its current turn runs out. The member is "<game_code>:<moves>", the
+number of called numbers when it was scheduled, so a deadline that fires
+after a move has already been made is recognised as stale and ignored.
+
+`run()` polls for due deadlines. Claiming them is a single Lua script that
+removes what it returns, so any number of workers can poll the same set and
+each deadline fires exactly once. A due deadline auto-picks for the player
+on turn; after MAX_TIMEOUTS auto-picks in a row the game is abandoned.
+"""
+
+import asyncio
+import logging
+
+from asgiref.sync import sync_to_async
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import Game, Player
+from .redis_client import get_client
+from . import stats
+
+logger = logging.getLogger(__name__)
+
+TURN_TIMEOUT = 15
+# Auto-picks in a row before the game is treated as abandoned (45s idle)
+MAX_TIMEOUTS = 2
+POLL_INTERVAL = 0.5
+CLAIM_BATCH = 100
+
+DEADLINES_KEY = "bingo:turn:deadlines"
+SCHEDULED_KEY = "bingo:turn:scheduled"
+TIMEOUTS_KEY = "bingo:turn:timeouts"
+
+SCHEDULE_SCRIPT = """
+local old = redis.call('HGET', KEYS[2], ARGV[1])
+if old then
+    redis.call('ZREM', KEYS[1], ARGV[1] .. ':' .. old)
+end
+redis.call('ZADD', KEYS[1], ARGV[3], ARGV[1] .. ':' .. ARGV[2])
+redis.call('HSET', KEYS[2], ARGV[1], ARGV[2])
+if ARGV[4] == '1' then
+    redis.call('HINCRBY', KEYS[3], ARGV[1], 1)
+else
+    redis.call('HDEL', KEYS[3], ARGV[1])
+end
+"""
+
+CANCEL_SCRIPT = """
+local old = redis.call('HGET', KEYS[2], ARGV[1])
+if old then
+    redis.call('ZREM', KEYS[1], ARGV[1] .. ':' .. old)
+end
+redis.call('HDEL', KEYS[2], ARGV[1])
+redis.call('HDEL', KEYS[3], ARGV[1])
+"""
+
+CLAIM_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+local claimed = {}
+for _, member in ipairs(due) do
+    redis.call('ZREM', KEYS[1], member)
+    local code = string.match(member, '^(.*):')
+    claimed[#claimed + 1] = member
+    claimed[#claimed + 1] = redis.call('HGET', KEYS[3], code) or '0'
+end
+return claimed
+"""
+
+_scripts = {}
+_task = None
+
+
+def enabled():
+    return settings.SERVER_TURN_TIMER
+
+
+def _run_script(source, args):
+    if source not in _scripts:
+        _scripts[source] = get_client().register_script(source)
+    return _scripts[source](
+        keys=[DEADLINES_KEY, SCHEDULED_KEY, TIMEOUTS_KEY], args=args
+    )
+
+
+def schedule(game_code, moves, timed_out=False):
+    """
+    Start the turn clock for a game with `moves` numbers called, replacing its
+    previous deadline. `timed_out` marks the last move as an auto-pick.
+    """
+    if not enabled():
+        return
+    deadline = timezone.now().timestamp() + TURN_TIMEOUT
+    _run_script(SCHEDULE_SCRIPT, [game_code, moves, deadline, int(timed_out)])
+
+
+def cancel(game_code):
+    if not enabled():
+        return
+    _run_script(CANCEL_SCRIPT, [game_code])
+
+
+def claim_due(limit=CLAIM_BATCH):
+    """Removes and returns [(game_code, moves, timeouts)] for deadlines that passed."""
+    claimed = _run_script(CLAIM_SCRIPT, [timezone.now().timestamp(), limit])
+    due = []
+    for member, timeouts in zip(claimed[::2], claimed[1::2]):
+        game_code, moves = member.rsplit(":", 1)
+        due.append((game_code, int(moves), int(timeouts)))
+    return due
+
+
+def fire(game_code, moves_at_schedule, timeouts):
+    """
+    Handle an expired turn. Returns ("move", MoveResult), ("abandoned",
+    (game, players)), or None when the deadline is stale or the game is gone.
+    """
+    from . import moves
+
+    try:
+        game, players = moves.load_game(game_code)
+    except Game.DoesNotExist:
+        return None
+    if len(game.called_numbers) != moves_at_schedule:
+        return None
+
+    if timeouts >= MAX_TIMEOUTS:
+        abandoned = moves.abandon_game(game_code)
+        idle = next((p for p in players if p.turn), None)
+        if abandoned and idle is not None and len(players) > 1:
+            stats.record_abandoned(players, idle.player_id)
+        return "abandoned", (game, players)
+
+    player = next((p for p in players if p.turn), None)
+    if player is None or len(players) < 2:
+        return None
+    try:
+        return "move", moves.play_move(game_code, player.player_id, timed_out=True)
+    except (moves.MoveError, Player.DoesNotExist):
+        return None
+
+
+async def handle(channel_layer, game_code, moves_at_schedule, timeouts):
+    from . import broadcast
+
+    outcome = await database_sync_to_async(fire)(game_code, moves_at_schedule, timeouts)
+    if outcome is None:
+        return
+    kind, result = outcome
+    if kind == "move":
+        await broadcast.publish_move(channel_layer, result)
+    else:
+        await channel_layer.group_send(
+            broadcast.group_name(game_code),
+            {
+                "type": "game_update",
+                "html": await sync_to_async(render_to_string)(
+                    "partials/game_over.html"
+                ),
+            },
+        )
+        game, players = result
+        await broadcast.publish_spectators(channel_layer, game, players, abandoned=True)
+
+
+async def run(interval=POLL_INTERVAL):
+    """Poll for expired turns forever."""
+    channel_layer = get_channel_layer()
+    while True:
+        try:
+            due = await sync_to_async(claim_due)()
+        except Exception:
+            logger.exception("Claiming turn deadlines failed")
+            due = []
+        for game_code, moves_at_schedule, timeouts in due:
+            try:
+                await handle(channel_layer, game_code, moves_at_schedule, timeouts)
+            except Exception:
+                logger.exception("Turn timeout for game %s failed", game_code)
+        await asyncio.sleep(interval)
+
+
+def ensure_started():
+    """Start the poller in the running event loop if it isn't running already."""
+    global _task
+    if not enabled() or (_task is not None and not _task.done()):
+        return
+    _task = asyncio.get_running_loop().create_task(run())
@@ -0,0 +1,143 @@
+"""
+Lightweight tracing of a move from the request to every socket send.
+
+A trace is started where a move comes in (the make_move view or a socket
+message), for a TRACE_SAMPLE_RATE share of moves. Its id travels inside the
+channel layer event, and each consumer that handles the event records its own
+trace under the same id, so the admin page can show the move and its fan-out
+together. A span records its wall time and, with `db=True`, the time spent in
+queries run on its thread.
+
+Finished traces go to an in-memory ring buffer per process (admin/traces/)
+and to the "game.tracing" logger as JSON.
+"""
+
+import json
+import logging
+import random
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+BUFFER_SIZE = 500
+
+_current = ContextVar("trace", default=None)
+_buffer = deque(maxlen=BUFFER_SIZE)
+
+
+class Trace:
+    def __init__(self, name, trace_id=None):
+        self.trace_id = trace_id or uuid.uuid4().hex[:16]
+        self.name = name
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.spans = []
+        self.attributes = {}
+
+    def as_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_ms": (time.perf_counter() - self._start) * 1000,
+            "spans": sorted(self.spans, key=lambda span: span["offset_ms"]),
+            **self.attributes,
+        }
+
+
+def current():
+    return _current.get()
+
+
+def current_id():
+    trace = _current.get()
+    return trace.trace_id if trace else None
+
+
+@contextmanager
+def trace(name, trace_id=None):
+    """
+    Record a trace around the `with` block. A new trace is sampled at
+    TRACE_SAMPLE_RATE; passing the `trace_id` of an upstream trace always
+    records, since that move was already sampled. Yields the Trace or None.
+    """
+    if trace_id is None and random.random() >= settings.TRACE_SAMPLE_RATE:
+        yield None
+        return
+    record = Trace(name, trace_id)
+    token = _current.set(record)
+    try:
+        yield record
+    finally:
+        _current.reset(token)
+        finish(record)
+
+
+@contextmanager
+def resume(name, trace_id):
+    """Record the handling of an event under the trace id it carries, if any."""
+    if trace_id is None:
+        yield None
+        return
+    with trace(name, trace_id) as record:
+        yield record
+
+
+@contextmanager
+def span(name, db=False):
+    """Add a span to the current trace, if there is one."""
+    record = _current.get()
+    if record is None:
+        yield
+        return
+    db_time = [0.0, 0]
+    start = time.perf_counter()
+    try:
+        if db:
+            with connection.execute_wrapper(_timer(db_time)):
+                yield
+        else:
+            yield
+    finally:
+        entry = {
+            "name": name,
+            "offset_ms": (start - record._start) * 1000,
+            "duration_ms": (time.perf_counter() - start) * 1000,
+        }
+        if db:
+            entry["db_ms"] = db_time[0] * 1000
+            entry["queries"] = db_time[1]
+        record.spans.append(entry)
+
+
+def _timer(db_time):
+    def execute(execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            db_time[0] += time.perf_counter() - start
+            db_time[1] += 1
+
+    return execute
+
+
+def finish(record):
+    data = record.as_dict()
+    _buffer.append(data)
+    logger.info(json.dumps(data))
+
+
+def recent():
+    """Returns the buffered traces, newest first, grouped by trace id."""
+    grouped = {}
+    for data in reversed(_buffer):
+        grouped.setdefault(data["trace_id"], []).append(data)
+    return [list(reversed(records)) for records in grouped.values()]
@@ -5,5 +5,8 @@ from . import views
 urlpatterns = [
     path("", views.join_game, name="join"),
     path("game/<str:game_code>/", views.game_room, name="game"),
+    path("game/<str:game_code>/watch/", views.watch_game, name="watch"),
     path("game/<str:game_code>/make-move/", views.make_move, name="make_move"),
+    path("leaderboard/", views.leaderboard, name="leaderboard"),
+    path("metrics", views.metrics_view, name="metrics"),
 ]
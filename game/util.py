@@ -1,9 +1,13 @@
 import random
-import string
 
 from asgiref.sync import async_to_sync
+from django.db import IntegrityError, transaction
+from django.db.models import F
 
 from .models import Game, Player
+from . import codes, live_state, movelog, scoring, stats, timers, tracing
+
+CREATE_GAME_ATTEMPTS = 5
 
 
 def generate_numbers():
@@ -18,18 +22,33 @@ def generate_board(numbers):
     return board
 
 
-def generate_unique_game_code(length=6):
-    chars = string.ascii_uppercase + string.digits
-    while True:
-        code = "".join(random.choices(chars, k=length))
-        if not Game.objects.filter(game_code=code).exists():
-            return code
+def generate_unique_game_code():
+    """Allocate a game code; unique by construction, no lookup needed."""
+    return codes.next_code()
+
+
+def create_game(**fields):
+    """
+    Create a game with a newly allocated code. A code already taken by a game
+    from before codes were allocated is skipped by the unique constraint.
+    """
+    for attempt in range(CREATE_GAME_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                return Game.objects.create(
+                    game_code=generate_unique_game_code(), **fields
+                )
+        except IntegrityError:
+            if attempt == CREATE_GAME_ATTEMPTS - 1:
+                raise
 
 
 def create_player(game, player_id, player_name, is_first_player=False):
     """Create or update a player in the game."""
+    rosters = {game.pk}
     if Player.objects.filter(player_id=player_id).exists():
         player = Player.objects.get(player_id=player_id)
+        rosters.add(player.game_id)
         player.name = player_name
         player.game = game
         player.board = generate_board(numbers=game.numbers)
@@ -43,22 +62,82 @@ def create_player(game, player_id, player_name, is_first_player=False):
             turn=is_first_player,
             name=player_name,
         )
+    # Caller rooms hold every board in memory; tell them to reload
+    Game.objects.filter(pk__in=rosters, mode=Game.CALLER).update(
+        roster_version=F("roster_version") + 1
+    )
+
+
+def write_back(game):
+    """
+    Log the moves of a game loaded from Redis, which so far only exist there,
+    and return the fields that bring its row up to date. Call it before the
+    live state is discarded.
+    """
+    movelog.write_behind(game, live_state.callers(game.game_code))
+    # The instance from Redis lacks created_at, mode and waiting_since
+    return {
+        "called_numbers": game.called_numbers,
+        "snapshot_seq": game.snapshot_seq,
+        "last_move_made_at": game.last_move_made_at,
+    }
+
+
+def finish_game(game, winners, **fields):
+    """
+    Mark the game finished, writing `fields` with it, and count it in the
+    players' stats. Only the call that flips is_active does either, so a
+    result reported twice is counted once. Returns whether this call did.
+    """
+    with transaction.atomic():
+        finished = Game.objects.filter(pk=game.pk, is_active=True).update(
+            is_active=False, **fields
+        )
+        if finished:
+            stats.record_result(game, winners)
+    game.is_active = False
+    return bool(finished)
+
+
+def end_game(player, *others):
+    """
+    Mark the player's game as won (by `others` too, on a shared winning call)
+    and finished, and count it in everyone's stats.
+    """
+    game = player.game
+    with tracing.span("end_game", db=True):
+        if live_state.enabled():
+            finish_game(game, (player, *others), **write_back(game))
+            live_state.discard(game.game_code)
+        else:
+            finish_game(game, (player, *others))
+        timers.cancel(game.game_code)
+
+
+def game_result_event(player, *others):
+    """The game_result event for one winner, or several winning on the same call."""
+    return {
+        "type": "game_result",
+        "winner_id": str(player.player_id),
+        "winner_ids": [str(p.player_id) for p in (player, *others)],
+    }
 
 
-def announce_winner(channel_layer, group_code, player):
-    """Announce the winner of the game."""
-    player.game.is_active = False
-    player.game.save()
+def announce_winner(channel_layer, group_code, player, *others):
+    """Announce the winner (or joint winners) of the game."""
+    end_game(player, *others)
     async_to_sync(channel_layer.group_send)(
-        group_code,
-        {
-            "type": "game_result",
-            "winner_id": str(player.player_id),
-        },
+        group_code, game_result_event(player, *others)
     )
 
 
-def get_random_number(game):
+def get_random_number(game, called=None):
+    """
+    The next of the game's numbers not yet called, or None. `called` is the
+    game's called numbers as a `scoring.called_mask` bitset, if already made.
+    """
+    if called is None:
+        called = scoring.called_mask(game.called_numbers)
     for num in game.numbers:
-        if num not in game.called_numbers:
+        if not called >> num & 1:
             return num
@@ -0,0 +1,323 @@
+"""
+Multi-process serving: several daphne workers behind one port, with game affinity.
+
+`manage.py runworkers` starts WEB_WORKERS daphne processes on local ports
+from WORKER_BASE_PORT, and a small asyncio TCP router on the public port. The
+router reads the request line of each connection and sends everything for a
+game code (its page, watch page, make-move posts and sockets) to the same
+worker. The worker is picked on a consistent hash ring, so a worker that goes
+down only moves its own share of games. Requests with no game code in the path
+are spread round robin.
+
+Metrics and traces are kept per process, so /metrics or /admin/traces/ on
+the router would show a different worker's numbers on every request.
+`/workers/<n>/<path>` is sent to worker n as `/<path>`, so each worker can be
+scraped (`/workers/0/metrics`, `/workers/1/metrics`, ...) and its traces
+read on their own.
+
+Proxied HTTP requests are told to close their connection after the response,
+so a keep-alive connection can't carry a request for another game to the
+wrong worker. WebSocket upgrades are piped through as they are.
+
+Workers that exit are restarted, with backoff if they keep dying on start.
+A worker is healthy while it accepts connections. GET /healthz on the router
+reports every worker and answers 503 while any is down. Games of a down
+worker go to the next worker on the ring until it is back.
+"""
+
+import asyncio
+import bisect
+import hashlib
+import itertools
+import json
+import logging
+import re
+import signal
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+WORKER_HOST = "127.0.0.1"
+# Points per worker on the hash ring; more evens out each worker's share
+REPLICAS = 100
+# Largest request head the router reads before picking a worker
+HEAD_LIMIT = 64 * 1024
+PROBE_INTERVAL = 2
+PROBE_TIMEOUT = 1
+# A worker that dies sooner than this after starting is restarted with backoff
+STABLE_AFTER = 30
+MAX_BACKOFF = 30
+PIPE_CHUNK = 64 * 1024
+
+GAME_PATH = re.compile(r"^/(?:ws/)?(?:game|room)/([^/?#]+)")
+WORKER_PATH = re.compile(r"^/workers/(\d+)(/.*)$")
+HOP_HEADERS = (b"connection", b"keep-alive")
+
+
+def game_code_for(path):
+    """The game code in an HTTP or WebSocket path, or None."""
+    match = GAME_PATH.match(path)
+    return match.group(1) if match else None
+
+
+def worker_path(path):
+    """(worker index, path on the worker) for a /workers/<n>/ path, or None."""
+    match = WORKER_PATH.match(path)
+    return (int(match.group(1)), match.group(2)) if match else None
+
+
+def _hash(key):
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent hash ring of worker indexes, REPLICAS points per worker."""
+
+    def __init__(self, nodes, replicas=REPLICAS):
+        self.points = sorted(
+            (_hash(f"{node}:{replica}"), node)
+            for node in nodes
+            for replica in range(replicas)
+        )
+        self.hashes = [point for point, _ in self.points]
+
+    def node_for(self, key, alive=None):
+        """The node owning `key`, skipping nodes not in `alive` if given."""
+        start = bisect.bisect(self.hashes, _hash(key))
+        for offset in range(len(self.points)):
+            node = self.points[(start + offset) % len(self.points)][1]
+            if alive is None or node in alive:
+                return node
+        return None
+
+
+def rewrite_head(head, client_host, path=None):
+    """
+    The request head to send upstream: marked with the client's address and,
+    unless it is a WebSocket upgrade, asking to close after the response.
+    `path` replaces the request's path if given.
+    """
+    request_line, *lines = head.rstrip(b"\r\n").split(b"\r\n")
+    if path is not None:
+        method, _, version = request_line.split(b" ", 2)
+        request_line = b" ".join([method, path.encode("latin1"), version])
+    headers = []
+    for line in lines:
+        name = line.partition(b":")[0].strip().lower()
+        if name != b"x-forwarded-for":
+            headers.append((name, line))
+    upgrade = any(
+        name == b"upgrade" and b"websocket" in line.lower() for name, line in headers
+    )
+    lines = [line for name, line in headers if upgrade or name not in HOP_HEADERS]
+    if not upgrade:
+        lines.append(b"Connection: close")
+    lines.append(b"X-Forwarded-For: " + client_host.encode())
+    return b"\r\n".join([request_line, *lines]) + b"\r\n\r\n"
+
+
+def _response(status, body, content_type="application/json"):
+    return (
+        f"HTTP/1.1 {status}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        "Connection: close\r\n\r\n"
+    ).encode() + body
+
+
+async def _pipe(reader, writer):
+    try:
+        while data := await reader.read(PIPE_CHUNK):
+            writer.write(data)
+            await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def _accepts(port):
+    try:
+        _, writer = await asyncio.wait_for(
+            asyncio.open_connection(WORKER_HOST, port), PROBE_TIMEOUT
+        )
+    except (OSError, asyncio.TimeoutError):
+        return False
+    writer.close()
+    return True
+
+
+class Worker:
+    def __init__(self, index, port):
+        self.index = index
+        self.port = port
+        self.process = None
+        self.healthy = False
+        self.restarts = 0
+
+    def command(self):
+        return [
+            sys.executable,
+            "-m",
+            "daphne",
+            "--bind",
+            WORKER_HOST,
+            "--port",
+            str(self.port),
+            "--proxy-headers",
+            "bingo.asgi:application",
+        ]
+
+    def status(self):
+        return {
+            "index": self.index,
+            "port": self.port,
+            "pid": self.process.pid if self.process else None,
+            "healthy": self.healthy,
+            "restarts": self.restarts,
+            "metrics": f"/workers/{self.index}/metrics",
+        }
+
+
+class Router:
+    """Proxies connections to the workers, by game code where there is one."""
+
+    def __init__(self, workers):
+        self.workers = workers
+        self.ring = HashRing(worker.index for worker in workers)
+        self._turn = itertools.count()
+
+    def pick(self, path):
+        pinned = worker_path(path)
+        if pinned is not None:
+            index = pinned[0]
+            if index < len(self.workers) and self.workers[index].healthy:
+                return self.workers[index]
+            return None
+        alive = {worker.index for worker in self.workers if worker.healthy}
+        if not alive:
+            return None
+        code = game_code_for(path)
+        if code is None:
+            ordered = sorted(alive)
+            index = ordered[next(self._turn) % len(ordered)]
+        else:
+            index = self.ring.node_for(code, alive)
+        return self.workers[index]
+
+    def health(self):
+        return {
+            "healthy": all(worker.healthy for worker in self.workers),
+            "workers": [worker.status() for worker in self.workers],
+        }
+
+    async def handle(self, reader, writer):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+            _, path, _ = head.split(b"\r\n", 1)[0].decode("latin1").split(" ", 2)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            writer.close()
+            return
+
+        if path == "/healthz":
+            health = self.health()
+            writer.write(
+                _response(
+                    "200 OK" if health["healthy"] else "503 Service Unavailable",
+                    json.dumps(health).encode(),
+                )
+            )
+            writer.close()
+            return
+
+        worker = self.pick(path)
+        try:
+            if worker is None:
+                raise OSError("No healthy workers")
+            upstream_reader, upstream_writer = await asyncio.open_connection(
+                WORKER_HOST, worker.port
+            )
+        except OSError:
+            writer.write(_response("502 Bad Gateway", b"", "text/plain"))
+            writer.close()
+            return
+        client_host = (writer.get_extra_info("peername") or ("",))[0]
+        pinned = worker_path(path)
+        upstream_writer.write(
+            rewrite_head(head, client_host, pinned[1] if pinned else None)
+        )
+        await asyncio.gather(
+            _pipe(reader, upstream_writer), _pipe(upstream_reader, writer)
+        )
+
+
+class Supervisor:
+    """Runs the workers and the router until SIGINT or SIGTERM."""
+
+    def __init__(self, workers, host, port, base_port):
+        self.workers = [Worker(index, base_port + index) for index in range(workers)]
+        self.router = Router(self.workers)
+        self.host = host
+        self.port = port
+        self.stopping = False
+
+    async def keep(self, worker):
+        """Run a worker, restarting it whenever it exits."""
+        backoff = 0
+        while not self.stopping:
+            started = time.monotonic()
+            worker.process = await asyncio.create_subprocess_exec(*worker.command())
+            returncode = await worker.process.wait()
+            worker.healthy = False
+            if self.stopping:
+                return
+            worker.restarts += 1
+            if time.monotonic() - started > STABLE_AFTER:
+                backoff = 0
+            else:
+                backoff = min(backoff * 2 or 1, MAX_BACKOFF)
+            logger.warning(
+                "Worker %d exited with %s, restarting in %ds",
+                worker.index,
+                returncode,
+                backoff,
+            )
+            await asyncio.sleep(backoff)
+
+    async def probe(self):
+        while True:
+            for worker in self.workers:
+                healthy = await _accepts(worker.port)
+                if healthy != worker.healthy:
+                    logger.info(
+                        "Worker %d is %s",
+                        worker.index,
+                        "healthy" if healthy else "down",
+                    )
+                worker.healthy = healthy
+            await asyncio.sleep(PROBE_INTERVAL)
+
+    async def serve(self):
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stop.set)
+
+        keepers = [asyncio.create_task(self.keep(worker)) for worker in self.workers]
+        prober = asyncio.create_task(self.probe())
+        server = await asyncio.start_server(
+            self.router.handle, self.host, self.port, limit=HEAD_LIMIT
+        )
+        logger.info(
+            "Routing %s:%d to %d workers", self.host, self.port, len(self.workers)
+        )
+        async with server:
+            await stop.wait()
+
+        self.stopping = True
+        prober.cancel()
+        for worker in self.workers:
+            if worker.process and worker.process.returncode is None:
+                worker.process.terminate()
+        await asyncio.gather(*keepers, return_exceptions=True)